@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark: near-duplicate suppression latency on the /suggest path.
+
+Times ``diversity.diversify`` (shingle, fingerprint and compare the whole pool,
+then pick distinct suggestions) for pools of the sizes ``/suggest`` sees,
+where about a third of the candidates are light rewrites of another one.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_diversity
+"""
+
+import random
+import statistics
+import time
+
+from backend import diversity
+from backend.providers.base import SuggestionItem
+
+QUERIES = 5000
+WORDS = ("hey sure thing lol omw see you soon tomorrow dinner movie work late call me later ok sounds good "
+         "haha meeting friday report thanks weekend plans coffee").split()
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main() -> None:
+    rng = random.Random(0)
+    for pool_size in (3, 6, 10):
+        samples = []
+        for _ in range(QUERIES):
+            texts = [" ".join(rng.choices(WORDS, k=rng.randint(3, 12))) for _ in range(pool_size)]
+            for i in range(1, pool_size, 3):
+                texts[i] = texts[i - 1].capitalize() + "!"
+            pool = [SuggestionItem(text=t, tone="casual") for t in texts]
+            context = " ".join(rng.choices(WORDS, k=12)) + "?"
+            t0 = time.perf_counter()
+            diversity.diversify(pool, 3, context=context)
+            samples.append(time.perf_counter() - t0)
+        p50, p99 = _percentiles(samples)
+        print(f"diversify {pool_size:>2} candidates: p50 {p50:.0f} us, p99 {p99:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
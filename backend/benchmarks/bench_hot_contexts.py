@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark: hot-context table build and lookup latency.
+
+Builds tables of precomputed suggestions for the most frequent contexts and
+times ``HotContextTable.lookup`` for hits and misses, and the canonicalization
+that produces the lookup key.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_hot_contexts
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from backend import canonical
+from backend.hot_contexts import HotContextTable, table_key, write
+from backend.providers.base import SuggestionItem
+
+QUERIES = 20000
+MODES = ["casual", "formal", "witty"]
+WORDS = "sorry traffic train bus again today tonight home work soon almost there ok thanks".split()
+SUGGESTIONS = [SuggestionItem(text=f"Sounds good, see you at <time1> ({i})", tone=MODES[i % 3]) for i in range(9)]
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main() -> None:
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hot.tbl")
+        for size in (1000, 10000):
+            contexts = [f"running late {' '.join(rng.choices(WORDS, k=4))}, see you at 5pm?" for _ in range(size)]
+            keys = [table_key(canonical.canonicalize(c).key, MODES, 5, "mock") for c in contexts]
+            started = time.perf_counter()
+            write(path, dict.fromkeys(keys, SUGGESTIONS))
+            print(f"build {size:>5} entries: {(time.perf_counter() - started) * 1e3:.0f} ms, "
+                  f"{os.path.getsize(path) / 1024:.0f} KiB")
+
+            table = HotContextTable(path)
+            for name, probe in (("hit", keys), ("miss", [k + b"?" for k in keys])):
+                samples = []
+                for _ in range(QUERIES):
+                    key = rng.choice(probe)
+                    t0 = time.perf_counter()
+                    table.lookup(key)
+                    samples.append(time.perf_counter() - t0)
+                p50, p99 = _percentiles(samples)
+                print(f"  lookup {name:<4}: p50 {p50:.1f} us, p99 {p99:.1f} us")
+
+    samples = []
+    for _ in range(QUERIES):
+        context = rng.choice(["Meet at 5pm?", "thanks!!", "Running late, see you at 7:30 John", "ok see you soon 😊"])
+        t0 = time.perf_counter()
+        canonical.canonicalize(context)
+        samples.append(time.perf_counter() - t0)
+    p50, p99 = _percentiles(samples)
+    print(f"canonicalize: p50 {p50:.1f} us, p99 {p99:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark: personalization read latency from the hot tier and from SQLite.
+
+Writes a few thousand users with ~2 KB of artifacts, then times ``get_json``
+for hot users (served from the in-memory LRU) and cold users (hot tier too
+small, so every read goes to SQLite) and reports p50/p99.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_personalization_store
+"""
+
+import os
+import statistics
+import tempfile
+import time
+
+from backend.personalization_store import PersonalizationStore
+from backend.shared_state import LocalVersionIndex
+
+USERS = 5000
+READS = 20000
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def _time_reads(store: PersonalizationStore, users) -> tuple:
+    samples = []
+    for i in range(READS):
+        user = users[i % len(users)]
+        started = time.perf_counter()
+        store.get_json(user)
+        samples.append(time.perf_counter() - started)
+    return _percentiles(samples)
+
+
+def run() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "personalization.db")
+        writer = PersonalizationStore(path, versions=LocalVersionIndex())
+        artifacts = {"phrases": ["sounds good", "on my way", "thanks!"] * 40, "style": {"emoji_rate": 0.2}}
+        for i in range(USERS):
+            writer.put(f"user-{i}", {"artifacts": artifacts})
+        users = [f"user-{i}" for i in range(USERS)]
+
+        hot = PersonalizationStore(path, versions=LocalVersionIndex())
+        for user in users:
+            hot.get_json(user)
+        cold = PersonalizationStore(path, max_entries=1)
+
+        for name, store in (("hot", hot), ("cold (SQLite)", cold)):
+            p50, p99 = _time_reads(store, users)
+            print(f"{name:14s} p50: {p50 * 1e6:7.1f} µs   p99: {p99 * 1e6:7.1f} µs")
+
+
+if __name__ == "__main__":
+    run()
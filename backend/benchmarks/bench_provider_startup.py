@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold-start time and peak RSS of the backend with eager vs lazy
+provider loading.
+
+Each scenario runs in a fresh interpreter with all three provider API keys
+set and reports the time to import the app (plus whatever the scenario
+loads) and the process's peak RSS:
+
+- eager: import backend.main and all provider adapter modules up front
+- lazy: import backend.main only; the registry records provider specs
+- lazy + 1 provider: as lazy, then load one provider through the registry
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_provider_startup
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+SCENARIOS = {
+    "eager": (
+        "import backend.main\n"
+        "import backend.providers.gemini.provider\n"
+        "import backend.providers.openrouter.provider\n"
+        "import backend.providers.qwen.provider\n"
+    ),
+    "lazy": "import backend.main\n",
+    "lazy + 1 provider": "import backend.main\nbackend.main.providers['openrouter']\n",
+}
+
+HARNESS = """
+import json, resource, time, warnings
+warnings.simplefilter("ignore")
+started = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def run_scenario(body: str, runs: int = 5) -> dict:
+    env = dict(os.environ, GEMINI_API_KEY="bench", OPENROUTER_API_KEY="bench", QWEN_API_KEY="bench",
+               DASHSCOPE_API_KEY="bench", LOG_LEVEL="WARNING")
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", HARNESS.format(body=body)],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "seconds": statistics.median(s["seconds"] for s in samples),
+        "maxrss_mb": statistics.median(s["maxrss_kb"] for s in samples) / 1024,
+    }
+
+
+def run() -> None:
+    for name, body in SCENARIOS.items():
+        result = run_scenario(body)
+        print(f"{name:18s} import: {result['seconds'] * 1000:7.1f} ms   peak RSS: {result['maxrss_mb']:6.1f} MB")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PII redaction cost per /suggest request.
+
+Times redacting a request's prompt texts (the message, a profile summary and
+three style examples) as ``/suggest`` does before the provider call, and
+restoring the placeholders in nine suggestions afterwards. Half of the
+messages contain PII.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_redaction
+"""
+
+import random
+import statistics
+import time
+
+from backend.redaction import redact, restore
+
+QUERIES = 20000
+PLAIN = [
+    "Hey, are we still on for dinner tomorrow? Let me know if anything changes",
+    "Running a bit late, the train is stuck again. Be there in 20 min",
+    "Thanks so much for yesterday, it was great to catch up!",
+]
+WITH_PII = [
+    "Sure, call me at +1 (555) 123-4567 when you get to 12 Oak Road",
+    "Can you send the invoice to billing@example.com by Friday?",
+    "My new address is 221B Baker Street, Apt 3. Card ending 4111 1111 1111 1111 got declined",
+]
+SUMMARY = "Replies are short (about 40 characters), mostly lowercase, rarely use emoji."
+EXAMPLES = ["sounds good, see you then", "omw! 5 min", "can't tonight sorry, tomorrow?"]
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main() -> None:
+    rng = random.Random(0)
+    redact_samples, restore_samples = [], []
+    for _ in range(QUERIES):
+        context = rng.choice(PLAIN + WITH_PII)
+        t0 = time.perf_counter()
+        found = []
+        redacted = redact(context, found)
+        redact(SUMMARY, found)
+        for example in EXAMPLES:
+            redact(example, found)
+        t1 = time.perf_counter()
+        for i in range(9):
+            restore(f"Option {i}: {redacted}", found)
+        t2 = time.perf_counter()
+        redact_samples.append(t1 - t0)
+        restore_samples.append(t2 - t1)
+    for name, samples in (("redact", redact_samples), ("restore x9", restore_samples)):
+        p50, p99 = _percentiles(samples)
+        print(f"{name:<10}: p50 {p50:.1f} us, p99 {p99:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: reranking latency on the /suggest path.
+
+Times ``Reranker.rerank`` (embed the pool, context and style examples, build
+the feature matrix, score and sort) for pools of ``SUGGEST_CANDIDATES``-sized
+suggestion lists, with a user who has feedback history and retrieved style
+examples. The stage budget is 2 ms at p99.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_rerank
+"""
+
+import random
+import statistics
+import time
+
+from backend.providers.base import SuggestionItem
+from backend.rerank import Reranker
+
+QUERIES = 5000
+BUDGET_US = 2000
+WORDS = ("hey sure thing lol omw see you soon tomorrow dinner movie work late call me later ok sounds good "
+         "haha meeting friday report thanks weekend plans coffee").split()
+TONES = ("casual", "formal", "witty")
+HISTORY = {
+    "mode:casual:accepted": 40.0, "mode:casual:rejected": 12.0, "mode:formal:rejected": 20.0,
+    "mode:witty:accepted": 5.0, "mode:witty:edited": 3.0, "used_samples": 48.0, "used_chars": 1900.0,
+}
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main() -> None:
+    rng = random.Random(0)
+    reranker = Reranker()
+    for pool_size in (3, 6, 10):
+        samples = []
+        for _ in range(QUERIES):
+            context = " ".join(rng.choices(WORDS, k=12))
+            pool = [SuggestionItem(text=" ".join(rng.choices(WORDS, k=rng.randint(3, 14))), tone=TONES[i % 3])
+                    for i in range(pool_size)]
+            examples = [" ".join(rng.choices(WORDS, k=6)) for _ in range(3)]
+            t0 = time.perf_counter()
+            reranker.rerank(context, pool, ["casual", "witty"], HISTORY, examples)
+            samples.append(time.perf_counter() - t0)
+        p50, p99 = _percentiles(samples)
+        verdict = "ok" if p99 < BUDGET_US else "OVER BUDGET"
+        print(f"rerank {pool_size:>2} candidates: p50 {p50:.0f} us, p99 {p99:.0f} us ({verdict})")
+
+
+if __name__ == "__main__":
+    main()
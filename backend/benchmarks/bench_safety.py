@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark: output safety filter latency on the /suggest path.
+
+Times ``SafetyFilter.filter`` over ``SUGGEST_CANDIDATES``-sized pools with the
+built-in blocklists and with a synthetic 5000-term list, to show that the
+trie-shaped pattern keeps the cost flat as lists grow. The stage budget is
+1 ms at p99.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_safety
+"""
+
+import random
+import statistics
+import string
+import time
+
+from backend.providers.base import SuggestionItem
+from backend.safety import SafetyFilter
+
+QUERIES = 5000
+BUDGET_US = 1000
+WORDS = ("hey sure thing lol omw see you soon tomorrow at 7 dinner movie work late call me later ok sounds good "
+         "haha meeting friday report thanks weekend plans coffee 2 mins").split()
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main() -> None:
+    rng = random.Random(0)
+    synthetic = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(5000)]
+    filters = (("built-in", SafetyFilter.load()), ("5000 terms", SafetyFilter({"en": synthetic})))
+    for name, safety in filters:
+        for pool_size in (3, 10):
+            samples = []
+            for _ in range(QUERIES):
+                pool = [SuggestionItem(text=" ".join(rng.choices(WORDS, k=rng.randint(3, 16))), tone="casual")
+                        for _ in range(pool_size)]
+                t0 = time.perf_counter()
+                safety.filter(pool, "en-US")
+                samples.append(time.perf_counter() - t0)
+            p50, p99 = _percentiles(samples)
+            verdict = "ok" if p99 < BUDGET_US else "OVER BUDGET"
+            print(f"safety {name:<10} {pool_size:>2} candidates: p50 {p50:.0f} us, p99 {p99:.0f} us ({verdict})")
+
+
+if __name__ == "__main__":
+    main()
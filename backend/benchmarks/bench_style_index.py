@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark: style-example retrieval latency on the /suggest path.
+
+Builds an index of ``MAX_EXAMPLES`` synthetic (context, reply) pairs, then
+times ``StyleIndexStore.examples`` (embed the context, LSH prefilter, exact
+re-score, decode the top-k texts) for a mapped index, and the cold open of a
+freshly written file.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_style_index
+"""
+
+import random
+import statistics
+import tempfile
+import time
+
+from backend import style_index
+from backend.style_index import StyleIndexStore
+
+QUERIES = 5000
+WORDS = ("hey sure thing lol omw see you soon tomorrow dinner movie work late call me later ok sounds good "
+         "haha meeting friday report thanks weekend plans coffee").split()
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main() -> None:
+    rng = random.Random(0)
+    pairs = [(" ".join(rng.choices(WORDS, k=10)) + "?", " ".join(rng.choices(WORDS, k=6)))
+             for _ in range(style_index.MAX_EXAMPLES)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = StyleIndexStore(directory)
+        started = time.perf_counter()
+        style_index.write(store.path("u1"), pairs)
+        print(f"build {len(pairs)} entries: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        started = time.perf_counter()
+        index = store.get("u1")
+        print(f"open (mmap): {(time.perf_counter() - started) * 1e6:.0f} us, {index.size / 1024:.0f} KiB")
+
+        samples = []
+        for _ in range(QUERIES):
+            context = " ".join(rng.choices(WORDS, k=12))
+            t0 = time.perf_counter()
+            store.examples("u1", context, 3)
+            samples.append(time.perf_counter() - t0)
+        p50, p99 = _percentiles(samples)
+        print(f"examples(k=3): p50 {p50:.0f} us, p99 {p99:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request CPU of the /suggest serialization path.
+
+Compares the previous handler (FastAPI builds main.SuggestRequest, the handler
+copies it into the provider SuggestRequest, FastAPI re-validates the result
+through response_model) with the current fast path (one model_validate_json,
+model_construct, model_dump_json returned as a raw Response).
+
+Both handlers are mounted on bare FastAPI apps, without the production
+middleware, and driven directly over ASGI so only framework and model overhead
+is measured. The mock provider is used, which matches the cached/mock paths.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_suggest_serialization
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import List
+
+from fastapi import FastAPI, Request
+
+from backend import main
+from backend.providers.base import SuggestRequest as BaseSuggestRequest, SuggestResponse
+
+PAYLOAD = json.dumps({
+    "user_id": "bench-user",
+    "context": "Hey, are we still on for dinner tomorrow at 7?",
+    "modes": ["casual", "formal", "witty"],
+    "intensity": 6,
+}).encode()
+
+
+def build_legacy_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/suggest", response_model=SuggestResponse)
+    async def suggest(req: main.SuggestRequest, request: Request):
+        provider = main.providers["mock"]
+        base_request = BaseSuggestRequest(
+            user_id=req.user_id,
+            context=req.context,
+            modes=req.modes,
+            intensity=req.intensity
+        )
+        return await provider.suggest(base_request)
+
+    return app
+
+
+def build_fast_app() -> FastAPI:
+    app = FastAPI()
+    app.post("/suggest", response_model=SuggestResponse, openapi_extra=main._SUGGEST_OPENAPI)(main.suggest)
+    return app
+
+
+async def call(app: FastAPI, body: bytes) -> bytes:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/suggest", "raw_path": b"/suggest",
+        "root_path": "", "query_string": b"", "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    }
+    chunks: List[bytes] = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+async def measure(app: FastAPI, iterations: int) -> float:
+    for _ in range(200):  # warm up
+        await call(app, PAYLOAD)
+    started = time.process_time()
+    for _ in range(iterations):
+        await call(app, PAYLOAD)
+    return (time.process_time() - started) / iterations * 1e6
+
+
+def measure_models(iterations: int):
+    """Model-only cost, excluding routing and ASGI plumbing."""
+    response = asyncio.run(main.providers["mock"].suggest(BaseSuggestRequest.model_validate_json(PAYLOAD)))
+
+    started = time.process_time()
+    for _ in range(iterations):
+        req = main.SuggestRequest.model_validate(json.loads(PAYLOAD))
+        BaseSuggestRequest(user_id=req.user_id, context=req.context, modes=req.modes, intensity=req.intensity)
+        validated = SuggestResponse.model_validate(response.model_dump())
+        json.dumps(main.jsonable_encoder(validated)).encode()
+    legacy = (time.process_time() - started) / iterations * 1e6
+
+    started = time.process_time()
+    for _ in range(iterations):
+        req = main.SuggestRequest.model_validate_json(PAYLOAD)
+        BaseSuggestRequest.model_construct(user_id=req.user_id, context=req.context, modes=req.modes, intensity=req.intensity)
+        response.model_dump_json()
+    fast = (time.process_time() - started) / iterations * 1e6
+    return legacy, fast
+
+
+def run() -> None:
+    logging.disable(logging.INFO)  # the per-request log line is not what we measure
+    main.settings.rate_limit_enabled = False  # nor is rate limiting, which the old handler lacked
+    iterations = 5000
+    legacy_app, fast_app = build_legacy_app(), build_fast_app()
+    assert json.loads(asyncio.run(call(legacy_app, PAYLOAD))) == json.loads(asyncio.run(call(fast_app, PAYLOAD)))
+
+    legacy = asyncio.run(measure(legacy_app, iterations))
+    fast = asyncio.run(measure(fast_app, iterations))
+    print(f"end-to-end ASGI  legacy: {legacy:8.1f} us/req   fast: {fast:8.1f} us/req   "
+          f"saved: {legacy - fast:6.1f} us ({(legacy - fast) / legacy:.0%})")
+
+    legacy, fast = measure_models(iterations * 4)
+    print(f"models only      legacy: {legacy:8.1f} us/req   fast: {fast:8.1f} us/req   "
+          f"saved: {legacy - fast:6.1f} us ({(legacy - fast) / legacy:.0%})")
+
+
+if __name__ == "__main__":
+    run()
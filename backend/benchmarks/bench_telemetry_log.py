@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark: telemetry ingestion cost on the request path and write throughput.
+
+Appends batches of small acceptance events from one thread while the writer
+thread group-commits them, then reports the per-batch append latency (what a
+request handler pays) and end-to-end events/s, and scans the log back through
+memory maps.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_telemetry_log
+"""
+
+import statistics
+import tempfile
+import time
+
+from backend.telemetry_log import TelemetryLog, scan
+
+BATCHES = 20000
+BATCH_SIZE = 50
+EVENT = {"type": "suggestion_accepted", "mode": "witty", "tone": "playful", "rank": 1, "latency_ms": 412}
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        log = TelemetryLog(directory, buffer_events=BATCHES * BATCH_SIZE, buffer_bytes=BATCHES * 4096)
+        batch = [EVENT] * BATCH_SIZE
+        samples = []
+        started = time.perf_counter()
+        for i in range(BATCHES):
+            t0 = time.perf_counter()
+            log.append(batch, 4096, {"user_id": f"u{i % 500}"})
+            samples.append(time.perf_counter() - t0)
+        log.close()
+        elapsed = time.perf_counter() - started
+
+        samples.sort()
+        print(f"append per {BATCH_SIZE}-event batch: p50 {statistics.median(samples) * 1e6:.1f} us, "
+              f"p99 {samples[int(len(samples) * 0.99)] * 1e6:.1f} us")
+        print(f"written: {log.written} events ({log.dropped} dropped) in {log.flushes} group commits, "
+              f"{log.written / elapsed:,.0f} events/s end to end")
+
+        started = time.perf_counter()
+        count = sum(1 for _ in scan(directory))
+        print(f"mmap scan: {count} events, {count / (time.perf_counter() - started):,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
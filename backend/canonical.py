@@ -0,0 +1,135 @@
+"""
+Context Canonicalization
+
+Caches in front of the providers are keyed by the message being answered, and
+most messages differ only in details that do not change a good reply:
+spacing, case, punctuation, emoji variants, or the time, number or name they
+mention. This module maps such messages to one canonical key, so "Meet at
+5pm?" and "meet at 6 pm?" share cache entries.
+
+``canonicalize`` makes one pass over the text with a single compiled pattern:
+
+- Volatile entities (URLs, e-mail addresses, @mentions, money, times, dates,
+  phone numbers, numbers, weekdays and given names) are replaced by typed
+  placeholders such as ``<time1>``, numbered by first appearance. The original
+  surfaces are kept, in order, as the request's entities.
+- Only unambiguous forms are entities. Weekday abbreviations must be
+  capitalised and inside a sentence ("see you Sat", not "I sat there"). Names
+  must be capitalised, come inside a sentence and appear in
+  backend/given_names.txt. Any other capitalised word stays part of the key,
+  so "Ok Thanks!" and "Ok Sorry!" keep distinct keys.
+- The text between them is NFKC-normalised and lowercased. Emoji variation
+  selectors and skin-tone modifiers are dropped, punctuation other than "?" is
+  removed, and repeated symbols and whitespace are collapsed.
+
+Cached suggestions are stored masked: ``mask`` replaces the entities of the
+request that produced them with the same placeholders, and ``restore`` fills
+in the entities of the request they are served to.
+"""
+
+import os
+import re
+import unicodedata
+from typing import Dict, List, NamedTuple, Tuple
+
+Entity = Tuple[str, str]  # (placeholder, surface), e.g. ("<time1>", "5pm")
+
+_WEEKDAYS = r"monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+# Abbreviations are ordinary words in lowercase ("sat", "sun", "wed"), so they must be
+# capitalised inside a sentence
+_WEEKDAY_ABBREVIATIONS = r"Mon|Tue|Tues|Wed|Thu|Thur|Thurs|Fri|Sat|Sun"
+
+
+def _read_names(path: str) -> frozenset:
+    with open(path, encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip() and not line.startswith("#"))
+
+
+GIVEN_NAMES = _read_names(os.path.join(os.path.dirname(os.path.abspath(__file__)), "given_names.txt"))
+# Every branch starts at a word boundary; digit-led entities share one lookahead
+_ENTITY = re.compile(
+    r"(?<!\w)(?:"
+    r"(?P<url>(?:https?://|www\.)\S*[^\s.,!?;:)'\"])"
+    r"|(?P<email>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+    r"|(?P<mention>@\w+)"
+    r"|(?P<money>[$€£¥]\s?\d[\d,]*(?:\.\d+)?)"
+    r"|(?=[+\d])(?:"
+    r"(?P<time>\d{1,2}(?::\d{2})?\s?(?i:[ap]\.?m\b\.?)|\d{1,2}:\d{2}\b)"
+    r"|(?P<date>\d{1,4}[/-]\d{1,2}(?:[/-]\d{1,4})?\b)"
+    r"|(?P<phone>\+?\d[\d ().-]{5,}\d\b)"
+    r"|(?P<num>\d+(?:[.,]\d+)*(?:st|nd|rd|th)?\b))"
+    rf"|(?P<day>(?i:{_WEEKDAYS})\b|(?<!^)(?<![.!?]\s)(?:{_WEEKDAY_ABBREVIATIONS})\b)"
+    # Name candidates (checked against GIVEN_NAMES) never start the message or a sentence
+    r"|(?<!^)(?<![.!?]\s)(?P<name>[A-Z][a-z]+\b)"
+    r")"
+)
+# Apostrophes, ZWJ, emoji variation selectors and skin-tone modifiers
+_DROPPED = re.compile("['\u2018\u2019\u200d\ufe0e\ufe0f\U0001F3FB-\U0001F3FF]")
+# Punctuation other than "?" (and the "<>" of placeholders); emoji and other symbols are kept
+_PUNCTUATION = re.compile("[^\\w\\s?<>\u2600-\u27bf\U0001F000-\U0001FAFF]")
+_REPEATS = re.compile(r"([^\w\s])\1+")
+_PLACEHOLDER = re.compile(r"<(?:url|email|mention|money|time|date|phone|num|day|name)\d+>")
+
+
+class Canonical(NamedTuple):
+    """A canonicalized message."""
+
+    key: str  # normalised text with placeholders; the cache key
+    entities: List[Entity]  # placeholders and the surfaces they replaced
+
+
+def _normalize(text: str) -> str:
+    text = _DROPPED.sub("", text).lower()
+    return " ".join(_REPEATS.sub(r"\1", _PUNCTUATION.sub(" ", text)).replace("?", " ? ").split())
+
+
+def canonicalize(text: str) -> Canonical:
+    """
+    Canonicalize a message for use as a cache key.
+
+    Returns:
+        The canonical key and the entities masked out of it
+    """
+    text = unicodedata.normalize("NFKC", text)
+    parts: List[str] = []
+    entities: List[Entity] = []
+    placeholders: Dict[Tuple[str, str], str] = {}
+    counts: Dict[str, int] = {}
+    last = 0
+    for match in _ENTITY.finditer(text):
+        kind, surface = match.lastgroup, match.group()
+        if kind == "name" and surface not in GIVEN_NAMES:
+            continue
+        folded = (kind, surface.lower())
+        placeholder = placeholders.get(folded)
+        if placeholder is None:
+            counts[kind] = counts.get(kind, 0) + 1
+            placeholder = placeholders[folded] = f"<{kind}{counts[kind]}>"
+            entities.append((placeholder, surface))
+        parts += (text[last:match.start()], " ", placeholder, " ")
+        last = match.end()
+    parts.append(text[last:])
+    # Placeholders survive normalisation: "<" and ">" are kept and they are lowercase
+    return Canonical(_normalize("".join(parts)), entities)
+
+
+def mask(text: str, entities: List[Entity]) -> str:
+    """
+    Replace the entities' surfaces in ``text`` (e.g. a suggestion) by their placeholders.
+
+    Only whole, exact (case-sensitive) occurrences of the extracted surfaces
+    are replaced, so ordinary words in the text are never masked.
+    """
+    if not entities:
+        return text
+    by_surface = {surface: placeholder for placeholder, surface in entities}
+    pattern = "|".join(re.escape(s) for s in sorted(by_surface, key=len, reverse=True))
+    return re.sub(rf"(?<!\w)(?:{pattern})(?!\w)", lambda m: by_surface[m.group()], text)
+
+
+def restore(text: str, entities: List[Entity]) -> str:
+    """Replace placeholders in ``text`` by the entities' surfaces."""
+    if "<" not in text:
+        return text
+    surfaces = dict(entities)
+    return _PLACEHOLDER.sub(lambda m: surfaces.get(m.group(), m.group()), text)
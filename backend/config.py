@@ -1,7 +1,7 @@
 import os
 from typing import List, Optional
 from functools import lru_cache
-from pydantic import Field
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -17,15 +17,39 @@ class Settings(BaseSettings):
     api_host: str = Field(default="0.0.0.0", env="API_HOST")
     api_port: int = Field(default=8000, env="API_PORT")
     api_workers: int = Field(default=1, env="API_WORKERS")
+    shared_state_capacity: int = Field(default=4096, env="SHARED_STATE_CAPACITY")
     
     # Database Configuration
     database_url: Optional[str] = Field(default=None, env="DATABASE_URL")
     redis_url: Optional[str] = Field(default=None, env="REDIS_URL")
+    personalization_db_path: str = Field(default="data/personalization.db", env="PERSONALIZATION_DB_PATH")
+    personalization_cache_entries: int = Field(default=10000, env="PERSONALIZATION_CACHE_ENTRIES")
+    personalization_cache_mb: int = Field(default=64, env="PERSONALIZATION_CACHE_MB")
     
     # AI Provider Configuration
     gemini_api_key: Optional[str] = Field(default=None, env="GEMINI_API_KEY")
     openrouter_api_key: Optional[str] = Field(default=None, env="OPENROUTER_API_KEY")
     qwen_api_key: Optional[str] = Field(default=None, env="QWEN_API_KEY")
+    provider_warmup: bool = Field(default=True, env="PROVIDER_WARMUP")
+    connection_warmup_enabled: bool = Field(default=True, env="CONNECTION_WARMUP_ENABLED")
+    warm_connections_per_provider: int = Field(default=4, env="WARM_CONNECTIONS_PER_PROVIDER")
+    connection_refresh_seconds: float = Field(default=30.0, env="CONNECTION_REFRESH_SECONDS")
+    connection_keepalive_seconds: float = Field(default=90.0, env="CONNECTION_KEEPALIVE_SECONDS")
+    provider_http_transport: bool = Field(default=False, env="PROVIDER_HTTP_TRANSPORT")
+    transport_http2: bool = Field(default=True, env="TRANSPORT_HTTP2")
+    transport_max_connections: int = Field(default=100, env="TRANSPORT_MAX_CONNECTIONS")
+    transport_per_host_limit: int = Field(default=32, env="TRANSPORT_PER_HOST_LIMIT")
+    transport_connect_timeout_seconds: float = Field(default=3.0, env="TRANSPORT_CONNECT_TIMEOUT_SECONDS")
+    transport_timeout_seconds: float = Field(default=15.0, env="TRANSPORT_TIMEOUT_SECONDS")
+    cascade_tiers: Optional[str] = Field(default=None, env="CASCADE_TIERS")
+    cascade_min_usable: int = Field(default=3, env="CASCADE_MIN_USABLE")
+    cascade_max_chars: int = Field(default=100, env="CASCADE_MAX_CHARS")
+    adaptive_timeouts_enabled: bool = Field(default=True, env="ADAPTIVE_TIMEOUTS_ENABLED")
+    adaptive_timeout_quantile: float = Field(default=0.99, env="ADAPTIVE_TIMEOUT_QUANTILE")
+    adaptive_timeout_margin_seconds: float = Field(default=0.5, env="ADAPTIVE_TIMEOUT_MARGIN_SECONDS")
+    adaptive_timeout_min_seconds: float = Field(default=1.0, env="ADAPTIVE_TIMEOUT_MIN_SECONDS")
+    adaptive_timeout_min_samples: int = Field(default=50, env="ADAPTIVE_TIMEOUT_MIN_SAMPLES")
+    suggest_budget_seconds: Optional[float] = Field(default=10.0, env="SUGGEST_BUDGET_SECONDS")
     
     # Security Configuration
     secret_key: str = Field(default="dev-secret-key", env="SECRET_KEY")
@@ -37,18 +61,69 @@ class Settings(BaseSettings):
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
     health_check_enabled: bool = Field(default=True, env="HEALTH_CHECK_ENABLED")
+    tracing_enabled: bool = Field(default=True, env="TRACING_ENABLED")
+    tracing_buffer_size: int = Field(default=1024, env="TRACING_BUFFER_SIZE")
+    tracing_export_path: Optional[str] = Field(default=None, env="TRACING_EXPORT_PATH")
+    server_timing_enabled: bool = Field(default=True, env="SERVER_TIMING_ENABLED")
     
     # Cache Configuration
     cache_ttl: int = Field(default=300, env="CACHE_TTL")
     max_cache_size: int = Field(default=1000, env="MAX_CACHE_SIZE")
     
     # Rate Limiting
+    rate_limit_enabled: bool = Field(default=True, env="RATE_LIMIT_ENABLED")
     rate_limit_requests: int = Field(default=100, env="RATE_LIMIT_REQUESTS")
     rate_limit_window: int = Field(default=60, env="RATE_LIMIT_WINDOW")
+
+    # Overload Protection
+    overload_enabled: bool = Field(default=True, env="OVERLOAD_ENABLED")
+    overload_lag_threshold_ms: float = Field(default=100.0, env="OVERLOAD_LAG_THRESHOLD_MS")
+    overload_max_in_flight: int = Field(default=256, env="OVERLOAD_MAX_IN_FLIGHT")
+    overload_sample_interval_ms: float = Field(default=50.0, env="OVERLOAD_SAMPLE_INTERVAL_MS")
+    overload_retry_after_seconds: int = Field(default=1, env="OVERLOAD_RETRY_AFTER_SECONDS")
+    overload_fallback_provider: str = Field(default="mock", env="OVERLOAD_FALLBACK_PROVIDER")
+    blocking_watchdog_enabled: bool = Field(default=True, env="BLOCKING_WATCHDOG_ENABLED")
+    blocking_watchdog_threshold_ms: float = Field(default=100.0, env="BLOCKING_WATCHDOG_THRESHOLD_MS")
     
     # Personalization
     personalization_enabled: bool = Field(default=True, env="PERSONALIZATION_ENABLED")
     encryption_key: Optional[str] = Field(default=None, env="ENCRYPTION_KEY")
+    upload_dir: str = Field(default="data/uploads", env="UPLOAD_DIR")
+    upload_chunk_kb: int = Field(default=1024, env="UPLOAD_CHUNK_KB")
+    upload_max_mb: int = Field(default=64, env="UPLOAD_MAX_MB")
+    upload_ttl_hours: float = Field(default=24.0, env="UPLOAD_TTL_HOURS")
+    telemetry_enabled: bool = Field(default=True, env="TELEMETRY_ENABLED")
+    telemetry_dir: str = Field(default="data/telemetry", env="TELEMETRY_DIR")
+    telemetry_max_batch_events: int = Field(default=1000, env="TELEMETRY_MAX_BATCH_EVENTS")
+    telemetry_buffer_events: int = Field(default=100000, env="TELEMETRY_BUFFER_EVENTS")
+    telemetry_buffer_mb: int = Field(default=32, env="TELEMETRY_BUFFER_MB")
+    telemetry_flush_ms: float = Field(default=200.0, env="TELEMETRY_FLUSH_MS")
+    telemetry_segment_mb: int = Field(default=64, env="TELEMETRY_SEGMENT_MB")
+    telemetry_max_segments: int = Field(default=0, env="TELEMETRY_MAX_SEGMENTS")
+    telemetry_fsync: bool = Field(default=False, env="TELEMETRY_FSYNC")
+    style_index_dir: str = Field(default="data/style_index", env="STYLE_INDEX_DIR")
+    style_index_max_open: int = Field(default=1024, env="STYLE_INDEX_MAX_OPEN")
+    style_examples_k: int = Field(default=3, env="STYLE_EXAMPLES_K")
+    suggest_candidates: int = Field(default=9, env="SUGGEST_CANDIDATES")
+    suggestion_pages_enabled: bool = Field(default=True, env="SUGGESTION_PAGES_ENABLED")
+    canonicalize_enabled: bool = Field(default=True, env="CANONICALIZE_ENABLED")
+    pii_redaction_enabled: bool = Field(default=True, env="PII_REDACTION_ENABLED")
+    hot_contexts_enabled: bool = Field(default=True, env="HOT_CONTEXTS_ENABLED")
+    hot_contexts_path: str = Field(default="data/hot_contexts.tbl", env="HOT_CONTEXTS_PATH")
+    hot_contexts_check_seconds: float = Field(default=5.0, env="HOT_CONTEXTS_CHECK_SECONDS")
+    rerank_enabled: bool = Field(default=True, env="RERANK_ENABLED")
+    rerank_weights_path: Optional[str] = Field(default=None, env="RERANK_WEIGHTS_PATH")
+    diversity_enabled: bool = Field(default=True, env="DIVERSITY_ENABLED")
+    diversity_threshold: float = Field(default=0.5, env="DIVERSITY_THRESHOLD")
+    diversity_fallback_provider: str = Field(default="canned", env="DIVERSITY_FALLBACK_PROVIDER")
+    safety_filter_enabled: bool = Field(default=True, env="SAFETY_FILTER_ENABLED")
+    safety_blocklist_dir: Optional[str] = Field(default=None, env="SAFETY_BLOCKLIST_DIR")
+    safety_default_locale: str = Field(default="en", env="SAFETY_DEFAULT_LOCALE")
+    jobs_db_path: str = Field(default="data/jobs.db", env="JOBS_DB_PATH")
+    train_workers: int = Field(default=1, env="TRAIN_WORKERS")
+    train_max_attempts: int = Field(default=3, env="TRAIN_MAX_ATTEMPTS")
+    train_poll_seconds: float = Field(default=1.0, env="TRAIN_POLL_SECONDS")
+    train_niceness: int = Field(default=10, env="TRAIN_NICENESS")
     
     # CORS Configuration
     cors_origins: List[str] = Field(
@@ -59,9 +134,15 @@ class Settings(BaseSettings):
     cors_allow_methods: List[str] = Field(default=["*"], env="CORS_ALLOW_METHODS")
     cors_allow_headers: List[str] = Field(default=["*"], env="CORS_ALLOW_HEADERS")
     
+    @field_validator("suggest_budget_seconds", mode="before")
+    @classmethod
+    def _empty_means_no_budget(cls, value):
+        """An empty SUGGEST_BUDGET_SECONDS disables the budget."""
+        return None if isinstance(value, str) and not value.strip() else value
+
     class Config:
         env_file = ".env"
-        case_sensitive = True
+        case_sensitive = False  # match API_WORKERS etc. to the lowercase field names
 
     def get_api_url(self) -> str:
         """Get the full API URL."""
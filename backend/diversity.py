@@ -0,0 +1,157 @@
+"""
+Suggestion Diversity
+
+Models often return the same reply twice with small changes ("Sounds good!"
+and "sounds good :)"). This module removes near-duplicates from a suggestion
+pool so users get distinct options.
+
+Similarity is the Jaccard similarity of shingle sets, computed for the whole
+pool at once with NumPy:
+
+- Each suggestion is normalised (lowercase, punctuation and extra spaces
+  removed). Its UTF-8 bytes are cut into overlapping ``SHINGLE``-byte shingles
+  with array slicing, and each shingle is hashed into one of ``BUCKETS`` bits.
+- The pool becomes a (suggestions x ``BUCKETS``) bit matrix, packed into
+  64-bit words. A broadcast AND and popcount give every pairwise
+  intersection size, from which the union sizes follow.
+
+MinHash signatures would estimate the same quantity, but they pay off only
+for long texts or large collections. A pool of at most ten short replies is
+cheaper to compare exactly. Hash collisions between shingles are rare at
+this size and only make texts look slightly more alike.
+
+Shingles that also occur in the message being answered are left out, so two
+replies that quote the message are compared on what they add to it.
+
+``diversify`` keeps candidates in rank order, skips any that are too similar
+to one already kept, and fills the remaining places from a fallback pool.
+``/suggest`` uses the unused over-generated candidates first, then a local
+fallback provider, so no second model call is needed.
+"""
+
+import re
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from backend.providers.base import SuggestionItem
+
+SHINGLE = 3
+BUCKETS = 2048
+DEFAULT_THRESHOLD = 0.5
+
+_BUCKET_SHIFT = np.uint32(32 - 11)  # log2(BUCKETS) high bits of a multiplicative hash
+_GOLDEN = np.uint32(0x9E3779B1)
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+def _encode(text: str) -> bytes:
+    norm = normalize(text) or text.strip()  # emoji-only replies keep their characters
+    return norm.encode().ljust(SHINGLE, b"\0")
+
+
+def fingerprints(texts: Sequence[str], context: Optional[str] = None) -> np.ndarray:
+    """
+    Shingle sets of the texts as a bit matrix.
+
+    The texts are concatenated and shingled in one pass; shingles that span
+    two texts are dropped.
+
+    Args:
+        texts: Texts to fingerprint
+        context: Message being answered; its shingles are cleared unless that
+            would leave a text with none
+
+    Returns:
+        bool array of shape (len(texts), BUCKETS)
+    """
+    encoded = [_encode(text) for text in texts] + ([_encode(context)] if context else [])
+    lengths = np.fromiter(map(len, encoded), dtype=np.intp, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint32)
+    codes = (data[:-2] << np.uint32(16)) | (data[1:-1] << np.uint32(8)) | data[2:]
+    buckets = (codes * _GOLDEN) >> _BUCKET_SHIFT
+    owner = np.repeat(np.arange(len(encoded)), lengths)[:len(codes)]
+    ends = np.cumsum(lengths)[owner]
+    inside = np.arange(len(codes)) + SHINGLE <= ends
+    out = np.zeros((len(encoded), BUCKETS), dtype=bool)
+    out[owner[inside], buckets[inside]] = True
+    if context:
+        quoted = out[-1]
+        out = out[:-1]
+        kept = out & ~quoted
+        nonempty = kept.any(axis=1)
+        out[nonempty] = kept[nonempty]
+    return out
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(words)
+    return _POPCOUNT[words.view(np.uint8)].reshape(*words.shape, 8).sum(axis=-1)
+
+
+def similarity(texts: Sequence[str], context: Optional[str] = None) -> np.ndarray:
+    """
+    Pairwise Jaccard similarity of the texts' shingle sets.
+
+    Args:
+        texts: Texts to compare
+        context: Message being answered (see ``fingerprints``)
+
+    Returns:
+        float32 array of shape (len(texts), len(texts))
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    words = np.packbits(fingerprints(texts, context), axis=1).view(np.uint64)
+    intersection = _popcount(words[:, None, :] & words[None, :, :]).sum(axis=2, dtype=np.float32)
+    sizes = np.diag(intersection)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    return intersection / np.maximum(union, 1.0)
+
+
+def diversify(
+    candidates: Sequence[SuggestionItem],
+    k: int = 3,
+    threshold: float = DEFAULT_THRESHOLD,
+    fallback: Optional[Sequence[SuggestionItem]] = None,
+    context: Optional[str] = None,
+) -> List[SuggestionItem]:
+    """
+    Pick up to ``k`` mutually distinct suggestions.
+
+    Candidates are taken in order, so rank them best first. A candidate is
+    skipped if its similarity to one already picked is at least
+    ``threshold``. Fallback suggestions are only used for places the
+    candidates could not fill, and are checked in the same way.
+
+    Args:
+        candidates: Suggestions, best first
+        k: Number of suggestions wanted
+        threshold: Similarity at which two suggestions count as duplicates
+        fallback: Extra suggestions for filling gaps
+        context: Message being answered (see ``fingerprints``)
+
+    Returns:
+        At most ``k`` suggestions; fewer if the pools run out
+    """
+    pool = [item for item in list(candidates) + list(fallback or []) if item.text.strip()]
+    if not pool:
+        return []
+    similar = similarity([item.text for item in pool], context) >= threshold
+    blocked = np.zeros(len(pool), dtype=bool)
+    picked: List[SuggestionItem] = []
+    for i, item in enumerate(pool):
+        if blocked[i]:
+            continue
+        picked.append(item)
+        if len(picked) == k:
+            break
+        blocked |= similar[i]
+    return picked
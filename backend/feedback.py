@@ -0,0 +1,247 @@
+"""
+Suggestion Feedback Aggregates
+
+This module keeps per-user statistics about how suggestions were received.
+Clients report small events (accepted, rejected, edited) instead of
+re-uploading their whole personalization export.
+
+Each event becomes a fixed handful of counter increments, so applying it is
+O(1) whatever the user's history. The counters live in SQLite next to the
+personalization artifacts, as ``(user_id, name) -> value`` rows, and a batch
+is applied with one upsert per distinct counter in a single transaction. Only
+lengths are kept from edited texts, never the texts themselves.
+
+From the counters, ``describe`` renders a short preference note (favoured and
+avoided modes, editing habits) that ``/suggest`` appends to the profile summary,
+and the reranker (backend/rerank.py) reads acceptance rates and the lengths
+of used suggestions. Notes and counters are cached per worker and invalidated
+through the shared version index, in the same way as the personalization store.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from backend.personalization_store import LruTier
+
+MAX_EVENTS_PER_REQUEST = 100
+MIN_MODE_EVENTS = 5
+_LABEL = r"^[A-Za-z0-9_-]{1,32}$"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback_stats (
+    user_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (user_id, name)
+) WITHOUT ROWID
+"""
+
+
+class FeedbackEvent(BaseModel):
+    """One reaction to a shown suggestion."""
+
+    action: Literal["accepted", "rejected", "edited"]
+    mode: str = Field(pattern=_LABEL)
+    tone: Optional[str] = Field(default=None, pattern=_LABEL)
+    suggestion_length: Optional[int] = Field(default=None, ge=0)
+    final_length: Optional[int] = Field(default=None, ge=0)
+
+
+class FeedbackBatch(BaseModel):
+    user_id: str
+    events: List[FeedbackEvent] = Field(min_length=1, max_length=MAX_EVENTS_PER_REQUEST)
+
+
+def event_deltas(event: FeedbackEvent) -> Dict[str, float]:
+    """Counter increments for one event."""
+    mode = event.mode.lower()
+    deltas = {"events": 1.0, event.action: 1.0, f"mode:{mode}:{event.action}": 1.0}
+    if event.tone:
+        deltas[f"tone:{event.tone.lower()}:{event.action}"] = 1.0
+    used_length = event.suggestion_length if event.action == "accepted" else event.final_length
+    if event.action != "rejected" and used_length:
+        deltas["used_samples"] = 1.0
+        deltas["used_chars"] = float(used_length)
+    if event.action == "edited" and event.suggestion_length and event.final_length is not None:
+        deltas["edit_samples"] = 1.0
+        deltas["edit_length_ratio"] = event.final_length / event.suggestion_length
+    return deltas
+
+
+def describe(stats: Dict[str, float]) -> Optional[str]:
+    """
+    Render counters as a short preference note for prompts.
+
+    Returns:
+        The note, or None while there is too little feedback to say anything
+    """
+    modes: Dict[str, Counter] = {}
+    for name, value in stats.items():
+        if name.startswith("mode:"):
+            _, mode, action = name.split(":")
+            modes.setdefault(mode, Counter())[action] += value
+    rates = {
+        mode: (counts["accepted"] + counts["edited"]) / total
+        for mode, counts in modes.items()
+        if (total := sum(counts.values())) >= MIN_MODE_EVENTS
+    }
+    parts = []
+    if rates:
+        ranked = sorted(rates, key=rates.get, reverse=True)
+        parts.append(f"prefers {ranked[0]} suggestions ({rates[ranked[0]]:.0%} used)")
+        if len(ranked) > 1 and rates[ranked[-1]] < 0.3:
+            parts.append(f"usually rejects {ranked[-1]} ones ({rates[ranked[-1]]:.0%} used)")
+    samples = stats.get("edit_samples", 0)
+    if samples >= MIN_MODE_EVENTS:
+        ratio = stats["edit_length_ratio"] / samples
+        if ratio <= 0.8:
+            parts.append("shortens suggestions when editing")
+        elif ratio >= 1.25:
+            parts.append("lengthens suggestions when editing")
+    return "Feedback: " + ", ".join(parts) + "." if parts else None
+
+
+class FeedbackStore:
+    """
+    Per-user feedback counters in SQLite, with cached counters and preference notes.
+
+    Args:
+        path: SQLite database file (may be shared with the personalization store)
+        max_entries: Users whose preference note is cached in memory
+        versions: Version index used to invalidate other workers' caches
+            (``shared_state.state.cache_index``); None for a single process
+        on_lookup: Optional hook called with True/False for cache hits/misses
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        versions=None,
+        on_lookup: Optional[Callable[[bool], None]] = None,
+    ):
+        self.path = path
+        self._versions = versions
+        self._on_lookup = on_lookup
+        self._entries = LruTier(max_entries, max_entries * 1024)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and self.path != ":memory:":
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _version(self, user_id: str) -> int:
+        return self._versions.version("feedback:" + user_id) if self._versions is not None else 0
+
+    def _bump(self, user_id: str) -> int:
+        return self._versions.bump("feedback:" + user_id) if self._versions is not None else 0
+
+    def record(self, user_id: str, events: Iterable[FeedbackEvent]) -> int:
+        """
+        Apply a batch of events to the user's counters.
+
+        Returns:
+            Number of events applied
+        """
+        totals: Counter = Counter()
+        count = 0
+        for event in events:
+            totals.update(event_deltas(event))
+            count += 1
+        if not count:
+            return 0
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO feedback_stats (user_id, name, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(user_id, name) DO UPDATE SET value = value + excluded.value",
+                    [(user_id, name, value) for name, value in totals.items()],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._bump(user_id)
+            self._entries.discard(user_id)
+        return count
+
+    def stats(self, user_id: str) -> Dict[str, float]:
+        """Return the user's counters (empty if they sent no feedback)."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT name, value FROM feedback_stats WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def profile(self, user_id: str) -> Tuple[Optional[str], Dict[str, float]]:
+        """
+        Return the user's preference note and counters.
+
+        Cached until the user's next feedback, so repeat lookups on
+        ``/suggest`` cost a version check and a dict lookup. Callers must
+        not modify the returned counters.
+        """
+        version = self._version(user_id)
+        with self._lock:
+            hit, entry = self._entries.get(user_id, version)
+        if not hit:
+            if version == 0:
+                version = self._bump(user_id)  # see PersonalizationStore._lookup
+            stats = self.stats(user_id)
+            note = describe(stats)
+            entry = (note, stats)
+            with self._lock:
+                self._entries.put(user_id, version, entry, (len(note) if note else 0) + 32 * len(stats))
+        if self._on_lookup is not None:
+            self._on_lookup(hit)
+        return entry
+
+    def peek_profile(self, user_id: str) -> Optional[Tuple[Optional[str], Dict[str, float]]]:
+        """
+        Return the user's cached (note, counters) if current, else None
+        without touching the database; call ``profile`` (in an executor) then.
+        """
+        version = self._version(user_id)
+        with self._lock:
+            hit, entry = self._entries.get(user_id, version)
+        if hit and self._on_lookup is not None:
+            self._on_lookup(True)
+        return entry if hit else None
+
+    def preferences(self, user_id: str) -> Optional[str]:
+        """Return the user's preference note (see ``describe``)."""
+        return self.profile(user_id)[0]
+
+    def delete(self, user_id: str) -> bool:
+        """Remove the user's counters; returns True if there were any."""
+        with self._lock:
+            deleted = self._connection().execute(
+                "DELETE FROM feedback_stats WHERE user_id = ?", (user_id,)
+            ).rowcount > 0
+            version = self._bump(user_id)
+            self._entries.put(user_id, version, (None, {}), 0)
+        return deleted
+
+    def close(self) -> None:
+        """Close the database connection; the store reopens it on next use."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Hot-Context Suggestion Table
+
+A small set of messages ("thanks!", "running late", "ok see you soon") makes
+up a large share of ``/suggest`` traffic. This module precomputes suggestions
+for the most frequent ones offline and serves them from a memory-mapped table,
+so those requests skip the provider call entirely.
+
+Build (offline, from the repository root)::
+
+    python -m backend.hot_contexts data/telemetry [--top 1000] [--provider mock] [--out PATH]
+
+mines the ``suggestions_shown`` telemetry events (see backend/rerank_eval.py)
+for the most frequent (canonical context, modes, intensity) combinations,
+asks the provider for ``SUGGEST_CANDIDATES`` suggestions for each, and writes
+them with their entities masked (backend/canonical.py), so one entry serves
+"Meet at 5pm?" and "meet at 6 pm?" alike.
+
+Lookups use a perfect hash (hash-and-displace): every key hashes to a bucket,
+each bucket stores the displacement that sends its keys to distinct slots, and
+a lookup is one digest, two reads and a key check, a few microseconds in
+Python. The table has a prime number of slots, the first one at or above the
+number of entries. Layout (little-endian)::
+
+    header         magic "RHCT", version, slots, buckets, entries, blob bytes, built at
+    displacements  buckets x uint32
+    digests        slots x 16-byte key digests (zero for empty slots)
+    offsets        (slots + 1) x uint32 into the blob
+    blob           one JSON suggestion list per slot
+
+The table is shared by all users, so a key must never stand for two messages
+that need different replies. The header's version changes whenever the
+canonical keys do, and tables built for other keys are not loaded. For the
+same reason ``/suggest`` only consults it for users without personalization
+(profile summary, feedback or style examples).
+
+The file is replaced atomically by the build, and ``HotContextTable`` notices
+a new file within ``HOT_CONTEXTS_CHECK_SECONDS`` and swaps it in: running
+servers pick up a rebuild without a restart, and requests in flight keep the
+map they started with.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import TypeAdapter
+
+from backend import canonical, diversity, redaction, telemetry_log
+from backend.config import settings
+from backend.providers.base import ProviderError, SuggestionItem, SuggestRequest
+
+LOAD = 4  # average keys per bucket
+
+_MAGIC = b"RHCT"
+# 2: keys from the canonicaliser that only masks listed given names. Version 1
+# tables merged messages such as "Ok Thanks!" and "Ok Sorry!" and are rejected.
+_VERSION = 2
+_HEADER = struct.Struct("<4sIIIIQd")
+_DIGEST = struct.Struct("<IIII")
+_U32 = struct.Struct("<I")
+_SPAN = struct.Struct("<II")
+# Entries are validated straight from the mapped bytes
+_ITEMS = TypeAdapter(List[SuggestionItem])
+
+
+def table_key(context_key: str, modes: Sequence[str], intensity: int, provider: str) -> bytes:
+    """Key of a request: its canonical context, modes, intensity and provider."""
+    return "\0".join([context_key, ",".join(m.lower() for m in modes), str(intensity), provider]).encode()
+
+
+def _digest(key: bytes) -> bytes:
+    return hashlib.blake2b(key, digest_size=16).digest()
+
+
+def _slot(words: Tuple[int, ...], displacement: int, slots: int) -> int:
+    # A displacement is a (multiplier, shift) pair: each multiplier spreads the
+    # bucket's keys in a different pattern, tried at every shift. The step is
+    # never a multiple of the (prime) slot count.
+    multiplier, shift = divmod(displacement, slots)
+    return (words[1] + multiplier * (1 + words[2] % (slots - 1)) + shift) % slots
+
+
+def _next_prime(n: int) -> int:
+    n = max(n, 2)
+    while any(n % p == 0 for p in range(2, int(n ** 0.5) + 1)):
+        n += 1
+    return n
+
+
+def write(path: str, entries: Dict[bytes, Sequence[SuggestionItem]]) -> int:
+    """
+    Build a table file and atomically install it.
+
+    Args:
+        path: Destination file
+        entries: Key (``table_key``) -> suggestions, already masked
+
+    Returns:
+        Number of entries written
+    """
+    keys = list(entries)
+    digests = [_digest(key) for key in keys]
+    slots = _next_prime(len(keys))
+    buckets = max(1, -(-len(keys) // LOAD))
+    members: List[List[int]] = [[] for _ in range(buckets)]
+    words = [_DIGEST.unpack(d) for d in digests]
+    for i, (bucket, _, _, _) in enumerate(words):
+        members[bucket % buckets].append(i)
+
+    displacements = [0] * buckets
+    owner = [-1] * slots
+    # Largest buckets first, while most slots are free
+    for bucket in sorted(range(buckets), key=lambda b: -len(members[b])):
+        if not members[bucket]:
+            continue
+        for d in range(min(slots * slots, 1 << 32)):
+            positions = [_slot(words[i], d, slots) for i in members[bucket]]
+            if len(set(positions)) == len(positions) and all(owner[p] < 0 for p in positions):
+                break
+        else:
+            raise ValueError("No perfect hash found (duplicate keys?)")
+        displacements[bucket] = d
+        for p, i in zip(positions, members[bucket]):
+            owner[p] = i
+
+    blobs = [
+        json.dumps([{"text": s.text, "tone": s.tone} for s in entries[keys[i]]]).encode() if i >= 0 else b""
+        for i in owner
+    ]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, slots, buckets, len(keys), offsets[-1], time.time()))
+            f.write(struct.pack(f"<{buckets}I", *displacements))
+            f.write(b"".join(digests[i] if i >= 0 else bytes(16) for i in owner))
+            f.write(struct.pack(f"<{slots + 1}I", *offsets))
+            f.write(b"".join(blobs))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return len(keys)
+
+
+class HotContextFile:
+    """A read-only, memory-mapped table file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, slots, buckets, count, blob_bytes, built_at = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION or not slots or not buckets:
+            raise ValueError(f"{path} is not a compatible hot-context table")
+        self.slots, self.buckets, self.count, self.built_at = slots, buckets, count, built_at
+        self._displacements = _HEADER.size
+        self._digests = self._displacements + 4 * buckets
+        self._offsets = self._digests + 16 * slots
+        self._blob = self._offsets + 4 * (slots + 1)
+        if len(self._map) != self._blob + blob_bytes:
+            raise ValueError(f"{path} is truncated")
+
+    def get(self, key: bytes) -> Optional[List[SuggestionItem]]:
+        """Return the suggestions stored for ``key``, or None."""
+        digest = _digest(key)
+        words = _DIGEST.unpack(digest)
+        d = _U32.unpack_from(self._map, self._displacements + 4 * (words[0] % self.buckets))[0]
+        slot = _slot(words, d, self.slots)
+        start = self._digests + 16 * slot
+        if self._map[start:start + 16] != digest:
+            return None
+        begin, end = _SPAN.unpack_from(self._map, self._offsets + 4 * slot)
+        return _ITEMS.validate_json(self._map[self._blob + begin:self._blob + end])
+
+
+class HotContextTable:
+    """
+    The current table file, swapped in when the file is replaced.
+
+    Only touched from the event loop thread, so no locking is needed.
+
+    Args:
+        path: Table file; a missing file serves nothing
+        check_seconds: How often to look for a replaced file
+        on_lookup: Optional hook called with True/False for hits/misses
+        clock: Time source (seconds), replaceable in tests
+    """
+
+    def __init__(
+        self,
+        path: str,
+        check_seconds: float = 5.0,
+        on_lookup: Optional[Callable[[bool], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.path = path
+        self.check_seconds = check_seconds
+        self._on_lookup = on_lookup
+        self._clock = clock
+        self._file: Optional[HotContextFile] = None
+        self._stat: Optional[Tuple[int, int, int]] = None
+        self._next_check = float("-inf")
+
+    def _current(self) -> Optional[HotContextFile]:
+        now = self._clock()
+        if now >= self._next_check:
+            self._next_check = now + self.check_seconds
+            self.reload()
+        return self._file
+
+    def reload(self) -> None:
+        """Map the file again if it was replaced (or drop it if it was removed)."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._file, self._stat = None, None
+            return
+        stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stat == self._stat:
+            return
+        try:
+            self._file = HotContextFile(self.path)
+        except (OSError, ValueError):
+            self._file = None
+        # The replaced map is closed once no request holds it
+        self._stat = stat
+
+    def lookup(self, key: bytes) -> Optional[List[SuggestionItem]]:
+        """Precomputed (masked) suggestions for a request key, or None."""
+        table = self._current()
+        found = table.get(key) if table is not None else None
+        if self._on_lookup is not None:
+            self._on_lookup(found is not None)
+        return found
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Loaded table, for /health."""
+        table = self._file
+        return {"entries": table.count if table else 0, "built_at": table.built_at if table else None}
+
+
+class HotContext(NamedTuple):
+    """A frequent request, as mined from the logs."""
+
+    key: bytes
+    context: str  # its most frequent raw form, sent to the provider
+    modes: Tuple[str, ...]
+    intensity: int
+    count: int
+
+
+def mine(events: Iterable[Dict[str, Any]], provider: str, top: int, min_count: int = 2) -> List[HotContext]:
+    """
+    The ``top`` most frequent (canonical context, modes, intensity) combinations.
+
+    Args:
+        events: Telemetry events; only ``suggestions_shown`` ones are used
+        provider: Provider the table is built for (part of the key)
+        top: Number of combinations kept
+        min_count: Combinations seen fewer times are ignored
+    """
+    counts: Counter = Counter()
+    forms: Dict[Tuple[str, Tuple[str, ...], int], Counter] = defaultdict(Counter)
+    for event in events:
+        if event.get("type") != "suggestions_shown" or not isinstance(event.get("context"), str):
+            continue
+        context = event["context"].strip()
+        if not context:
+            continue
+        modes = tuple(str(m).lower() for m in event.get("modes") or ("casual", "formal", "witty"))
+        intensity = event.get("intensity", 5)
+        if not isinstance(intensity, int):
+            continue
+        combo = (canonical.canonicalize(context).key, modes, intensity)
+        counts[combo] += 1
+        forms[combo][context] += 1
+    return [
+        HotContext(table_key(combo[0], combo[1], combo[2], provider), forms[combo].most_common(1)[0][0],
+                   combo[1], combo[2], count)
+        for combo, count in counts.most_common(top) if count >= min_count
+    ]
+
+
+async def precompute(
+    hot: Sequence[HotContext], provider, candidates: int, concurrency: int = 8
+) -> Dict[bytes, List[SuggestionItem]]:
+    """Ask ``provider`` for suggestions for each hot context, masked for storage."""
+    semaphore = asyncio.Semaphore(concurrency)
+    entries: Dict[bytes, List[SuggestionItem]] = {}
+
+    async def one(item: HotContext) -> None:
+        pii: List[redaction.Pii] = []
+        request = SuggestRequest(
+            user_id="hot-contexts", context=redaction.redact(item.context, pii), modes=list(item.modes),
+            intensity=item.intensity, num_suggestions=candidates,
+        )
+        async with semaphore:
+            try:
+                response = await provider.suggest(request)
+            except ProviderError:
+                return
+        suggestions = [s.model_copy(update={"text": redaction.restore(s.text, pii)}) for s in response.suggestions]
+        pool = diversity.diversify(
+            suggestions, len(suggestions), settings.diversity_threshold, context=item.context
+        )
+        if len(pool) >= 3:
+            entities = canonical.canonicalize(item.context).entities
+            entries[item.key] = [s.model_copy(update={"text": canonical.mask(s.text, entities)}) for s in pool]
+
+    await asyncio.gather(*(one(item) for item in hot))
+    return entries
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("telemetry_dir", help="Telemetry log directory (TELEMETRY_DIR)")
+    parser.add_argument("--top", type=int, default=1000, help="Number of contexts to precompute")
+    parser.add_argument("--min-count", type=int, default=2, help="Ignore contexts seen fewer times")
+    parser.add_argument("--provider", default="mock", help="Provider to precompute with")
+    parser.add_argument("--out", default=settings.hot_contexts_path, help="Table file (HOT_CONTEXTS_PATH)")
+    args = parser.parse_args(argv)
+
+    from backend.main import providers  # the app's registry, with its configured adapters
+
+    hot = mine(telemetry_log.scan(args.telemetry_dir), args.provider, args.top, args.min_count)
+    print(f"{len(hot)} hot contexts, {sum(h.count for h in hot)} logged requests")
+
+    async def build() -> Dict[bytes, List[SuggestionItem]]:
+        provider = await providers.acquire(args.provider)
+        if provider is None:
+            raise SystemExit(f"Provider {args.provider!r} is not configured")
+        return await precompute(hot, provider, max(3, settings.suggest_candidates))
+
+    written = write(args.out, asyncio.run(build()))
+    print(f"wrote {written} entries to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
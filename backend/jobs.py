@@ -0,0 +1,386 @@
+"""
+Background Job Queue
+
+This module runs personalization and model-building jobs (``/train``) off the
+request path.
+
+Jobs are persisted in a SQLite queue (WAL mode), so they survive restarts and
+can be enqueued from any worker process. A partial unique index allows at
+most one queued job per (user, kind): enqueueing a duplicate returns the job
+already waiting. A job may be queued while another of the same (user, kind)
+runs, so an upload made during a run is still picked up; ``claim`` holds the
+new job back until the running one has finished, so the two never overlap.
+
+One ``JobRunner`` (in worker 0 under backend.launcher) claims jobs and runs
+them in a process pool. The pool processes run at lower CPU priority, so
+heavy recomputation never competes with the ``/suggest`` event loop. Handlers
+run in those processes, report progress straight to the queue, and return a
+JSON-serializable result. An optional per-kind ``on_success`` hook then applies
+the result in the API process (for example, updating caches). The runner's own
+queue writes and the hook run in the loop's default thread pool, since SQLite
+may wait on its busy timeout.
+
+Handlers are named by "module:function" and imported in the pool process,
+mirroring how the provider registry loads adapters.
+"""
+
+import asyncio
+import functools
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        progress REAL NOT NULL DEFAULT 0,
+        message TEXT,
+        result TEXT,
+        error TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL
+    )
+    """,
+    # Databases created before queued jobs were deduplicated on their own
+    "DROP INDEX IF EXISTS jobs_active",
+    "CREATE UNIQUE INDEX IF NOT EXISTS jobs_queued_once ON jobs (user_id, kind) WHERE status = 'queued'",
+    "CREATE INDEX IF NOT EXISTS jobs_queued ON jobs (status, created_at)",
+)
+
+_COLUMNS = ("id", "kind", "user_id", "payload", "status", "progress", "message", "result", "error",
+            "attempts", "created_at", "started_at", "finished_at")
+
+
+class JobQueue:
+    """
+    Durable job queue in a SQLite database shared by all processes.
+
+    Args:
+        path: SQLite database file (created on first use)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _row(row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def _select(self, where: str, params: tuple) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE {where}", params
+        ).fetchone()
+        return self._row(row)
+
+    def enqueue(self, kind: str, user_id: str, payload: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Add a job unless the same kind is already queued for the user.
+
+        Returns:
+            (job, created): the new job, or the one already waiting
+        """
+        with self._lock:
+            conn = self._connection()
+            try:
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, user_id, payload, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (uuid.uuid4().hex, kind, user_id, json.dumps(payload or {}), QUEUED, time.time()),
+                )
+            except sqlite3.IntegrityError:
+                existing = self._select("user_id = ? AND kind = ? AND status = ?", (user_id, kind, QUEUED))
+                if existing is not None:
+                    return existing, False
+                raise
+            return self._select("rowid = last_insert_rowid()", ()), True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job by id, or None."""
+        with self._lock:
+            return self._select("id = ?", (job_id,))
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Move the oldest queued job whose user has no job of its kind running to running and return it."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                job = self._select(
+                    "status = ? AND NOT EXISTS (SELECT 1 FROM jobs AS r WHERE r.user_id = jobs.user_id "
+                    "AND r.kind = jobs.kind AND r.status = ?) ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING),
+                )
+                if job is not None:
+                    job["attempts"] += 1
+                    job["status"] = RUNNING
+                    job["started_at"] = time.time()
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = ?, started_at = ?, progress = 0, error = NULL "
+                        "WHERE id = ?",
+                        (RUNNING, job["attempts"], job["started_at"], job["id"]),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return job
+
+    def report(self, job_id: str, progress: float, message: Optional[str] = None) -> None:
+        """Record a running job's progress (0.0 - 1.0)."""
+        with self._lock:
+            self._connection().execute(
+                "UPDATE jobs SET progress = ?, message = ? WHERE id = ? AND status = ?",
+                (max(0.0, min(1.0, progress)), message, job_id, RUNNING),
+            )
+
+    def finish(self, job_id: str, result: Any) -> None:
+        """Mark a job as succeeded with its result."""
+        with self._lock:
+            self._connection().execute(
+                "UPDATE jobs SET status = ?, progress = 1, result = ?, finished_at = ? WHERE id = ?",
+                (SUCCEEDED, json.dumps(result), time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str, retry: bool = False) -> None:
+        """
+        Mark a job as failed, or put it back in the queue to retry.
+
+        A job is not retried when a newer one of its (user, kind) is already
+        queued, since that job redoes the same work.
+        """
+        with self._lock:
+            conn = self._connection()
+            if retry:
+                try:
+                    conn.execute("UPDATE jobs SET status = ?, error = ? WHERE id = ?", (QUEUED, error, job_id))
+                    return
+                except sqlite3.IntegrityError:
+                    error += " (superseded by a queued job)"
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id),
+            )
+
+    def requeue_running(self) -> int:
+        """
+        Return jobs left running by a runner that died to the queue.
+
+        A job whose (user, kind) already has a newer job queued is marked
+        failed instead.
+        """
+        with self._lock:
+            conn = self._connection()
+            requeued = conn.execute(
+                "UPDATE OR IGNORE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING)
+            ).rowcount
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ?",
+                (FAILED, "Interrupted; superseded by a queued job", time.time(), RUNNING),
+            )
+            return requeued
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._lock:
+            rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def public_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of a job returned by the status API."""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "user_id": job["user_id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "message": job["message"],
+        "result": job["result"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+def _lower_priority(niceness: int) -> None:
+    """Pool process initializer: yield the CPU to the API processes."""
+    try:
+        os.nice(niceness)
+    except (AttributeError, OSError):
+        pass
+
+
+def _execute(db_path: str, handler: str, job_id: str, payload: Dict[str, Any]) -> Any:
+    """Pool process entry point: import the handler and run it with progress reporting."""
+    module_name, function_name = handler.split(":")
+    function = getattr(importlib.import_module(module_name), function_name)
+    queue = JobQueue(db_path)
+    try:
+        return function(payload, lambda progress, message=None: queue.report(job_id, progress, message))
+    finally:
+        queue.close()
+
+
+class JobRunner:
+    """
+    Claims queued jobs and runs them in a low-priority process pool.
+
+    Args:
+        queue: The job queue
+        handlers: Job kind -> "module:function" taking (payload, report) and
+            returning a JSON-serializable result
+        workers: Pool processes, i.e. jobs run concurrently
+        max_attempts: Attempts before a failing job is marked failed
+        poll_seconds: How often to look for jobs enqueued by other processes
+        niceness: CPU niceness added to pool processes
+        on_success: Job kind -> callable(job, result) run in this process
+            (in a thread) before the job is marked succeeded
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, str],
+        workers: int = 2,
+        max_attempts: int = 3,
+        poll_seconds: float = 1.0,
+        niceness: int = 10,
+        on_success: Optional[Dict[str, Callable[[Dict[str, Any], Any], None]]] = None,
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.niceness = niceness
+        self.on_success = on_success or {}
+        self.active = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+
+    def start(self) -> None:
+        """Start claiming jobs on the running event loop."""
+        if self._task is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_lower_priority,
+            initargs=(self.niceness,),
+        )
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def notify(self) -> None:
+        """Wake the runner after a job was enqueued in this process."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        requeued = await loop.run_in_executor(None, self.queue.requeue_running)
+        if requeued:
+            logger.warning("Requeued %d jobs interrupted by a restart", requeued)
+        while True:
+            while self.active < self.workers:
+                job = await loop.run_in_executor(None, self.queue.claim)
+                if job is None:
+                    break
+                self.active += 1
+                task = loop.create_task(self._execute(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            handler = self.handlers.get(job["kind"])
+            if handler is None:
+                await loop.run_in_executor(None, self.queue.fail, job["id"], f"Unknown job kind {job['kind']!r}")
+                return
+            try:
+                result = await loop.run_in_executor(self._pool, _execute, self.queue.path, handler, job["id"], job["payload"])
+                hook = self.on_success.get(job["kind"])
+                if hook is not None:
+                    await loop.run_in_executor(None, hook, job, result)
+            except Exception as e:
+                retry = job["attempts"] < self.max_attempts
+                logger.warning("Job %s (%s) failed on attempt %d: %s", job["id"], job["kind"], job["attempts"], e)
+                await loop.run_in_executor(None, functools.partial(
+                    self.queue.fail, job["id"], f"{type(e).__name__}: {e}", retry=retry,
+                ))
+                return
+            await loop.run_in_executor(None, self.queue.finish, job["id"], result)
+        finally:
+            self.active -= 1
+            self.notify()
+
+    async def stop(self) -> None:
+        """Stop claiming jobs and shut the pool down; running jobs are requeued on next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
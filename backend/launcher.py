@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Production Server Launcher
+
+Runs the API as ``Settings.api_workers`` uvicorn worker processes sharing one
+listening socket. With more than one worker the launcher creates the shared
+state segment (see backend/shared_state.py), attaches every worker to it
+before the app is imported, and restarts workers that exit unexpectedly.
+
+Usage (from the repository root):
+
+    API_WORKERS=4 python -m backend.launcher
+"""
+
+import logging
+import multiprocessing
+import signal
+import socket
+import time
+from typing import Dict
+
+import uvicorn
+
+from backend import shared_state
+from backend.config import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+APP = "backend.main:app"
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, handles: shared_state.StateHandles, worker_index: int, log_level: str) -> None:
+    """Worker process entry point: attach shared state, then serve the app."""
+    shared_state.attach(handles, worker_index)
+    config = uvicorn.Config(APP, log_level=log_level.lower())
+    server = uvicorn.Server(config)
+    try:
+        server.run(sockets=[sock])
+    finally:
+        shared_state.state.close()
+
+
+class Launcher:
+    """Starts, supervises and stops the worker processes."""
+
+    def __init__(self, config: Settings, restart_delay: float = 1.0):
+        self.config = config
+        self.workers = max(1, config.api_workers)
+        self.restart_delay = restart_delay
+        self._ctx = multiprocessing.get_context("spawn")
+        self._processes: Dict[int, multiprocessing.process.BaseProcess] = {}
+        self._stopping = False
+
+    def _start_worker(self, index: int, sock: socket.socket, handles: shared_state.StateHandles) -> None:
+        process = self._ctx.Process(
+            target=_run_worker,
+            args=(sock, handles, index, self.config.log_level),
+            name=f"api-worker-{index}",
+        )
+        process.start()
+        self._processes[index] = process
+        logger.info("Started worker %d (pid %s)", index, process.pid)
+
+    def _handle_signal(self, signum, frame) -> None:
+        logger.info("Received signal %s, stopping workers", signum)
+        self._stopping = True
+
+    def run(self) -> None:
+        """Serve until interrupted."""
+        if self.workers == 1:
+            uvicorn.run(APP, host=self.config.api_host, port=self.config.api_port,
+                        log_level=self.config.log_level.lower())
+            return
+
+        handles, shm = shared_state.create_shared(self.workers, self.config.shared_state_capacity, self._ctx)
+        sock = _bind_socket(self.config.api_host, self.config.api_port)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        logger.info("Serving on %s with %d workers", self.config.get_api_url(), self.workers)
+
+        try:
+            for index in range(self.workers):
+                self._start_worker(index, sock, handles)
+            while not self._stopping:
+                time.sleep(0.5)
+                for index, process in list(self._processes.items()):
+                    if not process.is_alive() and not self._stopping:
+                        logger.warning("Worker %d exited with %s, restarting", index, process.exitcode)
+                        time.sleep(self.restart_delay)
+                        self._start_worker(index, sock, handles)
+        finally:
+            self._shutdown()
+            sock.close()
+            shm.close()
+            shm.unlink()
+
+    def _shutdown(self, timeout: float = 10.0) -> None:
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+
+def main() -> None:
+    logging.basicConfig(level=settings.log_level)
+    Launcher(settings).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,31 @@
-from typing import List
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
 import logging
+import time
 
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, ValidationError
+from pydantic_core import PydanticSerializationError
 from backend.config import settings
+from backend.overload import OverloadController, Decision, PRIORITY_HEADER, parse_priority
+from backend.watchdog import BlockingWatchdog
+from backend.personalization_store import PersonalizationStore
+from backend.uploads import ChunkCipher, ChunkedUploadStore, UploadError
+from backend.jobs import JobQueue, JobRunner, public_view
+from backend.feedback import FeedbackBatch, FeedbackStore
+from backend.telemetry_log import TelemetryLog
+from backend.style_index import StyleIndexStore
+from backend.rerank import Reranker
+from backend.safety import SafetyFilter
+from backend import (
+    canonical, diversity, hot_contexts, metrics, profile_summary, redaction, shared_state, suggestion_pages, tracing,
+    training,
+)
 
 app = FastAPI(title=settings.app_name + " backend")
 
@@ -20,6 +41,89 @@ app.add_middleware(
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(settings.app_name)
 
+# Overload protection: shed or degrade requests when the event loop falls behind
+overload_controller = OverloadController(
+    lag_threshold_ms=settings.overload_lag_threshold_ms,
+    max_in_flight=settings.overload_max_in_flight,
+    sample_interval_ms=settings.overload_sample_interval_ms,
+    retry_after_seconds=settings.overload_retry_after_seconds,
+)
+_OVERLOAD_EXEMPT_PATHS = {"/health", "/ready", "/metrics"}
+# Shed before anything else unless the client says otherwise
+_LOW_PRIORITY_PATHS = {"/telemetry"}
+
+# Per-request stage timings, kept in a ring buffer and sent as Server-Timing
+trace_buffer = tracing.TraceBuffer(
+    maxlen=settings.tracing_buffer_size,
+    exporter=tracing.JsonLinesExporter(settings.tracing_export_path) if settings.tracing_export_path else None,
+)
+_UNTRACED_PATHS = {"/health", "/ready", "/metrics", "/debug/traces"}
+
+# Blocking-call detection: report sync work that stalls the event loop
+blocking_watchdog = BlockingWatchdog(threshold_ms=settings.blocking_watchdog_threshold_ms)
+
+
+@app.on_event("startup")
+async def _start_overload_controller():
+    if settings.overload_enabled:
+        overload_controller.start()
+
+
+@app.on_event("startup")
+async def _start_blocking_watchdog():
+    if settings.blocking_watchdog_enabled:
+        blocking_watchdog.register_routes(app.routes)
+        blocking_watchdog.start()
+
+
+@app.on_event("shutdown")
+async def _stop_overload_controller():
+    await overload_controller.stop()
+
+
+@app.on_event("shutdown")
+async def _stop_blocking_watchdog():
+    await blocking_watchdog.stop()
+
+
+@app.middleware("http")
+async def tracing_middleware(request: Request, call_next):
+    if not settings.tracing_enabled or request.url.path in _UNTRACED_PATHS:
+        return await call_next(request)
+
+    trace = tracing.start_trace(request.url.path)
+    response = await call_next(request)
+    trace.finish()
+    trace_buffer.add(trace)
+    if settings.server_timing_enabled:
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+
+@app.middleware("http")
+async def overload_middleware(request: Request, call_next):
+    if not settings.overload_enabled or request.url.path in _OVERLOAD_EXEMPT_PATHS:
+        return await call_next(request)
+
+    priority_header = request.headers.get(PRIORITY_HEADER)
+    if priority_header is None and request.url.path in _LOW_PRIORITY_PATHS:
+        priority_header = "low"
+    decision = overload_controller.decide(parse_priority(priority_header))
+    if decision is Decision.SHED:
+        logger.warning("Shedding %s under load (%s)", request.url.path, overload_controller.snapshot())
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server overloaded, retry later"},
+            headers={"Retry-After": str(overload_controller.retry_after_seconds)},
+        )
+    request.state.degraded = decision is Decision.DEGRADE
+
+    overload_controller.in_flight += 1
+    try:
+        return await call_next(request)
+    finally:
+        overload_controller.in_flight -= 1
+
 
 class SuggestRequest(BaseModel):
     user_id: str
@@ -27,6 +131,8 @@ class SuggestRequest(BaseModel):
     modes: List[str] = ["casual", "formal", "witty"]
     intensity: int = 5
     provider: str = "mock"
+    more: bool = False  # next page of an earlier request's suggestions, from cache when possible
+    locale: Optional[str] = None  # BCP 47 tag of the conversation; selects the safety blocklist
 
 
 class SuggestionItem(BaseModel):
@@ -38,12 +144,89 @@ class SuggestResponse(BaseModel):
     suggestions: List[SuggestionItem]
 
 
-@app.get("/health")
-async def health():
-    return {"status": "ok"}
+# Route templates by endpoint, so metric labels stay bounded (e.g. /personalization/{user_id})
+_route_paths = {}
+
+
+def _route_label(request: Request) -> str:
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if not _route_paths:
+        _route_paths.update({route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")})
+    return _route_paths.get(endpoint, "unmatched")
 
 
-from backend.providers.base import BaseProvider, SuggestRequest as BaseSuggestRequest, SuggestResponse, SuggestionItem, ProviderConfig
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    if not settings.metrics_enabled:
+        return await call_next(request)
+
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = _route_label(request)
+        metrics.http_requests.labels(route, request.method, str(status)).inc()
+        metrics.http_latency.labels(route).observe(time.perf_counter() - started)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    counts = await asyncio.get_running_loop().run_in_executor(None, _job_queue.counts)
+    _job_counts.clear()
+    _job_counts.update(counts)
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/traces")
+async def recent_traces(limit: int = 50):
+    if not settings.tracing_enabled:
+        raise HTTPException(status_code=404, detail="Tracing disabled")
+    return {"traces": [trace.to_dict() for trace in trace_buffer.recent(limit)]}
+
+
+@app.get("/health")
+async def health():
+    cascade = _loaded_cascade()
+    job_counts = await asyncio.get_running_loop().run_in_executor(None, _job_queue.counts)
+    return {
+        "status": "ok",
+        "load": overload_controller.snapshot(),
+        "blocking": blocking_watchdog.snapshot(),
+        "providers": providers.status(),
+        "connections": connection_warmer.snapshot(),
+        "transport": http_transport.snapshot(),
+        "timeouts": adaptive_timeouts.snapshot(),
+        "personalization": _personalization_store.snapshot(),
+        "telemetry": telemetry_log.snapshot(),
+        "hot_contexts": _hot_contexts.snapshot(),
+        "cascade": cascade.snapshot() if cascade else None,
+        "jobs": {"running_here": job_runner.active, "by_status": job_counts},
+    }
+
+
+@app.get("/ready")
+async def ready():
+    loading = settings.provider_warmup and "pending" in providers.status().values()
+    warm = connection_warmer.ready or not settings.connection_warmup_enabled
+    body = {"status": "ready" if warm and not loading else "warming", **connection_warmer.snapshot()}
+    return JSONResponse(body, status_code=200 if warm and not loading else 503)
+
+
+from backend.providers import base as provider_base
+from backend.providers import cascade as provider_cascade
+from backend.providers.registry import ProviderRegistry
+from backend.providers.timeouts import adaptive_timeouts
+from backend.providers.transport import http_transport
+from backend.providers.warmup import ConnectionWarmer
+from backend.providers.canned import CannedProvider
+from backend.providers.base import BaseProvider, SuggestRequest as BaseSuggestRequest, SuggestResponse, SuggestionItem, ProviderConfig, ProviderError, provider_executor
 
 def _intensity_suffix(intensity: int) -> str:
     # Simple heuristic: higher intensity -> add punctuation/emojis or stronger wording
@@ -86,53 +269,493 @@ class MockProvider(BaseProvider):
 
     def get_cost_estimate(self, request: BaseSuggestRequest) -> float:
         return 0.0
-providers = {
+# Real adapters are registered from the API keys in settings and imported on first use
+providers = ProviderRegistry.from_settings(settings, {
     "mock": MockProvider(ProviderConfig()),
+    "canned": CannedProvider(ProviderConfig()),
+})
+
+
+# One async HTTP client for every adapter calling its provider's REST API
+http_transport.configure(
+    http2=settings.transport_http2,
+    max_connections=settings.transport_max_connections,
+    max_keepalive_connections=max(20, settings.warm_connections_per_provider * 3),
+    keepalive_expiry=settings.connection_keepalive_seconds,
+    per_host_limit=settings.transport_per_host_limit,
+    connect_timeout=settings.transport_connect_timeout_seconds,
+    timeout=settings.transport_timeout_seconds,
+)
+
+# Provider call timeouts follow each provider/model's recent latency quantile
+adaptive_timeouts.configure(
+    enabled=settings.adaptive_timeouts_enabled,
+    quantile=settings.adaptive_timeout_quantile,
+    margin_seconds=settings.adaptive_timeout_margin_seconds,
+    min_seconds=settings.adaptive_timeout_min_seconds,
+    min_samples=settings.adaptive_timeout_min_samples,
+)
+
+# Keep-alive connections to provider APIs, opened at startup and kept fresh
+connection_warmer = ConnectionWarmer(
+    providers,
+    connections=settings.warm_connections_per_provider,
+    refresh_seconds=settings.connection_refresh_seconds,
+)
+
+
+async def _warm_up() -> None:
+    if settings.provider_warmup:
+        await providers.warm_up()
+    if settings.connection_warmup_enabled:
+        connection_warmer.start()
+
+
+@app.on_event("startup")
+async def _warm_up_providers():
+    asyncio.get_running_loop().create_task(_warm_up())
+
+
+@app.on_event("shutdown")
+async def _stop_connection_warmer():
+    await connection_warmer.stop()
+    await http_transport.aclose()
+
+# Let provider adapters report their stages (prompt building, executor wait, ...)
+provider_base.stage_recorder = tracing.record
+# Cascade tiers escalate when their suggestions trip the safety filter
+provider_cascade.suggestion_check = lambda text: not (settings.safety_filter_enabled and _safety_filter.flagged(text))
+
+
+def _loaded_cascade() -> Optional[provider_cascade.CascadeProvider]:
+    provider = providers.loaded().get("cascade")
+    return provider if isinstance(provider, provider_cascade.CascadeProvider) else None
+
+
+def _cascade_outcomes() -> dict:
+    cascade = _loaded_cascade()
+    if cascade is None:
+        return {}
+    outcomes = {}
+    for label, stats in cascade.stats.items():
+        outcomes[(label, "served")] = stats.served
+        outcomes.update({(label, reason): count for reason, count in stats.escalations.items()})
+    return outcomes
+
+# Values owned by other components, read only when /metrics is scraped
+metrics.registry.callback(
+    "http_requests_in_flight", "Requests currently being served", "gauge",
+    lambda: overload_controller.in_flight,
+)
+metrics.registry.callback(
+    "event_loop_lag_milliseconds", "Smoothed event loop scheduling lag", "gauge",
+    lambda: overload_controller.lag_ms,
+)
+metrics.registry.callback(
+    "overload_decisions_total", "Requests shed or degraded by the overload controller", "counter",
+    lambda: {("shed",): overload_controller.shed_count, ("degraded",): overload_controller.degraded_count},
+    ("decision",),
+)
+metrics.registry.callback(
+    "event_loop_blocked_total", "Event loop stalls detected by the watchdog", "counter",
+    lambda: {(source,): count for source, count in blocking_watchdog.counts.items()},
+    ("source",),
+)
+metrics.registry.callback(
+    "provider_pool_in_flight", "Blocking provider calls submitted to the executor", "gauge",
+    lambda: provider_executor.in_flight,
+)
+metrics.registry.callback(
+    "provider_pool_saturation", "Fraction of provider executor threads busy", "gauge",
+    lambda: provider_executor.saturation,
+)
+metrics.registry.callback(
+    "provider_connections_warm", "Keep-alive connections opened by the warm-up task", "gauge",
+    lambda: {(name,): pool.warm for name, pool in connection_warmer.pools.items()},
+    ("provider",),
+)
+metrics.registry.callback(
+    "provider_transport_in_flight", "Provider HTTP requests in flight per upstream host", "gauge",
+    lambda: {(host,): slot["in_flight"] for host, slot in http_transport.snapshot()["hosts"].items()},
+    ("host",),
+)
+metrics.registry.callback(
+    "provider_pool_queued", "Provider calls waiting for an executor thread", "gauge",
+    lambda: provider_executor.queued,
+)
+metrics.registry.callback(
+    "provider_timeout_seconds", "Current adaptive timeout per provider and model", "gauge",
+    lambda: {tuple(key.split(":", 1)): entry["timeout_seconds"] for key, entry in adaptive_timeouts.snapshot().items()},
+    ("provider", "model"),
+)
+metrics.registry.callback(
+    "provider_cascade_attempts_total", "Cascade tier attempts by outcome: served or the escalation reason", "counter",
+    _cascade_outcomes,
+    ("tier", "outcome"),
+)
+
+
+def _encode_response(response: SuggestResponse) -> Response:
+    """
+    Serialize a provider response straight to JSON bytes.
+
+    Uses pydantic-core's serializer and returns a raw Response, so FastAPI does
+    not re-validate it against ``response_model``. Falls back to FastAPI's
+    encoder when metadata holds SDK objects pydantic cannot serialize.
+    """
+    with tracing.span("serialize"):
+        try:
+            return Response(response.model_dump_json(), media_type="application/json")
+        except PydanticSerializationError:
+            return JSONResponse(jsonable_encoder(response.model_dump()))
+
+
+async def _call_provider(provider_name: str, provider: BaseProvider, base_request: BaseSuggestRequest) -> SuggestResponse:
+    if not settings.metrics_enabled:
+        with tracing.span("provider"):
+            return await provider.suggest(base_request)
+
+    metrics.provider_requests.labels(provider_name).inc()
+    started = time.perf_counter()
+    try:
+        response = await provider.suggest(base_request)
+    except ProviderError as e:
+        metrics.provider_errors.labels(provider_name, type(e).__name__, str(e.retryable).lower()).inc()
+        raise
+    finally:
+        ended = time.perf_counter()
+        metrics.provider_latency.labels(provider_name).observe(ended - started)
+        tracing.record("provider", started, ended)
+    metrics.record_token_usage(provider_name, response.metadata)
+    return response
+
+
+_SUGGEST_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": SuggestRequest.model_json_schema()}},
+    }
 }
 
 
-@app.post("/suggest", response_model=SuggestResponse)
-async def suggest(req: SuggestRequest, request: Request):
+@app.post("/suggest", response_model=SuggestResponse, openapi_extra=_SUGGEST_OPENAPI)
+async def suggest(request: Request):
+    # The body is parsed and validated once, straight from bytes, instead of
+    # letting FastAPI build SuggestRequest and then copying it into the
+    # provider-level request model.
+    body = await request.body()
+    adaptive_timeouts.start_budget(settings.suggest_budget_seconds)
+    trace = tracing.current_trace()
+    if trace is not None:
+        tracing.record("receive", trace.started, time.perf_counter())
+    with tracing.span("validate"):
+        try:
+            req = SuggestRequest.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors()])
+
     logger.info("/suggest called by %s from %s", req.user_id, request.client)
     if not req.context or not req.context.strip():
         raise HTTPException(status_code=400, detail="Empty context")
 
-    provider = providers.get(req.provider, providers["mock"])
-    base_request = BaseSuggestRequest(
+    if settings.rate_limit_enabled:
+        allowed, retry_after = shared_state.state.rate_limiter.hit(
+            req.user_id, settings.rate_limit_requests, settings.rate_limit_window
+        )
+        if not allowed:
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers={"Retry-After": str(retry_after)})
+
+    # Caches are keyed by the canonical context; what they store is masked, and
+    # this request's own entities are substituted back in on the way out
+    entities = []
+    cache_context = req.context
+    if settings.canonicalize_enabled:
+        with tracing.span("canonicalize"):
+            cache_context, entities = canonical.canonicalize(req.context)
+    page_key = suggestion_pages.page_key(req.user_id, cache_context, req.modes, req.intensity, req.provider)
+    if req.more and settings.suggestion_pages_enabled:
+        with tracing.span("pages"):
+            cached = _suggestion_pages.take(page_key)
+        if cached is not None:
+            page, remaining = cached
+            return _encode_response(SuggestResponse(
+                suggestions=_rewrite(page, canonical.restore, entities),
+                metadata={"more_available": remaining, "cached": True},
+            ))
+    summary, examples, history = await _personalization(req.user_id, req.context)
+    # The hot table is shared by all users: personalized users get their own replies
+    if settings.hot_contexts_enabled and not req.more and not (summary or examples or history):
+        with tracing.span("hot_contexts"):
+            hot = _hot_contexts.lookup(hot_contexts.table_key(cache_context, req.modes, req.intensity, req.provider))
+        if hot is not None and settings.safety_filter_enabled:
+            with tracing.span("safety"):
+                hot = _safety_filter.filter(hot, req.locale)
+        if hot is not None and len(hot) >= 3:
+            page, rest = hot[:3], hot[3:]
+            metadata = {"cached": True}
+            if rest and settings.suggestion_pages_enabled:
+                _suggestion_pages.put(page_key, rest)
+                metadata["more_available"] = len(rest)
+            return _encode_response(SuggestResponse(
+                suggestions=_rewrite(page, canonical.restore, entities), metadata=metadata
+            ))
+
+    if getattr(request.state, "degraded", False):
+        provider_name = settings.overload_fallback_provider
+    else:
+        provider_name = req.provider
+    provider = await providers.acquire(provider_name)
+    if provider is None:
+        provider_name, provider = "mock", providers["mock"]
+    base_request = BaseSuggestRequest.model_construct(
         user_id=req.user_id,
         context=req.context,
         modes=req.modes,
-        intensity=req.intensity
+        intensity=req.intensity,
+        user_profile_summary=summary,
+        style_examples=examples,
+        num_suggestions=max(3, settings.suggest_candidates),
     )
-    response = await provider.suggest(base_request)
-    return response
+    provider_request, pii = base_request, []
+    if settings.pii_redaction_enabled:
+        with tracing.span("redact"):
+            provider_request, pii = _redacted(base_request)
+    response = await _call_provider(provider_name, provider, provider_request)
+    pool = _rewrite(response.suggestions, redaction.restore, pii)
+    if settings.safety_filter_enabled:
+        with tracing.span("safety"):
+            pool = _safety_filter.filter(pool, req.locale)
+    if settings.rerank_enabled and len(pool) > 1:
+        with tracing.span("rerank"):
+            pool = _reranker.rerank(req.context, pool, req.modes, history, examples, k=len(pool))
+    if settings.diversity_enabled:
+        pool = await _distinct_suggestions(pool, base_request, req.locale)
+    response.suggestions, rest = pool[:3], pool[3:]
+    if rest and settings.suggestion_pages_enabled and provider_name == req.provider:
+        _suggestion_pages.put(page_key, _rewrite(rest, canonical.mask, entities))
+        response.metadata = {**(response.metadata or {}), "more_available": len(rest)}
+    return _encode_response(response)
+
+
+async def _personalization(user_id: str, context: str) -> tuple:
+    # (profile summary with the feedback note, style examples, feedback counters);
+    # cached values are served inline, SQLite reads on a miss run in the executor
+    summary = None
+    examples = None
+    history = None
+    if settings.personalization_enabled:
+        loop = asyncio.get_running_loop()
+        with tracing.span("profile"):
+            hit, summary = _personalization_store.peek_summary(user_id)
+            if not hit:
+                summary = await loop.run_in_executor(None, _personalization_store.get_summary, user_id)
+            profile = _feedback_store.peek_profile(user_id)
+            if profile is None:
+                profile = await loop.run_in_executor(None, _feedback_store.profile, user_id)
+            note, history = profile
+            if note:
+                summary = f"{summary} {note}" if summary else note
+        if settings.style_examples_k > 0:
+            with tracing.span("style_examples"):
+                examples = _style_index.examples(user_id, context, settings.style_examples_k) or None
+    return summary, examples, history
+
+
+def _rewrite(items: List[SuggestionItem], rewrite, pairs: List[Tuple[str, str]]) -> List[SuggestionItem]:
+    # Apply canonical.mask/restore or redaction.restore with a request's (placeholder, value) pairs
+    if not pairs:
+        return items
+    return [item.model_copy(update={"text": rewrite(item.text, pairs)}) for item in items]
+
+
+def _redacted(request: BaseSuggestRequest) -> Tuple[BaseSuggestRequest, List[redaction.Pii]]:
+    # The request as sent to the provider, with PII in every prompt text replaced
+    found: List[redaction.Pii] = []
+    update = {"context": redaction.redact(request.context, found)}
+    if request.user_profile_summary:
+        update["user_profile_summary"] = redaction.redact(request.user_profile_summary, found)
+    if request.style_examples:
+        update["style_examples"] = [redaction.redact(example, found) for example in request.style_examples]
+    return (request.model_copy(update=update), found) if found else (request, found)
+
+
+_FALLBACK_MODES = ("casual", "formal", "witty")
+
+
+async def _distinct_suggestions(
+    pool: List[SuggestionItem], base_request: BaseSuggestRequest, locale: Optional[str] = None
+) -> List[SuggestionItem]:
+    # Drop near-duplicates, keeping every distinct candidate (later ones become
+    # "more" pages); if fewer than 3 remain (also after the safety filter),
+    # fill from the local fallback provider
+    with tracing.span("diversity"):
+        picked = diversity.diversify(pool, len(pool), settings.diversity_threshold, context=base_request.context)
+    if len(picked) >= 3:
+        return picked
+    fallback = await providers.acquire(settings.diversity_fallback_provider)
+    if fallback is None:
+        return picked
+    modes = list(base_request.modes) + [m for m in _FALLBACK_MODES if m not in base_request.modes]
+    with tracing.span("diversity_fallback"):
+        try:
+            extra = await fallback.suggest(base_request.model_copy(update={"modes": modes}))
+        except ProviderError:
+            return picked
+        extra = extra.suggestions
+        if settings.safety_filter_enabled:
+            extra = _safety_filter.filter(extra, locale)
+        return diversity.diversify(picked, 3, settings.diversity_threshold, extra, base_request.context)
+
+
+# Training jobs: durable queue shared by all workers, run off the event loop by
+# low-priority processes that only worker 0 starts
+_job_queue = JobQueue(settings.jobs_db_path)
+
+
+def _apply_personalization(job: dict, result: dict) -> None:
+    _personalization_store.set_summary(job["user_id"], result["summary"], result["updated_at"])
+    _style_index.invalidate(job["user_id"])
+
+
+job_runner = JobRunner(
+    _job_queue,
+    training.HANDLERS,
+    workers=settings.train_workers,
+    max_attempts=settings.train_max_attempts,
+    poll_seconds=settings.train_poll_seconds,
+    niceness=settings.train_niceness,
+    on_success={"personalization": _apply_personalization},
+)
+
 
+# Jobs per status, read from SQLite off the event loop by /metrics before rendering
+_job_counts: Dict[str, int] = {}
+metrics.registry.callback(
+    "training_jobs", "Training jobs in the queue by status", "gauge",
+    lambda: {(status,): count for status, count in _job_counts.items()},
+    ("status",),
+)
+
+
+@app.on_event("startup")
+async def _start_job_runner():
+    if shared_state.state.worker_index == 0:
+        job_runner.start()
+
+
+@app.on_event("shutdown")
+async def _stop_job_runner():
+    await job_runner.stop()
+    _job_queue.close()
+
+
+async def _enqueue_training(user_id: str, kind: str = "personalization") -> tuple:
+    job, created = await asyncio.get_running_loop().run_in_executor(
+        None, _job_queue.enqueue, kind, user_id, {"user_id": user_id}
+    )
+    if created:
+        job_runner.notify()
+    return job, created
 
-@app.post("/train")
-async def train():
-    # Placeholder for training/personalization endpoint
-    logger.info("/train called (mock)")
-    return {"status": "ok", "message": "training queued (mock)"}
 
+@app.post("/train", status_code=202)
+async def train(payload: dict):
+    """Accepts JSON: {user_id: str, kind?: str} and queues a training job.
+    Only one job per user and kind is queued at a time; asking again returns
+    that job. Poll GET /train/{job_id} for progress.
+    """
+    user_id = payload.get("user_id")
+    kind = payload.get("kind", "personalization")
+    if not user_id:
+        raise HTTPException(status_code=400, detail="user_id required")
+    if kind not in training.HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {kind}")
+    job, created = await _enqueue_training(user_id, kind)
+    logger.info("/train %s job %s for %s (%s)", kind, job["id"], user_id, "queued" if created else "deduplicated")
+    return {"job_id": job["id"], "status": job["status"], "deduplicated": not created}
+
+
+@app.get("/train/{job_id}")
+async def train_status(job_id: str):
+    job = await asyncio.get_running_loop().run_in_executor(None, _job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return public_view(job)
+
+
+# Personalization artifacts: SQLite shared by all workers, hot users served from memory
+_personalization_store = PersonalizationStore(
+    settings.personalization_db_path,
+    max_entries=settings.personalization_cache_entries,
+    max_bytes=settings.personalization_cache_mb * 1024 * 1024,
+    versions=shared_state.state.cache_index,
+    on_lookup=(lambda hit: metrics.record_cache_lookup("personalization", hit)) if settings.metrics_enabled else None,
+)
+
+
+# Per-user retrieval indexes of past replies, built by training jobs and memory-mapped
+_style_index = StyleIndexStore(
+    settings.style_index_dir,
+    max_open=settings.style_index_max_open,
+    versions=shared_state.state.cache_index,
+    on_lookup=(lambda hit: metrics.record_cache_lookup("style_index", hit)) if settings.metrics_enabled else None,
+)
+
+# Suggestion feedback counters, kept next to the artifacts
+_feedback_store = FeedbackStore(
+    settings.personalization_db_path,
+    max_entries=settings.personalization_cache_entries,
+    versions=shared_state.state.cache_index,
+    on_lookup=(lambda hit: metrics.record_cache_lookup("feedback", hit)) if settings.metrics_enabled else None,
+)
+
+# Scores over-generated suggestions and keeps the best three
+_reranker = Reranker.load(settings.rerank_weights_path) if settings.rerank_weights_path else Reranker()
+
+# Over-generated suggestions not yet shown, served to "more" requests
+_suggestion_pages = suggestion_pages.SuggestionPages(
+    max_entries=settings.max_cache_size,
+    ttl_seconds=settings.cache_ttl,
+    on_lookup=(lambda hit: metrics.record_cache_lookup("suggestion_pages", hit)) if settings.metrics_enabled else None,
+)
+
+# Per-locale blocklists checked against every suggestion before it is shown
+_safety_filter = SafetyFilter.load(settings.safety_blocklist_dir, settings.safety_default_locale)
+
+# Precomputed suggestions for the most frequent contexts (backend/hot_contexts.py)
+_hot_contexts = hot_contexts.HotContextTable(
+    settings.hot_contexts_path,
+    check_seconds=settings.hot_contexts_check_seconds,
+    on_lookup=(lambda hit: metrics.record_cache_lookup("hot_contexts", hit)) if settings.metrics_enabled else None,
+)
 
-# Simple in-memory personalization store for development/prototyping
-_personalization_store = {}
+
+@app.on_event("shutdown")
+async def _close_personalization_store():
+    _personalization_store.close()
+    _feedback_store.close()
 
 
 @app.post("/upload_personalization")
 async def upload_personalization(payload: dict):
     """Accepts JSON: {user_id: str, artifacts: dict}
-    Stores artifacts in an in-memory store (mock). In production this should
-    validate consent and write to encrypted storage or a secure DB.
+    Stores artifacts in the personalization store together with a profile
+    summary derived from them, which /suggest passes to providers, and queues
+    a training job that builds the user's style retrieval index. In
+    production this should also encrypt the artifacts at rest.
     """
     user_id = payload.get("user_id")
     artifacts = payload.get("artifacts")
     if not user_id or artifacts is None:
         raise HTTPException(status_code=400, detail="user_id and artifacts required")
-    _personalization_store[user_id] = {"artifacts": artifacts}
+    summary = await asyncio.get_running_loop().run_in_executor(
+        None, profile_summary.summarize_artifacts, artifacts
+    )
+    _personalization_store.put(user_id, {"artifacts": artifacts}, summary)
+    job, _ = await _enqueue_training(user_id)
     keys_info = list(artifacts.keys()) if isinstance(artifacts, dict) else []
     logger.info("Saved personalization for %s (keys=%s)", user_id, keys_info)
-    return {"status": "ok"}
+    return {"status": "ok", "job_id": job["id"]}
 
 
 @app.post("/delete_personalization")
@@ -141,13 +764,179 @@ async def delete_personalization(payload: dict):
     user_id = payload.get("user_id")
     if not user_id:
         raise HTTPException(status_code=400, detail="user_id required")
-    if user_id in _personalization_store:
-        del _personalization_store[user_id]
+    deleted = _personalization_store.delete(user_id)
+    removed_uploads = await asyncio.get_running_loop().run_in_executor(None, _upload_store.delete_user, user_id)
+    deleted = removed_uploads > 0 or deleted
+    deleted = _feedback_store.delete(user_id) or deleted
+    deleted = _style_index.delete(user_id) or deleted
+    if deleted:
         logger.info("Deleted personalization for %s", user_id)
-        return {"status": "ok", "deleted": True}
-    return {"status": "ok", "deleted": False}
+    return {"status": "ok", "deleted": deleted}
 
 
 @app.get("/personalization/{user_id}")
 async def get_personalization(user_id: str):
-    return _personalization_store.get(user_id, {})
+    return Response(_personalization_store.get_json(user_id) or b"{}", media_type="application/json")
+
+
+@app.get("/personalization/{user_id}/summary")
+async def get_profile_summary(user_id: str):
+    return {"user_profile_summary": _personalization_store.get_summary(user_id)}
+
+
+@app.post("/feedback")
+async def feedback(batch: FeedbackBatch):
+    """Accepts JSON: {user_id: str, events: [{action, mode, tone?, suggestion_length?, final_length?}]}
+    where action is accepted, rejected or edited. Each event updates the user's
+    counters in constant time; /suggest passes the resulting preferences to
+    providers alongside the profile summary.
+    """
+    applied = await asyncio.get_running_loop().run_in_executor(
+        None, _feedback_store.record, batch.user_id, batch.events
+    )
+    return {"status": "ok", "applied": applied}
+
+
+@app.get("/personalization/{user_id}/feedback")
+async def get_feedback(user_id: str):
+    loop = asyncio.get_running_loop()
+    stats = await loop.run_in_executor(None, _feedback_store.stats, user_id)
+    preferences = await loop.run_in_executor(None, _feedback_store.preferences, user_id)
+    return {"stats": stats, "preferences": preferences}
+
+
+# Client telemetry: bounded buffer, group-committed to this worker's log segments
+telemetry_log = TelemetryLog(
+    settings.telemetry_dir,
+    writer_id=shared_state.state.worker_index,
+    buffer_events=settings.telemetry_buffer_events,
+    buffer_bytes=settings.telemetry_buffer_mb * 1024 * 1024,
+    flush_interval=settings.telemetry_flush_ms / 1000.0,
+    segment_bytes=settings.telemetry_segment_mb * 1024 * 1024,
+    max_segments=settings.telemetry_max_segments,
+    fsync=settings.telemetry_fsync,
+)
+metrics.registry.callback(
+    "telemetry_events_total", "Telemetry events accepted into or dropped from the ingest buffer", "counter",
+    lambda: {("accepted",): telemetry_log.accepted, ("dropped",): telemetry_log.dropped},
+    ("outcome",),
+)
+
+
+@app.on_event("shutdown")
+async def _close_telemetry_log():
+    await asyncio.get_running_loop().run_in_executor(None, telemetry_log.close)
+
+
+@app.post("/telemetry", status_code=202)
+async def ingest_telemetry(request: Request):
+    """Accepts JSON: {user_id?: str, events: [object, ...]} and queues the events
+    for the telemetry log. Returns as soon as the batch is buffered; if the
+    buffer is full the batch is dropped with a 503 and Retry-After.
+    """
+    if not settings.telemetry_enabled:
+        raise HTTPException(status_code=404, detail="Telemetry ingestion is disabled")
+    body = await request.body()
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    events = payload.get("events") if isinstance(payload, dict) else None
+    if not isinstance(events, list) or not all(isinstance(e, dict) for e in events):
+        raise HTTPException(status_code=400, detail="events must be a list of objects")
+    if len(events) > settings.telemetry_max_batch_events:
+        raise HTTPException(status_code=413, detail=f"At most {settings.telemetry_max_batch_events} events per batch")
+    common = {"received_at": time.time()}
+    if isinstance(payload.get("user_id"), str):
+        common["user_id"] = payload["user_id"]
+    if not telemetry_log.append(events, len(body), common):
+        raise HTTPException(
+            status_code=503,
+            detail="Telemetry buffer full, retry later",
+            headers={"Retry-After": str(overload_controller.retry_after_seconds)},
+        )
+    return {"accepted": len(events)}
+
+
+# Resumable uploads of large base64 exports, decoded and stored in fixed-size chunks
+_upload_store = ChunkedUploadStore(
+    settings.upload_dir,
+    chunk_size=settings.upload_chunk_kb * 1024,
+    max_bytes=settings.upload_max_mb * 1024 * 1024,
+    cipher=ChunkCipher(settings.encryption_key) if settings.encryption_key else None,
+    ttl_seconds=settings.upload_ttl_hours * 3600,
+)
+
+
+@app.on_event("startup")
+async def _start_upload_sweep():
+    if shared_state.state.worker_index == 0:
+        _upload_store.start()
+
+
+@app.on_event("shutdown")
+async def _stop_upload_sweep():
+    await _upload_store.stop()
+
+
+@app.exception_handler(UploadError)
+async def _upload_error(request: Request, exc: UploadError):
+    headers = {"Upload-Offset": str(exc.offset)} if exc.offset is not None else None
+    return JSONResponse({"detail": str(exc)}, status_code=exc.status_code, headers=headers)
+
+
+@app.post("/uploads", status_code=201)
+async def create_upload(payload: dict):
+    """Accepts JSON: {user_id: str, length?: int} and starts a resumable upload.
+    Send the base64 export with PATCH /uploads/{upload_id} (header Upload-Offset),
+    then POST /uploads/{upload_id}/complete.
+    """
+    user_id = payload.get("user_id")
+    length = payload.get("length")
+    if not user_id or (length is not None and (not isinstance(length, int) or length < 0)):
+        raise HTTPException(status_code=400, detail="user_id required; length must be a non-negative integer")
+    session = await asyncio.get_running_loop().run_in_executor(None, _upload_store.create, user_id, length)
+    return {"upload_id": session.upload_id, "offset": session.offset, "chunk_size": _upload_store.chunk_size}
+
+
+@app.get("/uploads/{upload_id}")
+async def upload_status(upload_id: str):
+    session = await asyncio.get_running_loop().run_in_executor(None, _upload_store.load, upload_id)
+    return JSONResponse(
+        {"offset": session.offset, "length": session.length, "complete": session.complete},
+        headers={"Upload-Offset": str(session.offset)},
+    )
+
+
+@app.patch("/uploads/{upload_id}")
+async def append_upload(upload_id: str, request: Request):
+    """Streams the body (base64 text) onto the upload at the Upload-Offset header."""
+    try:
+        offset = int(request.headers["upload-offset"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Upload-Offset header required")
+    session = await _upload_store.append(upload_id, offset, request.stream())
+    return JSONResponse({"offset": session.offset}, headers={"Upload-Offset": str(session.offset)})
+
+
+@app.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str):
+    """Finishes the upload and makes it the user's personalization export.
+    The profile summary is rebuilt by a training job; until it finishes,
+    /suggest keeps using the previous summary.
+    """
+    session = await _upload_store.complete(upload_id)
+    previous = (_personalization_store.get(session.user_id) or {}).get("artifacts")
+    previous_upload = previous.get("export_upload") if isinstance(previous, dict) else None
+    _personalization_store.put(session.user_id, {"artifacts": {"export_upload": {
+        "upload_id": session.upload_id,
+        "bytes": session.size,
+        "chunks": session.chunks,
+        "encrypted": session.encrypted,
+    }}}, _personalization_store.get_summary(session.user_id))
+    if isinstance(previous_upload, dict) and previous_upload.get("upload_id") != session.upload_id:
+        previous_id = str(previous_upload.get("upload_id"))
+        await asyncio.get_running_loop().run_in_executor(None, _upload_store.delete, previous_id)
+    job, _ = await _enqueue_training(session.user_id)
+    logger.info("Saved personalization upload for %s (%d bytes)", session.user_id, session.size)
+    return {"status": "ok", "upload_id": session.upload_id, "bytes": session.size, "job_id": job["id"]}
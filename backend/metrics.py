@@ -0,0 +1,400 @@
+"""
+In-Process Metrics
+
+This module implements a small Prometheus-compatible metrics registry used by
+the ``/metrics`` endpoint. It has no third-party dependencies.
+
+Hot-path cost is kept to a dict lookup plus an in-place add:
+- label children are created once and cached, so callers that bind a child up
+  front (``counter.labels("suggest")``) update it without allocating
+- histograms use a fixed, preallocated bucket list and ``bisect``
+- metric updates happen on the event loop thread, so no locks are taken
+
+Values owned by other components (in-flight counts, pool saturation, shed
+counts) are registered as callbacks and only read at scrape time.
+
+When the app runs as several workers (backend/launcher.py), counter and
+histogram children are stored in this worker's column of the shared counter
+segment instead, so any worker's /metrics reports totals across all workers.
+Gauges and callbacks stay per worker.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from backend import shared_state
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CallbackValue = Union[float, Dict[Tuple[str, ...], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class CounterChild:
+    """A single labelled counter time series."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class GaugeChild:
+    """A single labelled gauge time series."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class HistogramChild:
+    """A single labelled histogram time series with fixed buckets."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class SharedCounterChild:
+    """A counter time series stored in this worker's shared counter column."""
+
+    __slots__ = ("_storage", "_values", "_slot")
+
+    def __init__(self, storage, key: str):
+        self._storage = storage
+        self._values = storage.local_values
+        self._slot = storage.slot(key)
+
+    def inc(self, amount: float = 1) -> None:
+        self._values[self._slot] += amount
+
+    @property
+    def value(self) -> float:
+        return self._storage.value(self._slot)
+
+
+class SharedHistogramChild:
+    """A histogram time series stored in shared counter slots (buckets, sum, count)."""
+
+    __slots__ = ("bounds", "_storage", "_values", "_slots", "_sum", "_count")
+
+    def __init__(self, bounds: Tuple[float, ...], storage, key: str):
+        self.bounds = bounds
+        self._storage = storage
+        self._values = storage.local_values
+        self._slots = [storage.slot(f"{key}\x1ebucket{i}") for i in range(len(bounds) + 1)]
+        self._sum = storage.slot(f"{key}\x1esum")
+        self._count = storage.slot(f"{key}\x1ecount")
+
+    def observe(self, value: float) -> None:
+        values = self._values
+        values[self._slots[bisect_left(self.bounds, value)]] += 1
+        values[self._sum] += value
+        values[self._count] += 1
+
+    @property
+    def counts(self) -> List[int]:
+        return [int(self._storage.value(slot)) for slot in self._slots]
+
+    @property
+    def sum(self) -> float:
+        return self._storage.value(self._sum)
+
+    @property
+    def count(self) -> int:
+        return int(self._storage.value(self._count))
+
+
+class Metric:
+    """Base class for labelled metric families."""
+
+    metric_type = "untyped"
+    child_class = CounterChild
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), storage=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.storage = storage
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._unlabelled = self.labels()
+
+    def _new_child(self, values: Tuple[str, ...]):
+        return self.child_class()
+
+    def _child_key(self, values: Tuple[str, ...]) -> str:
+        return "\x1f".join((self.name,) + values)
+
+    def labels(self, *values: str):
+        """Return (creating once) the child for the given label values."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child(values)
+        return child
+
+    def _discover_children(self) -> None:
+        """Create local children for label sets first recorded by other workers."""
+        prefix = self.name + "\x1f"
+        for key in self.storage.names(prefix):
+            values = tuple(key[len(prefix):].split("\x1e")[0].split("\x1f"))
+            if len(values) == len(self.labelnames) and values not in self._children:
+                self.labels(*values)
+
+    def render(self) -> List[str]:
+        if self.storage is not None and self.labelnames:
+            self._discover_children()
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+    child_class = CounterChild
+
+    def _new_child(self, values: Tuple[str, ...]):
+        if self.storage is not None:
+            return SharedCounterChild(self.storage, self._child_key(values))
+        return CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._unlabelled.inc(amount)
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    metric_type = "gauge"
+    child_class = GaugeChild
+
+    def set(self, value: float) -> None:
+        self._unlabelled.set(value)
+
+
+class Histogram(Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        storage=None,
+    ):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, storage)
+
+    def _new_child(self, values: Tuple[str, ...]):
+        if self.storage is not None:
+            return SharedHistogramChild(self.bounds, self.storage, self._child_key(values))
+        return HistogramChild(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled.observe(value)
+
+    def _render_child(self, values, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), child.counts):
+            cumulative += count
+            le = 'le="%s"' % _format_value(bound)
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """Metric whose value is read from another component at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: str,
+        callback: Callable[[], CallbackValue],
+        labelnames: Sequence[str] = (),
+    ):
+        self.metric_type = metric_type
+        self.callback = callback
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        value = self.callback()
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        for values, child_value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child_value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metric families rendered in Prometheus text format.
+
+    Args:
+        storage: Optional shared counter storage backing counters and histograms
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames, self.storage))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets, self.storage))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: str,
+        callback: Callable[[], CallbackValue],
+        labelnames: Sequence[str] = (),
+    ) -> CallbackMetric:
+        return self._register(CallbackMetric(name, documentation, metric_type, callback, labelnames))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Application-wide registry and the metrics the backend records
+registry = MetricsRegistry(shared_state.state.counters if shared_state.state.shared else None)
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status")
+)
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("route",)
+)
+provider_requests = registry.counter(
+    "provider_requests_total", "Provider suggestion calls", ("provider",)
+)
+provider_latency = registry.histogram(
+    "provider_request_duration_seconds", "Provider suggestion latency", ("provider",)
+)
+provider_errors = registry.counter(
+    "provider_errors_total", "Provider errors by exception type and retryability",
+    ("provider", "error", "retryable"),
+)
+provider_tokens = registry.counter(
+    "provider_tokens_total", "Tokens reported by provider metadata", ("provider", "kind")
+)
+cache_lookups = registry.counter(
+    "cache_lookups_total", "Cache lookups by cache name and result (hit/miss)", ("cache", "result")
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache hit or miss for the named cache."""
+    cache_lookups.labels(cache, "hit" if hit else "miss").inc()
+
+
+def _usage_value(usage, *names) -> Optional[int]:
+    for name in names:
+        value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        if isinstance(value, (int, float)):
+            return int(value)
+    return None
+
+
+def record_token_usage(provider: str, metadata: Optional[dict]) -> None:
+    """
+    Count prompt/completion tokens from a provider's response metadata.
+
+    Handles the flat ``prompt_tokens``/``response_tokens`` keys used by the
+    Gemini adapter as well as the ``usage`` objects returned by the OpenAI
+    (``prompt_tokens``/``completion_tokens``) and DashScope
+    (``input_tokens``/``output_tokens``) SDKs.
+    """
+    if not metadata:
+        return
+    usage = metadata.get("usage") or metadata
+    prompt = _usage_value(usage, "prompt_tokens", "input_tokens")
+    completion = _usage_value(usage, "completion_tokens", "output_tokens", "response_tokens")
+    if prompt:
+        provider_tokens.labels(provider, "prompt").inc(prompt)
+    if completion:
+        provider_tokens.labels(provider, "completion").inc(completion)
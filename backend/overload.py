@@ -0,0 +1,180 @@
+"""
+Overload Protection
+
+This module implements event-loop-lag based load shedding for the FastAPI app.
+A background task continuously measures how late the event loop wakes up from
+a fixed-interval sleep (scheduling lag) while the HTTP middleware tracks the
+number of in-flight requests. When either signal crosses its configured
+threshold, new requests are either shed early with a 503 + Retry-After or
+downgraded to a cheap local fallback provider, depending on their priority.
+
+Priorities are taken from the X-Request-Priority header:
+- low: first to be shed
+- normal (default): downgraded to the fallback provider, shed when critical
+- high: downgraded only when critical, never shed
+"""
+
+import asyncio
+import logging
+from enum import Enum
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HEADER = "x-request-priority"
+PRIORITIES = ("low", "normal", "high")
+
+
+class Decision(str, Enum):
+    """Admission decision for an incoming request."""
+    ACCEPT = "accept"
+    DEGRADE = "degrade"
+    SHED = "shed"
+
+
+class LoadLevel(str, Enum):
+    """Current load level derived from lag and in-flight signals."""
+    OK = "ok"
+    ELEVATED = "elevated"
+    CRITICAL = "critical"
+
+
+class OverloadController:
+    """
+    Tracks event-loop lag and in-flight requests and decides admission.
+
+    The lag sample is an exponentially weighted moving average so that a single
+    slow tick does not flip the controller, while a sustained backlog does so
+    within a few sample intervals.
+    """
+
+    def __init__(
+        self,
+        lag_threshold_ms: float = 100.0,
+        max_in_flight: int = 256,
+        sample_interval_ms: float = 50.0,
+        retry_after_seconds: int = 1,
+        critical_factor: float = 2.0,
+        smoothing: float = 0.3,
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            lag_threshold_ms: Smoothed loop lag above which the app is elevated
+            max_in_flight: In-flight request count above which the app is elevated
+            sample_interval_ms: How often the lag probe wakes up
+            retry_after_seconds: Value advertised in the Retry-After header
+            critical_factor: Multiple of either threshold that counts as critical
+            smoothing: EWMA weight given to the newest lag sample (0-1]
+        """
+        if lag_threshold_ms <= 0 or max_in_flight < 1 or sample_interval_ms <= 0:
+            raise ValueError("Overload thresholds must be positive")
+        if not 0 < smoothing <= 1:
+            raise ValueError("Smoothing must be in (0, 1]")
+
+        self.lag_threshold_ms = lag_threshold_ms
+        self.max_in_flight = max_in_flight
+        self.sample_interval_ms = sample_interval_ms
+        self.retry_after_seconds = retry_after_seconds
+        self.critical_factor = critical_factor
+        self.smoothing = smoothing
+
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.in_flight = 0
+        self.shed_count = 0
+        self.degraded_count = 0
+        self._task: Optional[asyncio.Task] = None
+
+    # -- lag probe -----------------------------------------------------------
+
+    def record_lag(self, lag_ms: float) -> None:
+        """Fold a new lag sample into the moving average."""
+        lag_ms = max(0.0, lag_ms)
+        self.lag_ms += self.smoothing * (lag_ms - self.lag_ms)
+        if lag_ms > self.max_lag_ms:
+            self.max_lag_ms = lag_ms
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval = self.sample_interval_ms / 1000.0
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            self.record_lag((loop.time() - started - interval) * 1000.0)
+
+    def start(self) -> None:
+        """Start the background lag probe on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._probe())
+
+    async def stop(self) -> None:
+        """Cancel the background lag probe."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # -- admission -----------------------------------------------------------
+
+    def level(self) -> LoadLevel:
+        """Return the current load level."""
+        lag_ratio = self.lag_ms / self.lag_threshold_ms
+        flight_ratio = self.in_flight / self.max_in_flight
+        ratio = max(lag_ratio, flight_ratio)
+        if ratio >= self.critical_factor:
+            return LoadLevel.CRITICAL
+        if ratio >= 1.0:
+            return LoadLevel.ELEVATED
+        return LoadLevel.OK
+
+    def decide(self, priority: str = "normal") -> Decision:
+        """
+        Decide whether to accept, degrade or shed a new request.
+
+        Args:
+            priority: One of "low", "normal" or "high" (unknown values count as normal)
+
+        Returns:
+            The admission decision
+        """
+        level = self.level()
+        if level is LoadLevel.OK:
+            return Decision.ACCEPT
+
+        if priority == "high":
+            decision = Decision.DEGRADE if level is LoadLevel.CRITICAL else Decision.ACCEPT
+        elif priority == "low":
+            decision = Decision.SHED
+        else:
+            decision = Decision.SHED if level is LoadLevel.CRITICAL else Decision.DEGRADE
+
+        if decision is Decision.SHED:
+            self.shed_count += 1
+        elif decision is Decision.DEGRADE:
+            self.degraded_count += 1
+        return decision
+
+    def snapshot(self) -> dict:
+        """Return the controller state for health and debugging endpoints."""
+        return {
+            "level": self.level().value,
+            "lag_ms": round(self.lag_ms, 3),
+            "max_lag_ms": round(self.max_lag_ms, 3),
+            "in_flight": self.in_flight,
+            "shed": self.shed_count,
+            "degraded": self.degraded_count,
+        }
+
+
+def parse_priority(value: Optional[str]) -> str:
+    """Normalize a priority header value, defaulting to "normal"."""
+    if value:
+        value = value.strip().lower()
+        if value in PRIORITIES:
+            return value
+    return "normal"
@@ -0,0 +1,295 @@
+"""
+Personalization Store
+
+This module persists per-user personalization artifacts in an embedded SQLite
+database and serves hot users from a bounded in-memory LRU tier.
+
+SQLite runs in WAL mode, so every worker process can open the same file and
+read while another one writes. Each worker keeps its own LRU of serialized
+records, capped by entry count and total bytes. Writes bump the user's
+version in the shared cache index (see backend/shared_state.py), and a cached
+entry is only served while its version still matches, so a write through one
+worker invalidates the others without any extra messaging. If the shared
+index is full, keys are evicted and their entries are simply reloaded. Missing
+users are cached too, so repeated lookups of unknown ids stay off the disk.
+
+Each row may also carry a short profile summary (see backend/profile_summary.py).
+Summaries have their own hot tier, so ``/suggest`` can fetch one without
+loading or parsing the user's artifacts.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS personalization (
+    user_id TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    summary TEXT
+)
+"""
+
+
+class LruTier:
+    """
+    Versioned LRU of per-user values, bounded by entry count and total size.
+
+    A value is only returned while the version it was stored with is the one
+    asked for, so callers pass the user's current version from the shared
+    cache index and stale entries are never served. Besides this store, the
+    feedback store (backend/feedback.py) and the style index
+    (backend/style_index.py) use it. It is not thread-safe: callers hold
+    their own lock.
+
+    Args:
+        max_entries: Entries kept before the least recently used is evicted
+        max_bytes: Total of the entries' sizes kept; larger values are not cached
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, Tuple[int, Any, int]]" = OrderedDict()
+        self.bytes = 0
+
+    def get(self, key: str, version: int) -> Tuple[bool, Any]:
+        """Return (hit, value); a miss when absent or stored under another version."""
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != version:
+            return False, None
+        self.entries.move_to_end(key)
+        return True, entry[1]
+
+    def discard(self, key: str) -> None:
+        """Drop the entry for ``key``, if any."""
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+
+    def put(self, key: str, version: int, value: Any, size: int) -> None:
+        """Store ``value`` at ``version``, counting ``size`` bytes, and evict to stay within bounds."""
+        self.discard(key)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (version, value, size)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, _, evicted) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+
+
+class PersonalizationStore:
+    """
+    SQLite-backed artifact store with an in-memory LRU hot tier.
+
+    Args:
+        path: SQLite database file (created on first use), or ":memory:"
+        max_entries: Users kept in the hot tier
+        max_bytes: Total size of serialized records kept in the hot tier
+        versions: Version index used to invalidate other workers' hot tiers
+            (``shared_state.state.cache_index``); None for a single process
+        on_lookup: Optional hook called with True/False for hot-tier hits/misses
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        versions=None,
+        on_lookup: Optional[Callable[[bool], None]] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._versions = versions
+        self._on_lookup = on_lookup
+        self._hot = LruTier(max_entries, max_bytes)
+        self._summaries = LruTier(max_entries, max_bytes // 8)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and self.path != ":memory:":
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(personalization)")}
+            if "summary" not in columns:  # databases created before summaries existed
+                conn.execute("ALTER TABLE personalization ADD COLUMN summary TEXT")
+            self._conn = conn
+        return self._conn
+
+    def _version(self, user_id: str) -> int:
+        return self._versions.version("personalization:" + user_id) if self._versions is not None else 0
+
+    def _bump(self, user_id: str) -> int:
+        return self._versions.bump("personalization:" + user_id) if self._versions is not None else 0
+
+    def _lookup(self, tier: LruTier, user_id: str, column: str) -> Any:
+        """Read ``column`` for the user through ``tier``; returns the cached value."""
+        version = self._version(user_id)
+        with self._lock:
+            hit, value = tier.get(user_id, version)
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+                if version == 0:
+                    # Give the key a real version before reading: a full shared
+                    # index evicts keys back to 0, and an entry cached under 0
+                    # could then look current after a write it never saw
+                    version = self._bump(user_id)
+                row = self._connection().execute(
+                    f"SELECT {column} FROM personalization WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                value = row[0] if row else None
+                if isinstance(value, memoryview):
+                    value = bytes(value)
+                tier.put(user_id, version, value, len(value) if value is not None else 0)
+        if self._on_lookup is not None:
+            self._on_lookup(hit)
+        return value
+
+    def peek_summary(self, user_id: str) -> Tuple[bool, Optional[str]]:
+        """
+        Return (True, summary) if the user's summary is in the hot tier and
+        current, else (False, None) without touching the database.
+
+        Lets async callers serve hits inline and send only misses to
+        ``get_summary`` in an executor.
+        """
+        version = self._version(user_id)
+        with self._lock:
+            hit, value = self._summaries.get(user_id, version)
+            if hit:
+                self.hits += 1
+        if hit and self._on_lookup is not None:
+            self._on_lookup(True)
+        return hit, value
+
+    def get_json(self, user_id: str) -> Optional[bytes]:
+        """
+        Return the user's record as JSON bytes.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            The serialized record, or None if the user has none
+        """
+        return self._lookup(self._hot, user_id, "data")
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Return the user's record, or None if the user has none."""
+        data = self.get_json(user_id)
+        return json.loads(data) if data is not None else None
+
+    def get_summary(self, user_id: str) -> Optional[str]:
+        """
+        Return the user's profile summary, as stored by ``put``.
+
+        This is the per-request lookup on ``/suggest``: hot users cost one
+        version check and one dict lookup.
+        """
+        return self._lookup(self._summaries, user_id, "summary")
+
+    def put(self, user_id: str, record: Dict[str, Any], summary: Optional[str] = None) -> None:
+        """
+        Store (or replace) the user's record.
+
+        Args:
+            user_id: User identifier
+            record: JSON-serializable record
+            summary: Precomputed profile summary stored in the same row
+        """
+        data = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode()
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO personalization (user_id, data, updated_at, summary) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at, "
+                "summary = excluded.summary",
+                (user_id, data, time.time(), summary),
+            )
+            # Bump only after the commit, so other workers reload the new row
+            version = self._bump(user_id)
+            self._hot.put(user_id, version, data, len(data))
+            self._summaries.put(user_id, version, summary, len(summary) if summary else 0)
+
+    def updated_at(self, user_id: str) -> Optional[float]:
+        """Return when the user's record was last written, or None."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT updated_at FROM personalization WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_summary(self, user_id: str, summary: Optional[str], updated_at: Optional[float] = None) -> bool:
+        """
+        Replace only the user's profile summary.
+
+        Args:
+            user_id: User identifier
+            summary: New summary
+            updated_at: If given, only update while the record is still the
+                one written at this time, so a summary derived from older
+                artifacts never overwrites a newer upload's
+
+        Returns:
+            True if the summary was stored
+        """
+        with self._lock:
+            updated = self._connection().execute(
+                "UPDATE personalization SET summary = ? WHERE user_id = ? AND (? IS NULL OR updated_at = ?)",
+                (summary, user_id, updated_at, updated_at),
+            ).rowcount > 0
+            if updated:
+                version = self._bump(user_id)
+                self._summaries.put(user_id, version, summary, len(summary) if summary else 0)
+        return updated
+
+    def delete(self, user_id: str) -> bool:
+        """
+        Remove the user's record.
+
+        Returns:
+            True if a record was deleted
+        """
+        with self._lock:
+            deleted = self._connection().execute(
+                "DELETE FROM personalization WHERE user_id = ?", (user_id,)
+            ).rowcount > 0
+            version = self._bump(user_id)
+            self._hot.put(user_id, version, None, 0)
+            self._summaries.put(user_id, version, None, 0)
+        return deleted
+
+    def close(self) -> None:
+        """Close the database connection; the store reopens it on next use."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Hot-tier occupancy and hit counts, for /health."""
+        return {
+            "hot_entries": len(self._hot.entries),
+            "hot_bytes": self._hot.bytes,
+            "summary_entries": len(self._summaries.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
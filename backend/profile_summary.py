@@ -0,0 +1,196 @@
+"""
+User Profile Summaries
+
+This module condenses a user's uploaded personalization examples into a short
+description of how they write, for ``SuggestRequest.user_profile_summary``.
+
+The summary is derived once, when artifacts are uploaded, and stored next to
+them (see backend/personalization_store.py), so prompts get personalized
+without any per-request work beyond a cache lookup. It covers:
+
+- style: typical reply length, capitalization and punctuation habits
+- emoji habits: how often emoji are used and which ones
+- frequent phrases: word sequences the user repeats across messages
+
+Only the user's own replies are analysed, and nothing is derived from an
+export that was made without consent.
+"""
+
+import base64
+import binascii
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MAX_SUMMARY_CHARS = 320
+MAX_MESSAGES = 5000
+
+_EMOJI = re.compile(
+    "[\U0001F1E6-\U0001F1FF\U0001F300-\U0001F5FF\U0001F600-\U0001F64F\U0001F680-\U0001F6FF"
+    "\U0001F900-\U0001F9FF\U0001FA70-\U0001FAFF☀-➿]"
+)
+_WORD = re.compile(r"[a-z0-9']+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from i if in is it me my of on or so that the this to was we you".split()
+)
+
+
+def _decode_export(export: Any) -> Optional[Dict[str, Any]]:
+    """Parse an export: JSON, or base64 of JSON (as produced by the Android app)."""
+    if isinstance(export, dict):
+        return export
+    if isinstance(export, (bytes, bytearray)):
+        raw = bytes(export)
+    elif isinstance(export, str):
+        try:
+            raw = base64.b64decode(export, validate=True)
+        except (binascii.Error, ValueError):
+            raw = export.encode()
+    else:
+        return None
+    try:
+        data = json.loads(raw)
+    except (UnicodeDecodeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _pairs_from_examples(examples: Any) -> List[Tuple[Optional[str], str]]:
+    pairs = []
+    for example in examples if isinstance(examples, list) else []:
+        context = None
+        if isinstance(example, dict):
+            context = example.get("context")
+            example = example.get("response")
+        if isinstance(example, str) and example.strip():
+            context = context.strip() if isinstance(context, str) and context.strip() else None
+            pairs.append((context, example.strip()))
+    return pairs
+
+
+def extract_examples(artifacts: Any) -> List[Tuple[Optional[str], str]]:
+    """
+    Collect the user's own replies, with the message each one answered.
+
+    Understands the Android export (``{"export": <base64 JSON>}`` holding
+    ``{"consent", "examples": [{"context", "response"}]}``) as well as plain
+    ``examples`` and ``messages`` lists.
+
+    Args:
+        artifacts: The ``artifacts`` value from an upload, or a decoded export
+
+    Returns:
+        (context, reply) pairs, most recent last; context is None when
+        unknown. Empty without consent.
+    """
+    if isinstance(artifacts, dict) and "export" in artifacts:
+        artifacts = _decode_export(artifacts["export"])
+    elif isinstance(artifacts, (str, bytes, bytearray)):
+        artifacts = _decode_export(artifacts)
+    if not isinstance(artifacts, dict) or artifacts.get("consent") is False:
+        return []
+    pairs = _pairs_from_examples(artifacts.get("examples"))
+    pairs += [(None, m.strip()) for m in artifacts.get("messages") or [] if isinstance(m, str) and m.strip()]
+    return pairs[-MAX_MESSAGES:]
+
+
+def extract_messages(artifacts: Any) -> List[str]:
+    """
+    Collect the user's own messages from uploaded artifacts.
+
+    Args:
+        artifacts: As for ``extract_examples``
+
+    Returns:
+        Messages written by the user, most recent last; empty without consent
+    """
+    return [reply for _, reply in extract_examples(artifacts)]
+
+
+def _frequent_phrases(messages: List[List[str]], limit: int = 4) -> List[str]:
+    counts: Counter = Counter()
+    for words in messages:
+        seen = set()
+        for n in (4, 3, 2):
+            for i in range(len(words) - n + 1):
+                gram = tuple(words[i:i + n])
+                if gram not in seen and not all(w in _STOPWORDS for w in gram):
+                    seen.add(gram)
+                    counts[gram] += 1
+    phrases: List[tuple] = []
+    for gram, count in sorted(counts.items(), key=lambda item: (-item[1], -len(item[0]))):
+        if count < 2 or len(phrases) == limit:
+            break
+        # Skip pieces of an already chosen, equally frequent longer phrase
+        if any(count <= counts[p] and " ".join(gram) in " ".join(p) for p in phrases):
+            continue
+        phrases.append(gram)
+    return [" ".join(p) for p in phrases]
+
+
+def style_features(messages: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """
+    Measure writing-style features over the user's messages.
+
+    Returns:
+        Feature dict, or None if there are no messages
+    """
+    messages = [m for m in messages if m]
+    if not messages:
+        return None
+    total = len(messages)
+    tokens = [_WORD.findall(m.lower()) for m in messages]
+    emoji = [_EMOJI.findall(m) for m in messages]
+    letters = [m for m in messages if m[0].isalpha()]
+    return {
+        "messages": total,
+        "avg_words": sum(len(t) for t in tokens) / total,
+        "lowercase_start": sum(m[0].islower() for m in letters) / len(letters) if letters else 0.0,
+        "exclamation": sum("!" in m for m in messages) / total,
+        "question": sum("?" in m for m in messages) / total,
+        "ellipsis": sum("..." in m or "…" in m for m in messages) / total,
+        "no_end_punctuation": sum(_EMOJI.sub("", m).rstrip()[-1:].isalnum() for m in messages) / total,
+        "emoji_rate": sum(bool(e) for e in emoji) / total,
+        "top_emoji": [e for e, _ in Counter(e for found in emoji for e in found).most_common(3)],
+        "phrases": _frequent_phrases(tokens),
+    }
+
+
+def format_summary(features: Dict[str, Any]) -> str:
+    """Render style features as a compact, prompt-ready sentence."""
+    words = features["avg_words"]
+    length = "very short" if words <= 4 else "short" if words <= 10 else "medium-length" if words <= 25 else "long"
+    parts = [f"writes {length} replies (~{words:.0f} words)"]
+    if features["lowercase_start"] >= 0.6:
+        parts.append("usually starts lowercase")
+    if features["no_end_punctuation"] >= 0.6:
+        parts.append("often skips ending punctuation")
+    if features["exclamation"] >= 0.3:
+        parts.append("uses exclamation marks a lot")
+    if features["ellipsis"] >= 0.2:
+        parts.append("trails off with ellipses")
+    if features["emoji_rate"] >= 0.1:
+        parts.append(f"uses emoji in {features['emoji_rate']:.0%} of messages ({' '.join(features['top_emoji'])})")
+    elif features["messages"] >= 5:
+        parts.append("rarely uses emoji")
+    summary = "User " + ", ".join(parts) + "."
+    if features["phrases"]:
+        summary += " Frequent phrases: " + ", ".join(f'"{p}"' for p in features["phrases"]) + "."
+    if len(summary) > MAX_SUMMARY_CHARS:
+        summary = summary[:MAX_SUMMARY_CHARS - 1].rsplit(" ", 1)[0] + "…"
+    return summary
+
+
+def summarize_artifacts(artifacts: Any) -> Optional[str]:
+    """
+    Derive the profile summary for uploaded artifacts.
+
+    Args:
+        artifacts: Upload artifacts or a raw export (see ``extract_messages``)
+
+    Returns:
+        Summary text, or None if the artifacts hold no usable messages
+    """
+    features = style_features(extract_messages(artifacts))
+    return format_summary(features) if features else None
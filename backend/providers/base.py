@@ -5,10 +5,45 @@ This module defines the base interface for AI provider adapters used by the Repl
 All provider implementations must inherit from BaseProvider and implement the suggest() method.
 """
 
+import asyncio
+import math
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, TypeVar
 from pydantic import BaseModel
 
+T = TypeVar("T")
+
+# Optional hook the application sets to collect per-stage timings. Called with
+# (stage_name, start, end) as time.perf_counter() values; see backend/tracing.py.
+stage_recorder: Optional[Callable[[str, float, float], None]] = None
+
+# Replies adapters return when they cannot parse the model output at all
+PARSE_FALLBACK = (
+    "Thanks for your message!",
+    "I appreciate the update.",
+    "That sounds interesting.",
+)
+
+
+class _StageTimer:
+    """Context manager reporting a stage's duration to ``stage_recorder``."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if stage_recorder is not None:
+            stage_recorder(self.name, self.start, time.perf_counter())
+        return False
+
 
 class SuggestRequest(BaseModel):
     """Request model for suggestion generation."""
@@ -17,6 +52,8 @@ class SuggestRequest(BaseModel):
     modes: List[str]  # e.g., ["casual", "formal", "witty"]
     intensity: int  # 0-10 scale
     user_profile_summary: Optional[str] = None
+    style_examples: Optional[List[str]] = None  # the user's own past replies to similar messages
+    num_suggestions: int = 3  # more than 3 when the caller reranks an over-generated pool
 
 
 class SuggestionItem(BaseModel):
@@ -38,6 +75,60 @@ class ProviderConfig(BaseModel):
     temperature: Optional[float] = None
     max_tokens: Optional[int] = None
     timeout_seconds: Optional[int] = None
+    pool_connections: Optional[int] = None
+    keepalive_seconds: Optional[float] = None
+    use_shared_transport: bool = False  # call the REST API via providers/transport.py
+
+
+class ProviderExecutor:
+    """
+    Shared thread pool for the blocking SDK calls made by provider adapters.
+
+    Keeps synchronous network calls off the event loop and tracks how many
+    calls are in flight so pool saturation can be reported. Counters are only
+    touched from the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, max_workers: int = 32):
+        self.max_workers = max_workers
+        self.in_flight = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="provider")
+
+    @property
+    def queued(self) -> int:
+        """Number of calls waiting for a free worker thread."""
+        return max(0, self.in_flight - self.max_workers)
+
+    @property
+    def saturation(self) -> float:
+        """Fraction of worker threads currently busy (0.0 - 1.0)."""
+        return min(self.in_flight, self.max_workers) / self.max_workers
+
+    async def run(self, fn: Callable[[], T]) -> T:
+        """
+        Run a blocking callable on the pool and await its result.
+
+        Reports two stages to ``stage_recorder``: "executor_wait" (time queued
+        for a worker thread) and "provider_call" (time spent in the call).
+        """
+        submitted = time.perf_counter()
+        started = []
+
+        def call() -> T:
+            started.append(time.perf_counter())
+            return fn()
+
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, call)
+        finally:
+            self.in_flight -= 1
+            if stage_recorder is not None and started:
+                stage_recorder("executor_wait", submitted, started[0])
+                stage_recorder("provider_call", started[0], time.perf_counter())
+
+
+provider_executor = ProviderExecutor()
 
 
 class BaseProvider(ABC):
@@ -103,6 +194,103 @@ class BaseProvider(ABC):
         """
         pass
 
+    def _style_order(self, request: SuggestRequest) -> str:
+        """
+        Prompt line asking the model to cycle through the requested modes.
+
+        Adapters label parsed suggestions with ``_as_items`` in the same
+        order, so each suggestion's tone matches the mode it was written in.
+        """
+        if len(request.modes) < 2:
+            return ""
+        return "\nCycle through these styles in order, one suggestion each: " + ", ".join(request.modes)
+
+    def _profile_text(self, request: SuggestRequest) -> str:
+        """
+        Prompt lines asking the model to match the user's own writing style.
+
+        Adds the profile summary (with any feedback note) and the user's past
+        replies to similar messages, when the request carries them.
+        """
+        text = f"\nUser writing style: {request.user_profile_summary}" if request.user_profile_summary else ""
+        if request.style_examples:
+            text += "\nReplies the user wrote to similar messages (match their voice, not their content):\n"
+            text += "\n".join(f'- "{example}"' for example in request.style_examples)
+        return text
+
+    def _as_items(self, texts: List[str], request: SuggestRequest) -> List[SuggestionItem]:
+        """
+        Wrap parsed suggestion texts, labelling tones round-robin over the requested modes.
+
+        Args:
+            texts: Suggestions in the order the model produced them
+            request: The request the suggestions answer
+
+        Returns:
+            One SuggestionItem per text
+        """
+        tones = [mode.lower() for mode in request.modes] or ["neutral"]
+        return [SuggestionItem(text=str(text), tone=tones[i % len(tones)]) for i, text in enumerate(texts)]
+
+    def _max_tokens(self, request: SuggestRequest, limit: int) -> int:
+        """
+        Output-token limit for a request.
+
+        ``config.max_tokens`` is sized for the default 3 suggestions; requests
+        for an over-generated pool get proportionally more, so the list is not
+        cut off mid-suggestion (which breaks JSON parsing).
+
+        Args:
+            request: The request being answered
+            limit: The model's (or adapter's) largest allowed value
+
+        Returns:
+            Tokens to allow for the response
+        """
+        scaled = math.ceil(self.config.max_tokens * request.num_suggestions / 3)
+        return min(limit, max(self.config.max_tokens, scaled))
+
+    def _stage(self, name: str) -> _StageTimer:
+        """
+        Time a named stage of suggestion generation (e.g. prompt building).
+
+        Args:
+            name: Stage name reported in traces and Server-Timing headers
+
+        Returns:
+            Context manager wrapping the stage
+        """
+        return _StageTimer(name)
+
+    async def _run_blocking(self, fn: Callable[[], T]) -> T:
+        """
+        Run a blocking SDK call on the shared provider executor.
+
+        Args:
+            fn: Zero-argument callable performing the synchronous call
+
+        Returns:
+            The callable's return value
+        """
+        return await provider_executor.run(fn)
+
+    async def warm_connections(self, count: int) -> Optional[int]:
+        """
+        Open (or refresh) keep-alive connections to the provider's API.
+
+        Called at startup and periodically afterwards so requests reuse an
+        established connection instead of paying for DNS, TCP and TLS setup.
+        Adapters without a reusable connection pool keep this default.
+
+        Args:
+            count: Number of connections to hold open
+
+        Returns:
+            Number of connections known to be warm, or None if the adapter
+            has no pool to warm
+        """
+        return None
+
     def is_available(self) -> bool:
         """
         Check if this provider is currently available for use.
@@ -0,0 +1,56 @@
+"""
+Canned Replies Provider
+
+A local provider answering from a fixed set of short, message-independent
+replies per mode. ``/suggest`` uses it to fill the gaps left when
+near-duplicates or unsafe suggestions are dropped (``DIVERSITY_FALLBACK_PROVIDER``),
+so the fill-in costs no model call and never repeats the incoming message
+back to the user.
+
+Replies are neutral acknowledgements that fit most messages. The starting
+reply of each mode rotates with a hash of the context, so the fill-in varies
+between messages but stays the same for a given one.
+"""
+
+import zlib
+from typing import Dict, List, Tuple
+
+from .base import BaseProvider, SuggestRequest, SuggestResponse, SuggestionItem
+
+CANNED_REPLIES: Dict[str, Tuple[str, ...]] = {
+    "casual": ("Got it!", "Okay, sounds good", "Cool, thanks for letting me know", "Sure thing 👍"),
+    "formal": (
+        "Thank you, noted.", "Understood, thank you for letting me know.", "Noted. I will get back to you shortly.",
+    ),
+    "witty": ("Message received, loud and clear 📡", "Say no more!", "Consider it noted ✨"),
+}
+_NEUTRAL = ("Okay!", "Thanks for letting me know", "Got it, thanks")
+
+
+class CannedProvider(BaseProvider):
+    """Provider returning canned replies, cycling through the requested modes."""
+
+    def _validate_config(self) -> None:
+        pass
+
+    async def suggest(self, request: SuggestRequest) -> SuggestResponse:
+        modes = list(dict.fromkeys(mode.lower() for mode in request.modes)) or ["neutral"]
+        offset = zlib.crc32(request.context.encode())
+        rotated = {}
+        for mode in modes:
+            replies = CANNED_REPLIES.get(mode, _NEUTRAL)
+            start = offset % len(replies)
+            rotated[mode] = replies[start:] + replies[:start]
+        suggestions: List[SuggestionItem] = []
+        for turn in range(max(len(replies) for replies in rotated.values())):
+            for mode in modes:
+                if turn < len(rotated[mode]) and len(suggestions) < request.num_suggestions:
+                    tone = mode if mode in CANNED_REPLIES else "neutral"
+                    suggestions.append(SuggestionItem(text=rotated[mode][turn], tone=tone))
+        return SuggestResponse(suggestions=suggestions, metadata={"provider": "canned"})
+
+    def get_provider_name(self) -> str:
+        return "Canned Replies"
+
+    def get_cost_estimate(self, request: SuggestRequest) -> float:
+        return 0.0
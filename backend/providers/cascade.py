@@ -0,0 +1,193 @@
+"""
+Model Cascade
+
+Each adapter pins one model. A cascade chains adapters from the smallest and
+fastest model to the largest: a request goes to the first tier, the answer is
+assessed with cheap checks, and the request moves on to the next tier only
+when the checks fail or the tier errors. Most short casual messages never
+reach the large model.
+
+A tier's answer is usable when at least ``min_usable`` of its suggestions pass
+all of these checks:
+
+- the adapter parsed the model output (no canned ``PARSE_FALLBACK`` replies)
+- the text is non-empty and at most ``max_chars`` long
+- it is not a duplicate of an earlier suggestion, ignoring case, spacing and
+  punctuation
+- the ``accept`` check, if any, lets it through; by default that is the
+  module's ``suggestion_check`` hook, which the application points at its
+  safety filter
+
+Otherwise the most common failure (``error``, ``parse``, ``length``,
+``duplicates`` or ``unsafe``) is recorded as the escalation reason. The last
+tier's answer is returned whatever it looks like.
+
+``snapshot()`` reports, per tier, how many requests it answered and why it
+escalated, with the latency and cost saved compared with sending every request
+to the last tier: its mean observed latency and its own cost estimate.
+"""
+
+import re
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .base import (
+    PARSE_FALLBACK, BaseProvider, ProviderConfig, ProviderError, SuggestRequest, SuggestResponse, SuggestionItem,
+)
+
+_NOT_WORD = re.compile(r"\W+")
+
+# Optional hook the application sets to vet suggestion texts (False = unsafe)
+suggestion_check: Optional[Callable[[str], bool]] = None
+
+
+class TierStats:
+    """Counters of one cascade tier. Only touched from the event loop thread."""
+
+    __slots__ = ("attempts", "served", "escalations", "latency_seconds", "cost")
+
+    def __init__(self):
+        self.attempts = 0
+        self.served = 0
+        self.escalations: Counter = Counter()
+        self.latency_seconds = 0.0
+        self.cost = 0.0
+
+
+class CascadeProvider(BaseProvider):
+    """
+    Provider trying a list of tiers in order until one gives a usable answer.
+
+    Args:
+        tiers: (label, adapter) pairs, smallest model first; labels are
+            reported in metrics and response metadata (e.g. "gemini:gemini-1.5-flash-8b")
+        accept: Check on a suggestion's text, False counting it as unsafe;
+            ``suggestion_check`` when not given
+        min_usable: Usable suggestions needed to stop at a tier
+        max_chars: Longest usable suggestion
+        clock: Time source (seconds), replaceable in tests
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[Tuple[str, BaseProvider]],
+        accept: Optional[Callable[[str], bool]] = None,
+        min_usable: int = 3,
+        max_chars: int = 100,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.tiers = list(tiers)
+        self.accept = accept
+        self.min_usable = min_usable
+        self.max_chars = max_chars
+        self._clock = clock
+        self.stats: Dict[str, TierStats] = {label: TierStats() for label, _ in self.tiers}
+        self.requests = 0
+        self.baseline_cost = 0.0
+        super().__init__(ProviderConfig())
+
+    def _validate_config(self) -> None:
+        if not self.tiers:
+            raise ValueError("A cascade needs at least one tier")
+
+    def assess(self, suggestions: Sequence[SuggestionItem], wanted: Optional[int] = None) -> Optional[str]:
+        """
+        Check a tier's answer.
+
+        Args:
+            suggestions: The tier's suggestions
+            wanted: Suggestions the request asked for, if fewer than ``min_usable``
+
+        Returns:
+            None if it is usable, else the escalation reason
+        """
+        accept = self.accept if self.accept is not None else suggestion_check
+        texts = [s.text for s in suggestions]
+        if not texts or tuple(texts[:len(PARSE_FALLBACK)]) == PARSE_FALLBACK:
+            return "parse"
+        problems: Counter = Counter()
+        seen = set()
+        usable = 0
+        for text in texts:
+            key = _NOT_WORD.sub(" ", text.lower()).strip()
+            if not key or len(text) > self.max_chars:
+                problems["length"] += 1
+            elif key in seen:
+                problems["duplicates"] += 1
+            elif accept is not None and not accept(text):
+                problems["unsafe"] += 1
+            else:
+                usable += 1
+            seen.add(key)
+        if usable >= max(1, min(self.min_usable, wanted or self.min_usable)):
+            return None
+        return problems.most_common(1)[0][0] if problems else "parse"
+
+    async def suggest(self, request: SuggestRequest) -> SuggestResponse:
+        """Answer from the first tier whose output passes ``assess``."""
+        self.requests += 1
+        self.baseline_cost += self.tiers[-1][1].get_cost_estimate(request)
+        escalations: List[Dict[str, str]] = []
+        for i, (label, provider) in enumerate(self.tiers):
+            stats = self.stats[label]
+            stats.attempts += 1
+            stats.cost += provider.get_cost_estimate(request)
+            started = self._clock()
+            try:
+                response = await provider.suggest(request)
+            except ProviderError:
+                stats.latency_seconds += self._clock() - started
+                if i == len(self.tiers) - 1:
+                    raise
+                stats.escalations["error"] += 1
+                escalations.append({"tier": label, "reason": "error"})
+                continue
+            stats.latency_seconds += self._clock() - started
+            reason = self.assess(response.suggestions, request.num_suggestions)
+            if reason is None or i == len(self.tiers) - 1:
+                stats.served += 1
+                response.metadata = {**(response.metadata or {}), "cascade_tier": label}
+                if escalations:
+                    response.metadata["cascade_escalations"] = escalations
+                return response
+            stats.escalations[reason] += 1
+            escalations.append({"tier": label, "reason": reason})
+        raise AssertionError("unreachable")
+
+    def snapshot(self) -> Dict[str, object]:
+        """Per-tier hit rates and escalation reasons, and the savings against the last tier alone."""
+        last = self.stats[self.tiers[-1][0]]
+        latency = sum(s.latency_seconds for s in self.stats.values())
+        cost = sum(s.cost for s in self.stats.values())
+        baseline_latency = last.latency_seconds / last.attempts * self.requests if last.attempts else None
+        return {
+            "requests": self.requests,
+            "tiers": [
+                {
+                    "tier": label,
+                    "attempts": s.attempts,
+                    "served": s.served,
+                    "hit_rate": s.served / self.requests if self.requests else 0.0,
+                    "escalations": dict(s.escalations),
+                    "mean_latency_ms": s.latency_seconds / s.attempts * 1000.0 if s.attempts else None,
+                    "cost_usd": s.cost,
+                }
+                for label, s in self.stats.items()
+            ],
+            "latency_saved_ms": (baseline_latency - latency) * 1000.0 if baseline_latency is not None else None,
+            "cost_saved_usd": self.baseline_cost - cost,
+        }
+
+    async def warm_connections(self, count: int) -> Optional[int]:
+        """Warm every tier's connections; returns the total, or None if no tier has a pool."""
+        warm = [await provider.warm_connections(count) for _, provider in self.tiers]
+        known = [w for w in warm if w is not None]
+        return sum(known) if known else None
+
+    def get_provider_name(self) -> str:
+        return "Cascade (" + " -> ".join(label for label, _ in self.tiers) + ")"
+
+    def get_cost_estimate(self, request: SuggestRequest) -> float:
+        """Cost of the first tier, which answers most requests."""
+        return self.tiers[0][1].get_cost_estimate(request)
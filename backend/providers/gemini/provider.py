@@ -17,12 +17,15 @@ Cost Estimate:
 """
 
 import os
-import asyncio
 from typing import List, Dict, Any
 import google.generativeai as genai
 from google.generativeai.types import RequestOptions
 
 from ..base import BaseProvider, SuggestRequest, SuggestResponse, ProviderConfig, ProviderError, ProviderAuthError
+from ..timeouts import adaptive_timeouts
+from ..transport import http_transport
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
 
 
 class GeminiProvider(BaseProvider):
@@ -50,6 +53,14 @@ class GeminiProvider(BaseProvider):
         if not api_key:
             raise ProviderAuthError("gemini", "GEMINI_API_KEY environment variable not set")
 
+        self.api_key = api_key
+        if config.use_shared_transport:
+            # Call the REST API directly through the shared async transport
+            self.transport = http_transport
+            self.model = None
+            return
+
+        self.transport = None
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(config.model_name)
 
@@ -64,6 +75,18 @@ class GeminiProvider(BaseProvider):
         if self.config.max_tokens < 1 or self.config.max_tokens > 8192:
             raise ValueError("Max tokens must be between 1 and 8192")
 
+    async def warm_connections(self, count: int) -> int:
+        """
+        Open the client's channel with a cheap model metadata lookup.
+
+        The SDK multiplexes every call over a single HTTP/2 channel, so one
+        connection is warm regardless of ``count``.
+        """
+        if self.transport is not None:
+            return await self.transport.warm(GEMINI_BASE_URL, count)
+        await self._run_blocking(lambda: genai.get_model(f"models/{self.config.model_name}"))
+        return 1
+
     async def suggest(self, request: SuggestRequest) -> SuggestResponse:
         """
         Generate reply suggestions using Google Gemini.
@@ -76,44 +99,74 @@ class GeminiProvider(BaseProvider):
         """
         try:
             # Build the prompt based on request parameters
-            prompt = self._build_prompt(request)
-
-            # Configure generation parameters
-            generation_config = genai.types.GenerationConfig(
-                temperature=self.config.temperature,
-                max_output_tokens=self.config.max_tokens,
-                top_p=0.9,
-                top_k=40,
-            )
-
-            # Generate response
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.model.generate_content(
-                    prompt,
-                    generation_config=generation_config,
-                    request_options=RequestOptions(timeout=self.config.timeout_seconds)
+            with self._stage("build_prompt"):
+                prompt = self._build_prompt(request)
+            max_tokens = self._max_tokens(request, 8192)
+
+            # Timeout from recent Gemini latencies, capped by the request budget
+            call = adaptive_timeouts.call("gemini", self.config.model_name, self.config.timeout_seconds)
+            if self.transport is not None:
+                data = await call.run(self.transport.post_json(
+                    "gemini",
+                    f"{GEMINI_BASE_URL}/models/{self.config.model_name}:generateContent",
+                    {
+                        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                        "generationConfig": {
+                            "temperature": self.config.temperature,
+                            "maxOutputTokens": max_tokens,
+                            "topP": 0.9,
+                            "topK": 40,
+                        },
+                    },
+                    headers={"x-goog-api-key": self.api_key},
+                    timeout=call.seconds,
+                ))
+                text = "".join(part.get("text", "") for part in data["candidates"][0]["content"]["parts"])
+                usage = data.get("usageMetadata", {})
+                prompt_tokens = usage.get("promptTokenCount")
+                response_tokens = usage.get("candidatesTokenCount")
+            else:
+                # Configure generation parameters
+                generation_config = genai.types.GenerationConfig(
+                    temperature=self.config.temperature,
+                    max_output_tokens=max_tokens,
+                    top_p=0.9,
+                    top_k=40,
                 )
-            )
+
+                # Generate response
+                response = await call.run(self._run_blocking(
+                    lambda: self.model.generate_content(
+                        prompt,
+                        generation_config=generation_config,
+                        request_options=RequestOptions(timeout=call.seconds)
+                    )
+                ))
+                text = response.text
+                prompt_tokens = getattr(response.usage_metadata, 'prompt_token_count', None)
+                response_tokens = getattr(response.usage_metadata, 'candidates_token_count', None)
 
             # Extract suggestions from response
-            suggestions = self._parse_response(response.text)
+            with self._stage("parse_response"):
+                suggestions = self._parse_response(text, request.num_suggestions)
 
             # Build metadata
             metadata = {
                 "provider": "gemini",
                 "model": self.config.model_name,
                 "temperature": self.config.temperature,
-                "max_tokens": self.config.max_tokens,
-                "prompt_tokens": getattr(response.usage_metadata, 'prompt_token_count', None),
-                "response_tokens": getattr(response.usage_metadata, 'candidates_token_count', None),
+                "max_tokens": max_tokens,
+                "prompt_tokens": prompt_tokens,
+                "response_tokens": response_tokens,
             }
 
             return SuggestResponse(
-                suggestions=suggestions,
+                suggestions=self._as_items(suggestions, request),
                 metadata=metadata
             )
 
+        except ProviderError:
+            raise
         except Exception as e:
             # Handle Gemini-specific errors
             if "API_KEY" in str(e):
@@ -154,17 +207,17 @@ class GeminiProvider(BaseProvider):
             intensity_instruction = "Use balanced, appropriate suggestions"
 
         # Build the complete prompt
-        prompt = f"""Generate 3 reply suggestions for the following message context.
+        prompt = f"""Generate {request.num_suggestions} reply suggestions for the following message context.
 
 Context: "{request.context}"
 
 Style instructions: {style_text}
-Intensity guidance: {intensity_instruction}
+Intensity guidance: {intensity_instruction}{self._style_order(request)}{self._profile_text(request)}
 
 Requirements:
 - Each suggestion should be a complete, natural reply
 - Suggestions should be appropriate for the context
-- Provide exactly 3 suggestions, one per line
+- Provide exactly {request.num_suggestions} suggestions, one per line
 - Keep each suggestion under 100 characters
 - Format: Just the suggestions, no numbering or extra text
 
@@ -172,15 +225,16 @@ Suggestions:"""
 
         return prompt
 
-    def _parse_response(self, response_text: str) -> List[str]:
+    def _parse_response(self, response_text: str, limit: int = 3) -> List[str]:
         """
         Parse the Gemini response into a list of suggestions.
 
         Args:
             response_text: Raw response from Gemini
+            limit: Number of suggestions requested
 
         Returns:
-            List of suggestion strings
+            List of suggestion strings (at most ``limit``)
         """
         # Split by newlines and clean up
         suggestions = []
@@ -191,11 +245,8 @@ Suggestions:"""
             if line and len(line) > 5:  # Filter out very short suggestions
                 suggestions.append(line)
 
-        # Ensure we have exactly 3 suggestions
-        while len(suggestions) < 3:
-            suggestions.append("Thanks for your message!")
-
-        return suggestions[:3]
+        # No padding: /suggest fills short or repetitive lists with distinct suggestions
+        return suggestions[:limit]
 
     def get_provider_name(self) -> str:
         """Return the provider name."""
@@ -100,9 +100,9 @@ class TestGeminiProvider:
 
             # Verify response structure
             assert len(response.suggestions) == 3
-            assert "Thanks!" in response.suggestions[0]
-            assert "Awesome" in response.suggestions[1]
-            assert "Sounds" in response.suggestions[2]
+            assert "Thanks!" in response.suggestions[0].text
+            assert "Awesome" in response.suggestions[1].text
+            assert "Sounds" in response.suggestions[2].text
 
             # Verify metadata
             assert response.metadata["provider"] == "gemini"
@@ -159,12 +159,10 @@ class TestGeminiProvider:
         assert len(suggestions) == 3
         assert "Thanks for the update!" in suggestions[0]
 
-        # Test response with fewer suggestions (should pad)
+        # Test response with fewer suggestions (not padded; /suggest fills the gaps)
         short_response = "Just one suggestion here."
         suggestions = provider._parse_response(short_response)
-        assert len(suggestions) == 3
-        assert suggestions[0] == "Just one suggestion here."
-        assert "Thanks for your message!" in suggestions[1]  # Default padding
+        assert suggestions == ["Just one suggestion here."]
 
 
 if __name__ == "__main__":
@@ -20,12 +20,18 @@ Cost Estimate:
 - Paid models: Varies by model (when free quota exhausted)
 """
 
+import asyncio
 import os
 import json
 from typing import List, Dict, Any
+import httpx
 from openai import OpenAI
 
-from ..base import BaseProvider, SuggestRequest, SuggestResponse, ProviderConfig, ProviderError, ProviderAuthError
+from ..base import PARSE_FALLBACK, BaseProvider, SuggestRequest, SuggestResponse, ProviderConfig, ProviderError, ProviderAuthError
+from ..timeouts import adaptive_timeouts
+from ..transport import http_transport
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
 
 class OpenRouterProvider(BaseProvider):
@@ -54,9 +60,27 @@ class OpenRouterProvider(BaseProvider):
         if not api_key:
             raise ProviderAuthError("openrouter", "OPENROUTER_API_KEY environment variable not set")
 
+        self.api_key = api_key
+        if config.use_shared_transport:
+            # Call the REST API directly through the shared async transport
+            self.transport = http_transport
+            self.client = None
+            return
+
+        # Own the HTTP client so its keep-alive pool can be sized and pre-warmed
+        self.transport = None
+        self.http_client = httpx.Client(
+            timeout=config.timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=None,
+                max_keepalive_connections=max(config.pool_connections or 0, 20),
+                keepalive_expiry=config.keepalive_seconds or 90.0,
+            ),
+        )
         self.client = OpenAI(
             api_key=api_key,
-            base_url="https://openrouter.ai/api/v1"
+            base_url=OPENROUTER_BASE_URL,
+            http_client=self.http_client,
         )
 
     def _validate_config(self) -> None:
@@ -70,6 +94,28 @@ class OpenRouterProvider(BaseProvider):
         if self.config.max_tokens < 1 or self.config.max_tokens > 2000:
             raise ValueError("Max tokens must be between 1 and 2000")
 
+    async def warm_connections(self, count: int) -> int:
+        """
+        Open ``count`` pooled connections with concurrent HEAD requests.
+
+        Any HTTP response means the TCP and TLS handshakes are done and the
+        connection is back in the keep-alive pool; only transport errors count
+        as failures.
+        """
+        if self.transport is not None:
+            return await self.transport.warm(f"{OPENROUTER_BASE_URL}/models", count)
+
+        def ping() -> None:
+            self.http_client.head(f"{OPENROUTER_BASE_URL}/models")
+
+        results = await asyncio.gather(
+            *(self._run_blocking(ping) for _ in range(count)), return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, Exception)]
+        if len(errors) == count:
+            raise errors[0]
+        return count - len(errors)
+
     async def suggest(self, request: SuggestRequest) -> SuggestResponse:
         """
         Generate reply suggestions using OpenRouter.
@@ -82,34 +128,61 @@ class OpenRouterProvider(BaseProvider):
         """
         try:
             # Build the messages for OpenRouter
-            messages = self._build_messages(request)
-
-            # Generate response
-            response = self.client.chat.completions.create(
-                model=self.config.model_name,
-                messages=messages,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens,
-                timeout=self.config.timeout_seconds
-            )
+            with self._stage("build_messages"):
+                messages = self._build_messages(request)
+            max_tokens = self._max_tokens(request, 2000)
+
+            # Timeout from recent OpenRouter latencies, capped by the request budget
+            call = adaptive_timeouts.call("openrouter", self.config.model_name, self.config.timeout_seconds)
+            if self.transport is not None:
+                # OpenAI-compatible chat completions endpoint
+                data = await call.run(self.transport.post_json(
+                    "openrouter",
+                    f"{OPENROUTER_BASE_URL}/chat/completions",
+                    {
+                        "model": self.config.model_name,
+                        "messages": messages,
+                        "temperature": self.config.temperature,
+                        "max_tokens": max_tokens,
+                    },
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    timeout=call.seconds,
+                ))
+                response = data["choices"][0]["message"]["content"]
+                usage = data.get("usage")
+            else:
+                # Generate response (the OpenAI client is synchronous; keep it off the event loop)
+                response = await call.run(self._run_blocking(
+                    lambda: self.client.chat.completions.create(
+                        model=self.config.model_name,
+                        messages=messages,
+                        temperature=self.config.temperature,
+                        max_tokens=max_tokens,
+                        timeout=call.seconds
+                    )
+                ))
+                usage = getattr(response, 'usage', None)
 
             # Extract suggestions from response
-            suggestions = self._parse_response(response)
+            with self._stage("parse_response"):
+                suggestions = self._parse_response(response, request.num_suggestions)
 
             # Build metadata
             metadata = {
                 "provider": "openrouter",
                 "model": self.config.model_name,
                 "temperature": self.config.temperature,
-                "max_tokens": self.config.max_tokens,
-                "usage": getattr(response, 'usage', None),
+                "max_tokens": max_tokens,
+                "usage": usage,
             }
 
             return SuggestResponse(
-                suggestions=suggestions,
+                suggestions=self._as_items(suggestions, request),
                 metadata=metadata
             )
 
+        except ProviderError:
+            raise
         except Exception as e:
             # Handle OpenRouter-specific errors
             error_str = str(e).lower()
@@ -154,9 +227,9 @@ class OpenRouterProvider(BaseProvider):
         system_message = f"""You are a helpful assistant that generates reply suggestions.
 
 Style instructions: {style_text}
-Intensity guidance: {intensity_instruction}
+Intensity guidance: {intensity_instruction}{self._style_order(request)}{self._profile_text(request)}
 
-Generate exactly 3 reply suggestions for the user's message.
+Generate exactly {request.num_suggestions} reply suggestions for the user's message.
 Each suggestion should be a complete, natural reply under 100 characters.
 Format your response as a JSON array of strings, like: ["suggestion 1", "suggestion 2", "suggestion 3"]"""
 
@@ -168,15 +241,16 @@ Format your response as a JSON array of strings, like: ["suggestion 1", "suggest
             {"role": "user", "content": user_message}
         ]
 
-    def _parse_response(self, response) -> List[str]:
+    def _parse_response(self, response, limit: int = 3) -> List[str]:
         """
         Parse the OpenRouter response into a list of suggestions.
 
         Args:
             response: Raw response from OpenRouter API
+            limit: Number of suggestions requested
 
         Returns:
-            List of suggestion strings
+            List of suggestion strings (at most ``limit``)
         """
         try:
             # Extract content from response
@@ -189,7 +263,7 @@ Format your response as a JSON array of strings, like: ["suggestion 1", "suggest
             try:
                 suggestions = json.loads(content.strip())
                 if isinstance(suggestions, list):
-                    return suggestions[:3]
+                    return suggestions[:limit]
             except json.JSONDecodeError:
                 pass
 
@@ -203,19 +277,12 @@ Format your response as a JSON array of strings, like: ["suggestion 1", "suggest
                 if line and len(line) > 5:
                     suggestions.append(line)
 
-            # Ensure we have exactly 3 suggestions
-            while len(suggestions) < 3:
-                suggestions.append("Thanks for your message!")
-
-            return suggestions[:3]
+            # No padding: /suggest fills short or repetitive lists with distinct suggestions
+            return suggestions[:limit]
 
         except Exception:
             # If parsing fails completely, return defaults
-            return [
-                "Thanks for your message!",
-                "I appreciate the update.",
-                "That sounds interesting."
-            ]
+            return list(PARSE_FALLBACK)
 
     def get_provider_name(self) -> str:
         """Return the provider name."""
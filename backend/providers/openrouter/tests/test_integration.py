@@ -88,7 +88,7 @@ class TestOpenRouterProvider:
         response = asyncio.run(provider.suggest(sample_request))
 
         assert len(response.suggestions) == 3
-        assert "Thanks!" in response.suggestions
+        assert "Thanks!" in [s.text for s in response.suggestions]
         assert response.metadata["provider"] == "openrouter"
         assert response.metadata["model"] == "qwen/qwen-2.5-14b-instruct:free"
         assert response.metadata["usage"] == {"prompt_tokens": 50, "completion_tokens": 30}
@@ -117,7 +117,7 @@ class TestOpenRouterProvider:
         response = asyncio.run(provider.suggest(sample_request))
 
         assert len(response.suggestions) == 3
-        assert "Thanks for your message!" in response.suggestions
+        assert "Thanks for your message!" in [s.text for s in response.suggestions]
 
     @patch('providers.openrouter.provider.OpenAI')
     def test_suggest_response_parsing_error(self, mock_openai_class, valid_config, sample_request):
@@ -133,9 +133,9 @@ class TestOpenRouterProvider:
         provider = OpenRouterProvider(valid_config)
         response = asyncio.run(provider.suggest(sample_request))
 
-        # Should return default suggestions
-        assert len(response.suggestions) == 3
-        assert "Thanks for your message!" in response.suggestions
+        # Unparseable output is not padded with canned replies
+        assert len(response.suggestions) <= 3
+        assert "Thanks for your message!" not in [s.text for s in response.suggestions]
 
     @patch('providers.openrouter.provider.OpenAI')
     def test_suggest_auth_error(self, mock_openai_class, valid_config, sample_request):
@@ -261,9 +261,8 @@ class TestOpenRouterProvider:
         mock_response.choices[0].message.content = ""
 
         suggestions = provider._parse_response(mock_response)
-        # Should return defaults
-        assert len(suggestions) == 3
-        assert "Thanks for your message!" in suggestions[0]
+        # No canned padding; /suggest fills the gaps
+        assert suggestions == []
 
     def test_get_provider_name(self, valid_config):
         """Test provider name retrieval."""
@@ -19,11 +19,15 @@ Cost Estimate:
 
 import os
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import dashscope
 from dashscope import Generation
 
-from ..base import BaseProvider, SuggestRequest, SuggestResponse, ProviderConfig, ProviderError, ProviderAuthError
+from ..base import PARSE_FALLBACK, BaseProvider, SuggestRequest, SuggestResponse, ProviderConfig, ProviderError, ProviderAuthError
+from ..timeouts import adaptive_timeouts
+from ..transport import http_transport
+
+DASHSCOPE_BASE_URL = "https://dashscope.aliyuncs.com/api/v1"
 
 
 class QwenProvider(BaseProvider):
@@ -51,7 +55,12 @@ class QwenProvider(BaseProvider):
         if not api_key:
             raise ProviderAuthError("qwen", "DASHSCOPE_API_KEY environment variable not set")
 
-        dashscope.api_key = api_key
+        self.api_key = api_key
+        # The DashScope SDK opens a new HTTP session per call; the shared
+        # transport keeps connections alive across requests
+        self.transport = http_transport if config.use_shared_transport else None
+        if self.transport is None:
+            dashscope.api_key = api_key
 
     def _validate_config(self) -> None:
         """Validate Qwen-specific configuration."""
@@ -64,6 +73,12 @@ class QwenProvider(BaseProvider):
         if self.config.max_tokens < 1 or self.config.max_tokens > 2000:
             raise ValueError("Max tokens must be between 1 and 2000")
 
+    async def warm_connections(self, count: int) -> Optional[int]:
+        """Open connections to DashScope through the shared transport, if used."""
+        if self.transport is None:
+            return None
+        return await self.transport.warm(DASHSCOPE_BASE_URL, count)
+
     async def suggest(self, request: SuggestRequest) -> SuggestResponse:
         """
         Generate reply suggestions using Alibaba Cloud Qwen.
@@ -76,34 +91,65 @@ class QwenProvider(BaseProvider):
         """
         try:
             # Build the messages for Qwen
-            messages = self._build_messages(request)
-
-            # Generate response
-            response = Generation.call(
-                model=self.config.model_name,
-                messages=messages,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens,
-                result_format='message'  # Get structured response
-            )
+            with self._stage("build_messages"):
+                messages = self._build_messages(request)
+            max_tokens = self._max_tokens(request, 2000)
+
+            # Timeout from recent Qwen latencies, capped by the request budget
+            call = adaptive_timeouts.call("qwen", self.config.model_name, self.config.timeout_seconds)
+            if self.transport is not None:
+                # DashScope native text-generation endpoint
+                data = await call.run(self.transport.post_json(
+                    "qwen",
+                    f"{DASHSCOPE_BASE_URL}/services/aigc/text-generation/generation",
+                    {
+                        "model": self.config.model_name,
+                        "input": {"messages": messages},
+                        "parameters": {
+                            "temperature": self.config.temperature,
+                            "max_tokens": max_tokens,
+                            "result_format": "message",
+                        },
+                    },
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    timeout=call.seconds,
+                ))
+                response = data["output"]["choices"][0]["message"]["content"]
+                usage = data.get("usage")
+            else:
+                # Generate response (DashScope is synchronous; keep it off the event loop)
+                response = await call.run(self._run_blocking(
+                    lambda: Generation.call(
+                        model=self.config.model_name,
+                        messages=messages,
+                        temperature=self.config.temperature,
+                        max_tokens=max_tokens,
+                        result_format='message',  # Get structured response
+                        request_timeout=call.seconds,
+                    )
+                ))
+                usage = getattr(response, 'usage', None)
 
             # Extract suggestions from response
-            suggestions = self._parse_response(response)
+            with self._stage("parse_response"):
+                suggestions = self._parse_response(response, request.num_suggestions)
 
             # Build metadata
             metadata = {
                 "provider": "qwen",
                 "model": self.config.model_name,
                 "temperature": self.config.temperature,
-                "max_tokens": self.config.max_tokens,
-                "usage": getattr(response, 'usage', None),
+                "max_tokens": max_tokens,
+                "usage": usage,
             }
 
             return SuggestResponse(
-                suggestions=suggestions,
+                suggestions=self._as_items(suggestions, request),
                 metadata=metadata
             )
 
+        except ProviderError:
+            raise
         except Exception as e:
             # Handle Qwen-specific errors
             error_str = str(e).lower()
@@ -148,9 +194,9 @@ class QwenProvider(BaseProvider):
         system_message = f"""You are a helpful assistant that generates reply suggestions.
 
 Style instructions: {style_text}
-Intensity guidance: {intensity_instruction}
+Intensity guidance: {intensity_instruction}{self._style_order(request)}{self._profile_text(request)}
 
-Generate exactly 3 reply suggestions for the user's message.
+Generate exactly {request.num_suggestions} reply suggestions for the user's message.
 Each suggestion should be a complete, natural reply under 100 characters.
 Format your response as a JSON array of strings, like: ["suggestion 1", "suggestion 2", "suggestion 3"]"""
 
@@ -162,15 +208,16 @@ Format your response as a JSON array of strings, like: ["suggestion 1", "suggest
             {"role": "user", "content": user_message}
         ]
 
-    def _parse_response(self, response) -> List[str]:
+    def _parse_response(self, response, limit: int = 3) -> List[str]:
         """
         Parse the Qwen response into a list of suggestions.
 
         Args:
             response: Raw response from Qwen API
+            limit: Number of suggestions requested
 
         Returns:
-            List of suggestion strings
+            List of suggestion strings (at most ``limit``)
         """
         try:
             # Extract content from response
@@ -185,7 +232,7 @@ Format your response as a JSON array of strings, like: ["suggestion 1", "suggest
             try:
                 suggestions = json.loads(content.strip())
                 if isinstance(suggestions, list):
-                    return suggestions[:3]
+                    return suggestions[:limit]
             except json.JSONDecodeError:
                 pass
 
@@ -199,19 +246,12 @@ Format your response as a JSON array of strings, like: ["suggestion 1", "suggest
                 if line and len(line) > 5:
                     suggestions.append(line)
 
-            # Ensure we have exactly 3 suggestions
-            while len(suggestions) < 3:
-                suggestions.append("Thanks for your message!")
-
-            return suggestions[:3]
+            # No padding: /suggest fills short or repetitive lists with distinct suggestions
+            return suggestions[:limit]
 
         except Exception:
             # If parsing fails completely, return defaults
-            return [
-                "Thanks for your message!",
-                "I appreciate the update.",
-                "That sounds interesting."
-            ]
+            return list(PARSE_FALLBACK)
 
     def get_provider_name(self) -> str:
         """Return the provider name."""
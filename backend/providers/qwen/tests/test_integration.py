@@ -81,7 +81,7 @@ class TestQwenProvider:
         response = provider.suggest(sample_request)
 
         assert len(response.suggestions) == 3
-        assert "Thanks!" in response.suggestions
+        assert "Thanks!" in [s.text for s in response.suggestions]
         assert response.metadata["provider"] == "qwen"
         assert response.metadata["model"] == "qwen-turbo"
         assert response.metadata["usage"] == {"input_tokens": 50, "output_tokens": 30}
@@ -106,7 +106,7 @@ class TestQwenProvider:
         response = provider.suggest(sample_request)
 
         assert len(response.suggestions) == 3
-        assert "Thanks for your message!" in response.suggestions
+        assert "Thanks for your message!" in [s.text for s in response.suggestions]
 
     @patch('dashscope.Generation.call')
     def test_suggest_response_parsing_error(self, mock_call, valid_config, sample_request):
@@ -119,9 +119,9 @@ class TestQwenProvider:
         provider = QwenProvider(valid_config)
         response = provider.suggest(sample_request)
 
-        # Should return default suggestions
-        assert len(response.suggestions) == 3
-        assert "Thanks for your message!" in response.suggestions
+        # Unparseable output is not padded with canned replies
+        assert len(response.suggestions) <= 3
+        assert "Thanks for your message!" not in [s.text for s in response.suggestions]
 
     @patch('dashscope.Generation.call')
     def test_suggest_auth_error(self, mock_call, valid_config, sample_request):
@@ -232,9 +232,8 @@ class TestQwenProvider:
         mock_response.output.text = ""
 
         suggestions = provider._parse_response(mock_response)
-        # Should return defaults
-        assert len(suggestions) == 3
-        assert "Thanks for your message!" in suggestions[0]
+        # No canned padding; /suggest fills the gaps
+        assert suggestions == []
 
     def test_get_provider_name(self, valid_config):
         """Test provider name retrieval."""
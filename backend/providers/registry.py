@@ -0,0 +1,234 @@
+"""
+Provider Registry
+
+This module discovers provider adapters by name and loads them lazily.
+
+Importing an adapter module pulls in its SDK (``google.generativeai``,
+``openai``, ``dashscope``), which dominates cold-start time and memory. The
+registry records only a spec for each configured provider and imports it on
+first use; the import runs on a worker thread so it never stalls the event
+loop. ``warm_up()`` can load the remaining providers in the background once
+the server is already accepting requests.
+
+When ``CASCADE_TIERS`` lists provider:model tiers, a "cascade" provider is
+registered as well; loading it builds one adapter per tier (see cascade.py).
+"""
+
+import asyncio
+import importlib
+import logging
+import threading
+from typing import Callable, Dict, Iterator, List, MutableMapping, Optional, Tuple
+
+from .base import BaseProvider, ProviderConfig
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderSpec:
+    """
+    Where to find a provider adapter and which setting holds its API key.
+
+    ``factory``, if given, builds the provider from its config instead of
+    importing ``module`` and calling ``class_name``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        class_name: str,
+        settings_key: Optional[str] = None,
+        factory: Optional[Callable[[ProviderConfig], BaseProvider]] = None,
+    ):
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        self.settings_key = settings_key
+        self.factory = factory
+
+    def build(self, config: ProviderConfig) -> BaseProvider:
+        """Import the adapter and construct it (runs the factory if there is one)."""
+        if self.factory is not None:
+            return self.factory(config)
+        module = importlib.import_module(self.module, __package__)
+        return getattr(module, self.class_name)(config)
+
+
+BUILTIN_PROVIDERS = (
+    ProviderSpec("gemini", ".gemini.provider", "GeminiProvider", "gemini_api_key"),
+    ProviderSpec("openrouter", ".openrouter.provider", "OpenRouterProvider", "openrouter_api_key"),
+    ProviderSpec("qwen", ".qwen.provider", "QwenProvider", "qwen_api_key"),
+)
+
+
+def _provider_config(settings, api_key: Optional[str], model_name: Optional[str] = None) -> ProviderConfig:
+    return ProviderConfig(
+        api_key=api_key,
+        model_name=model_name,
+        pool_connections=getattr(settings, "warm_connections_per_provider", None),
+        keepalive_seconds=getattr(settings, "connection_keepalive_seconds", None),
+        use_shared_transport=getattr(settings, "provider_http_transport", False),
+    )
+
+
+def parse_cascade_tiers(value: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Parse ``CASCADE_TIERS``: comma-separated ``provider[:model]`` entries, cheapest first.
+
+    Only the first colon separates the provider, so OpenRouter model ids such
+    as "qwen/qwen-2.5-7b-instruct:free" can be used as they are.
+
+    Raises:
+        ValueError: If an entry names an unknown provider
+    """
+    known = {spec.name for spec in BUILTIN_PROVIDERS}
+    tiers = []
+    for entry in (value or "").split(","):
+        name, _, model = entry.strip().partition(":")
+        if not name:
+            continue
+        if name not in known:
+            raise ValueError(f"Unknown provider in CASCADE_TIERS: {name}")
+        tiers.append((name, model.strip() or None))
+    return tiers
+
+
+def _cascade_factory(settings, tiers: List[Tuple[str, Optional[str]]]) -> Callable[[ProviderConfig], BaseProvider]:
+    def build(config: ProviderConfig) -> BaseProvider:
+        from .cascade import CascadeProvider
+
+        specs = {spec.name: spec for spec in BUILTIN_PROVIDERS}
+        built = []
+        for name, model in tiers:
+            spec = specs[name]
+            provider = spec.build(_provider_config(settings, getattr(settings, spec.settings_key, None), model))
+            built.append((f"{name}:{provider.config.model_name}", provider))
+        return CascadeProvider(
+            built,
+            min_usable=getattr(settings, "cascade_min_usable", 3),
+            max_chars=getattr(settings, "cascade_max_chars", 100),
+        )
+
+    return build
+
+
+class ProviderRegistry(MutableMapping):
+    """
+    Mapping of provider name to adapter instance, loading adapters on first use.
+
+    Behaves like a dict of ready instances; names that are registered but not
+    yet loaded are reported by ``in`` and ``status()`` without importing them.
+    """
+
+    def __init__(self, instances: Optional[Dict[str, BaseProvider]] = None):
+        self._instances: Dict[str, BaseProvider] = dict(instances or {})
+        self._pending: Dict[str, tuple] = {}
+        self._failed: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, instances: Optional[Dict[str, BaseProvider]] = None) -> "ProviderRegistry":
+        """
+        Build a registry with every built-in provider whose API key is configured.
+
+        Also registers "cascade" when ``settings.cascade_tiers`` is set.
+
+        Args:
+            settings: Application settings holding the provider API keys
+            instances: Providers that are always available (e.g. the mock)
+        """
+        registry = cls(instances)
+        for spec in BUILTIN_PROVIDERS:
+            api_key = getattr(settings, spec.settings_key, None)
+            if api_key:
+                registry.register(spec, _provider_config(settings, api_key))
+        tiers = parse_cascade_tiers(getattr(settings, "cascade_tiers", None))
+        if tiers:
+            spec = ProviderSpec("cascade", ".cascade", "CascadeProvider", factory=_cascade_factory(settings, tiers))
+            registry.register(spec, ProviderConfig())
+        return registry
+
+    def register(self, spec: ProviderSpec, config: ProviderConfig) -> None:
+        """Register a provider to be imported and constructed on first use."""
+        self._pending[spec.name] = (spec, config)
+        self._failed.pop(spec.name, None)
+
+    def _load(self, name: str) -> Optional[BaseProvider]:
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            entry = self._pending.get(name)
+            if entry is None:
+                return None
+            spec, config = entry
+            try:
+                provider = spec.build(config)
+            except Exception as e:
+                logger.error("Failed to load provider %s: %s", name, e)
+                self._failed[name] = str(e)
+                del self._pending[name]
+                return None
+            del self._pending[name]
+            self._instances[name] = provider
+            logger.info("Loaded provider %s", name)
+            return provider
+
+    async def acquire(self, name: str) -> Optional[BaseProvider]:
+        """
+        Return the provider, importing it on a worker thread if needed.
+
+        Returns:
+            The provider instance, or None if it is unknown or failed to load
+        """
+        provider = self._instances.get(name)
+        if provider is not None or name not in self._pending:
+            return provider
+        return await asyncio.get_running_loop().run_in_executor(None, self._load, name)
+
+    async def warm_up(self) -> None:
+        """Load every pending provider in the background, one at a time."""
+        loop = asyncio.get_running_loop()
+        for name in list(self._pending):
+            await loop.run_in_executor(None, self._load, name)
+
+    def loaded(self) -> Dict[str, BaseProvider]:
+        """Snapshot of the providers that are already constructed."""
+        return dict(self._instances)
+
+    def status(self) -> Dict[str, str]:
+        """Load state per provider: "loaded", "pending" or "failed"."""
+        status = {name: "loaded" for name in self._instances}
+        status.update({name: "pending" for name in self._pending})
+        status.update({name: "failed" for name in self._failed})
+        return status
+
+    # -- mapping interface ---------------------------------------------------
+
+    def __getitem__(self, name: str) -> BaseProvider:
+        provider = self._instances.get(name) or self._load(name)
+        if provider is None:
+            raise KeyError(name)
+        return provider
+
+    def __setitem__(self, name: str, provider: BaseProvider) -> None:
+        self._instances[name] = provider
+        self._pending.pop(name, None)
+
+    def __delitem__(self, name: str) -> None:
+        if name in self._instances:
+            del self._instances[name]
+        elif name in self._pending:
+            del self._pending[name]
+        else:
+            raise KeyError(name)
+
+    def __contains__(self, name) -> bool:
+        return name in self._instances or name in self._pending
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._instances)
+        yield from list(self._pending)
+
+    def __len__(self) -> int:
+        return len(self._instances) + len(self._pending)
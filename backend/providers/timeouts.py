@@ -0,0 +1,221 @@
+"""
+Adaptive Provider Timeouts
+
+Each adapter has a fixed ``timeout_seconds`` (10s for Gemini, 15s for
+OpenRouter and Qwen), far above what a healthy call takes: a call still
+pending after the p99 latency rarely comes back in time to be useful, and the
+keyboard has long moved on. This module sets each call's timeout from the
+latencies recently observed for the same provider and model instead.
+
+Every call's latency goes into a streaming quantile sketch per
+(provider, model). The sketch keeps counts in logarithmic buckets, so any
+quantile is known within 1% relative error in constant memory, and it halves
+all counts once it holds ``2 * window`` samples so that old traffic fades out.
+Once a sketch has ``min_samples`` samples the timeout is::
+
+    clamp(quantile(q) + margin, min_seconds, configured timeout)
+
+and it is further capped by the time left in the request's budget (see
+``start_budget``), so a cascade's second tier or a retry never runs past the
+deadline of the request it serves. A call that times out is recorded at its
+timeout, which pushes the quantile up when the provider slows down. A call
+whose timeout was cut short by the budget is not recorded, since its latency
+says nothing about the provider.
+
+Adapters wrap their upstream call::
+
+    call = adaptive_timeouts.call("gemini", model, self.config.timeout_seconds)
+    data = await call.run(transport.post_json(..., timeout=call.seconds))
+"""
+
+import math
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from .base import ProviderError
+
+T = TypeVar("T")
+
+# Monotonic time (perf_counter) by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("provider_deadline", default=None)
+
+
+class LatencySketch:
+    """
+    Streaming quantile sketch over positive latencies (seconds).
+
+    Args:
+        relative_accuracy: Relative error bound of reported quantiles
+        window: Samples kept at full weight; older ones decay by halves
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, window: int = 1000):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._inv_log_gamma = 1.0 / math.log(self.gamma)
+        self.window = window
+        self.buckets: Dict[int, float] = {}
+        self.count = 0.0
+        self.total = 0
+        self._cache: Dict[float, float] = {}
+
+    def add(self, seconds: float) -> None:
+        index = math.ceil(math.log(max(seconds, 1e-3)) * self._inv_log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0.0) + 1.0
+        self.count += 1.0
+        self.total += 1
+        if self.count >= 2 * self.window:
+            self.buckets = {i: c / 2 for i, c in self.buckets.items() if c >= 1.0}
+            self.count = sum(self.buckets.values())
+        self._cache.clear()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The ``q`` quantile (0..1) in seconds, or None when empty."""
+        if not self.buckets:
+            return None
+        cached = self._cache.get(q)
+        if cached is not None:
+            return cached
+        rank = q * (self.count - 1)
+        seen = 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                break
+        value = self._cache[q] = 2 * self.gamma ** index / (self.gamma + 1)
+        return value
+
+
+class TimedCall:
+    """One upstream call: its timeout, and ``run()`` to await it and record its latency."""
+
+    __slots__ = ("controller", "key", "seconds", "limited_by_budget")
+
+    def __init__(self, controller: "AdaptiveTimeouts", key: Tuple[str, str], seconds: float, limited_by_budget: bool):
+        self.controller = controller
+        self.key = key
+        self.seconds = seconds
+        self.limited_by_budget = limited_by_budget
+
+    async def run(self, call: Awaitable[T]) -> T:
+        """Await the upstream call, recording its latency (or its timeout)."""
+        controller = self.controller
+        started = controller.clock()
+        try:
+            result = await call
+        except Exception:
+            elapsed = controller.clock() - started
+            if elapsed >= 0.95 * self.seconds and not self.limited_by_budget:
+                # Timed out: the real latency is at least the timeout
+                controller.timeouts[self.key] = controller.timeouts.get(self.key, 0) + 1
+                controller.observe(*self.key, elapsed)
+            raise
+        controller.observe(*self.key, controller.clock() - started)
+        return result
+
+
+class AdaptiveTimeouts:
+    """
+    Per-(provider, model) timeouts derived from observed latencies.
+
+    Args:
+        enabled: Derive timeouts from latencies; when False only the budget
+            caps the configured timeouts
+        quantile: Latency quantile the timeout is based on (e.g. 0.99)
+        margin_seconds: Added to the quantile
+        min_seconds: Lowest adaptive timeout
+        min_samples: Samples needed before a sketch is trusted
+        window: Samples per sketch kept at full weight
+        clock: Time source (seconds), replaceable in tests
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        quantile: float = 0.99,
+        margin_seconds: float = 0.5,
+        min_seconds: float = 1.0,
+        min_samples: int = 50,
+        window: int = 1000,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.enabled = enabled
+        self.quantile = quantile
+        self.margin_seconds = margin_seconds
+        self.min_seconds = min_seconds
+        self.min_samples = min_samples
+        self.window = window
+        self.clock = clock
+        self.sketches: Dict[Tuple[str, str], LatencySketch] = {}
+        self.timeouts: Dict[Tuple[str, str], int] = {}
+        self.configured: Dict[Tuple[str, str], float] = {}
+
+    def configure(self, **options: Any) -> None:
+        """Update options; accepts the constructor's keyword arguments."""
+        for name, value in options.items():
+            setattr(self, name, value)
+
+    def start_budget(self, seconds: Optional[float]) -> None:
+        """Give the current request (context) ``seconds`` for its provider calls; None for no budget."""
+        _deadline.set(self.clock() + seconds if seconds else None)
+
+    def remaining_budget(self) -> Optional[float]:
+        """Seconds left in the current request's budget, or None without one."""
+        deadline = _deadline.get()
+        return None if deadline is None else deadline - self.clock()
+
+    def observe(self, provider: str, model: str, seconds: float) -> None:
+        sketch = self.sketches.get((provider, model))
+        if sketch is None:
+            sketch = self.sketches[(provider, model)] = LatencySketch(window=self.window)
+        sketch.add(seconds)
+
+    def adaptive(self, provider: str, model: str, configured: float) -> float:
+        """The timeout from the latency sketch alone (``configured`` until it has enough samples)."""
+        sketch = self.sketches.get((provider, model))
+        if not self.enabled or sketch is None or sketch.total < self.min_samples:
+            return configured
+        estimate = sketch.quantile(self.quantile) + self.margin_seconds
+        return min(configured, max(self.min_seconds, estimate))
+
+    def call(self, provider: str, model: Optional[str], configured: float) -> TimedCall:
+        """
+        Timeout for one upstream call; await the call through ``run()`` to record its latency.
+
+        Args:
+            provider: Provider name (as used in ProviderError)
+            model: Model the call goes to
+            configured: The adapter's configured timeout, an upper bound
+
+        Raises:
+            ProviderError: If the request's budget is already spent (not retryable)
+        """
+        key = (provider, model or "")
+        self.configured[key] = configured
+        seconds = self.adaptive(provider, key[1], configured)
+        remaining = self.remaining_budget()
+        limited = remaining is not None and remaining < seconds
+        if limited:
+            if remaining <= 0:
+                raise ProviderError(f"{provider} call skipped: request budget spent", provider, retryable=False)
+            seconds = remaining
+        return TimedCall(self, key, seconds, limited)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per "provider:model": samples, p50 and the configured quantile, the current timeout and timeouts hit."""
+        label = f"p{self.quantile * 100:g}_ms"
+        result = {}
+        for (provider, model), sketch in self.sketches.items():
+            p50, pq = sketch.quantile(0.5), sketch.quantile(self.quantile)
+            result[f"{provider}:{model}"] = {
+                "samples": sketch.total,
+                "p50_ms": p50 * 1000.0,
+                label: pq * 1000.0,
+                "timeout_seconds": self.adaptive(provider, model, self.configured.get((provider, model), math.inf)),
+                "timed_out": self.timeouts.get((provider, model), 0),
+            }
+        return result
+
+
+# Shared by every adapter; the application configures it from settings
+adaptive_timeouts = AdaptiveTimeouts()
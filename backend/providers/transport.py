@@ -0,0 +1,245 @@
+"""
+Shared HTTP Transport
+
+This module provides one async HTTP client that every provider adapter can use
+to call its REST endpoint directly, instead of going through each SDK's own
+connection handling.
+
+All adapters share a single ``httpx.AsyncClient`` with HTTP/2 multiplexing
+(when the optional ``h2`` package is installed), one set of pool limits, a
+concurrency cap per host and unified timeouts. Calls run on the event loop, so
+they use no executor threads. Non-2xx responses and transport failures are
+mapped onto the ``ProviderError`` hierarchy.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from . import base
+from .base import ProviderAuthError, ProviderError, ProviderRateLimitError
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class _HostSlot:
+    """Concurrency cap and counters for one upstream host."""
+
+    __slots__ = ("semaphore", "in_flight", "waiting")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+
+
+class HttpTransport:
+    """
+    Async HTTP client shared by the provider adapters.
+
+    Args:
+        http2: Negotiate HTTP/2 where the server supports it (requires ``h2``)
+        max_connections: Upper bound on open connections across all hosts
+        max_keepalive_connections: Idle connections kept for reuse
+        keepalive_expiry: Seconds an idle connection is kept open
+        per_host_limit: Concurrent requests allowed per upstream host; extra
+            requests wait, and the wait counts against their timeout
+        connect_timeout: Seconds allowed for connection setup
+        timeout: Default overall timeout in seconds for a request
+        transport: Custom low-level httpx transport (e.g. ``httpx.MockTransport``)
+    """
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 90.0,
+        per_host_limit: int = 32,
+        connect_timeout: float = 3.0,
+        timeout: float = 15.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.configure(
+            http2=http2,
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            per_host_limit=per_host_limit,
+            connect_timeout=connect_timeout,
+            timeout=timeout,
+            transport=transport,
+        )
+
+    def configure(self, **options: Any) -> None:
+        """
+        Update transport options; the client is rebuilt on its next use.
+
+        Accepts the same keyword arguments as the constructor.
+        """
+        for name, value in options.items():
+            setattr(self, name, value)
+        self.http2 = self.http2 and HTTP2_AVAILABLE
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._hosts: Dict[str, _HostSlot] = {}
+
+    def _client_for_loop(self) -> httpx.AsyncClient:
+        # httpx pools are bound to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=self._timeout(self.timeout),
+                transport=self.transport,
+            )
+            self._loop = loop
+            self._hosts = {}
+        return self._client
+
+    def _timeout(self, seconds: float) -> httpx.Timeout:
+        return httpx.Timeout(seconds, connect=min(self.connect_timeout, seconds))
+
+    def _slot(self, host: str) -> _HostSlot:
+        slot = self._hosts.get(host)
+        if slot is None:
+            slot = self._hosts[host] = _HostSlot(self.per_host_limit)
+        return slot
+
+    async def request(
+        self,
+        provider: str,
+        method: str,
+        url: str,
+        *,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """
+        Send a request to a provider API.
+
+        Reports "transport_wait" (time queued behind the per-host cap) and
+        "provider_call" (time on the wire) to ``base.stage_recorder``.
+
+        Args:
+            provider: Provider name used in raised errors
+            method: HTTP method
+            url: Absolute URL
+            json: JSON-serializable request body
+            headers: Extra request headers
+            timeout: Overall timeout in seconds, including the per-host wait
+
+        Returns:
+            The response (any status; see ``post_json`` for error mapping)
+
+        Raises:
+            ProviderError: On timeout or transport failure (retryable)
+        """
+        client = self._client_for_loop()
+        timeout = timeout or self.timeout
+        slot = self._slot(urlsplit(url).netloc)
+        submitted = time.perf_counter()
+        slot.waiting += 1
+        try:
+            await asyncio.wait_for(slot.semaphore.acquire(), timeout)
+        except asyncio.TimeoutError as e:
+            raise ProviderError(f"{provider} request queued longer than {timeout}s", provider, retryable=True) from e
+        finally:
+            slot.waiting -= 1
+
+        started = time.perf_counter()
+        slot.in_flight += 1
+        try:
+            remaining = max(0.001, timeout - (started - submitted))
+            return await client.request(method, url, json=json, headers=headers, timeout=self._timeout(remaining))
+        except httpx.TimeoutException as e:
+            raise ProviderError(f"{provider} request timed out: {e!r}", provider, retryable=True) from e
+        except httpx.HTTPError as e:
+            raise ProviderError(f"{provider} transport error: {e!r}", provider, retryable=True) from e
+        finally:
+            slot.in_flight -= 1
+            slot.semaphore.release()
+            if base.stage_recorder is not None:
+                base.stage_recorder("transport_wait", submitted, started)
+                base.stage_recorder("provider_call", started, time.perf_counter())
+
+    async def post_json(
+        self,
+        provider: str,
+        url: str,
+        payload: Any,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        POST a JSON body and return the decoded JSON response.
+
+        Raises:
+            ProviderAuthError: On 401/403
+            ProviderRateLimitError: On 429, with ``Retry-After`` if present
+            ProviderError: On other non-2xx statuses (retryable for 5xx)
+        """
+        response = await self.request(provider, "POST", url, json=payload, headers=headers, timeout=timeout)
+        status = response.status_code
+        if status in (401, 403):
+            raise ProviderAuthError(provider)
+        if status == 429:
+            retry_after = response.headers.get("retry-after")
+            raise ProviderRateLimitError(provider, int(retry_after) if retry_after and retry_after.isdigit() else None)
+        if status >= 400:
+            raise ProviderError(
+                f"{provider} returned HTTP {status}: {response.text[:200]}", provider, retryable=status >= 500
+            )
+        return response.json()
+
+    async def warm(self, url: str, count: int) -> int:
+        """
+        Open connections to ``url``'s host with concurrent HEAD requests.
+
+        Over HTTP/2 every request to a host shares one connection, so a single
+        request is enough.
+
+        Returns:
+            Number of requests that reached the server
+
+        Raises:
+            ProviderError: If none of them did
+        """
+        client = self._client_for_loop()
+        count = 1 if self.http2 else count
+        results = await asyncio.gather(*(client.head(url) for _ in range(count)), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if len(errors) == count:
+            host = urlsplit(url).netloc
+            raise ProviderError(f"Could not connect to {host}: {errors[0]!r}", host, retryable=True)
+        return count - len(errors)
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Protocol and per-host in-flight/queued counts, for /health."""
+        return {
+            "http2": self.http2,
+            "hosts": {host: {"in_flight": s.in_flight, "queued": s.waiting} for host, s in self._hosts.items()},
+        }
+
+
+# Transport shared by every adapter; the application configures it from settings
+http_transport = HttpTransport()
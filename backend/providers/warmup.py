@@ -0,0 +1,116 @@
+"""
+Connection Warm-Up
+
+This module keeps provider connection pools warm so the first suggestion after
+startup (or after an idle period) does not pay for DNS lookup, TCP connect and
+TLS handshake on the request path.
+
+``ConnectionWarmer`` asks every loaded adapter to open its keep-alive
+connections (see ``BaseProvider.warm_connections``), then refreshes them on an
+interval shorter than the pool's idle expiry. Its ``ready`` flag and
+``snapshot()`` back the readiness probe and the pool health report.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from .registry import ProviderRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class PoolHealth:
+    """Warm-up state of one provider's connection pool."""
+
+    __slots__ = ("target", "warm", "warmed_at", "error")
+
+    def __init__(self, target: int):
+        self.target = target
+        self.warm = 0
+        self.warmed_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, object]:
+        age = None if self.warmed_at is None else round(time.monotonic() - self.warmed_at, 1)
+        return {"warm": self.warm, "target": self.target, "last_warmed_seconds_ago": age, "error": self.error}
+
+
+class ConnectionWarmer:
+    """
+    Pre-warms and refreshes provider connection pools in the background.
+
+    Args:
+        registry: Provider registry whose loaded adapters are warmed
+        connections: Keep-alive connections to hold open per provider
+        refresh_seconds: Interval between refreshes once every pool is warm;
+            keep it below the pool's keep-alive expiry
+        retry_seconds: Interval between attempts while a pool is cold
+    """
+
+    def __init__(
+        self,
+        registry: ProviderRegistry,
+        connections: int = 4,
+        refresh_seconds: float = 30.0,
+        retry_seconds: float = 5.0,
+    ):
+        self.registry = registry
+        self.connections = connections
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.pools: Dict[str, PoolHealth] = {}
+        self._warmed_once = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once a warm-up pass has run and every pool holds a connection."""
+        return self._warmed_once and all(pool.warm > 0 for pool in self.pools.values())
+
+    async def warm(self) -> None:
+        """Warm every loaded provider's pool once, concurrently."""
+        loaded = self.registry.loaded()
+        await asyncio.gather(*(self._warm_one(name, provider) for name, provider in loaded.items()))
+        self._warmed_once = True
+
+    async def _warm_one(self, name: str, provider) -> None:
+        try:
+            warm = await provider.warm_connections(self.connections)
+        except Exception as e:
+            pool = self.pools.setdefault(name, PoolHealth(self.connections))
+            pool.warm = 0
+            pool.error = f"{type(e).__name__}: {e}"
+            logger.warning("Connection warm-up failed for %s: %s", name, pool.error)
+            return
+        if warm is None:
+            return  # adapter has no reusable pool
+        pool = self.pools.setdefault(name, PoolHealth(self.connections))
+        pool.warm = warm
+        pool.warmed_at = time.monotonic()
+        pool.error = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.warm()
+            await asyncio.sleep(self.refresh_seconds if self.ready else self.retry_seconds)
+
+    def start(self) -> None:
+        """Start warming and refreshing on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the refresh loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, object]:
+        """Readiness and per-provider pool health, for /health and /ready."""
+        return {"ready": self.ready, "pools": {name: pool.to_dict() for name, pool in self.pools.items()}}
@@ -0,0 +1,147 @@
+"""
+Suggestion Reranking
+
+Providers return suggestions in whatever order the model wrote them.
+``/suggest`` asks for a larger pool (``SUGGEST_CANDIDATES``), and when
+reranking is enabled this module orders it: the best three are shown and the
+rest become "more" pages.
+
+The model is linear: each candidate gets a small feature vector and its score
+is the dot product with a weight vector. All candidates are scored together
+with NumPy, and the context, candidates and style examples are embedded in a
+single ``style_index.embed`` call. The whole stage costs a few hundred
+microseconds (see backend/benchmarks/bench_rerank.py).
+
+Features (one column each, in ``FEATURES`` order):
+
+- ``tone_match``: 1 if the candidate's tone is one of the requested modes
+- ``tone_acceptance``: the user's smoothed acceptance rate for suggestions of
+  that tone, from the feedback counters (backend/feedback.py), centred on 0
+- ``length_fit``: minus the log-ratio between the candidate's length and the
+  mean length of suggestions the user accepted
+- ``context_similarity``: cosine similarity to the message being answered
+- ``style_similarity``: best cosine similarity to the user's own past replies
+  retrieved for this context (backend/style_index.py)
+- ``position``: the provider's order, as a weak prior
+
+Weights default to hand-set values. ``backend/rerank_eval.py`` replays logged
+feedback to measure a weight set and can fit a new one, which is loaded from
+``RERANK_WEIGHTS_PATH``.
+"""
+
+import json
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from backend import style_index
+from backend.providers.base import SuggestionItem
+
+FEATURES = ("tone_match", "tone_acceptance", "length_fit", "context_similarity", "style_similarity", "position")
+DEFAULT_WEIGHTS = {
+    "tone_match": 0.5,
+    "tone_acceptance": 1.0,
+    "length_fit": 0.6,
+    "context_similarity": 0.4,
+    "style_similarity": 0.8,
+    "position": 0.3,
+}
+DEFAULT_LENGTH = 60  # characters, until a user has accepted MIN_LENGTH_SAMPLES suggestions
+MIN_LENGTH_SAMPLES = 3
+
+
+def _acceptance(history: Mapping[str, float], tone: str) -> float:
+    used = history.get(f"mode:{tone}:accepted", 0.0) + history.get(f"mode:{tone}:edited", 0.0)
+    total = used + history.get(f"mode:{tone}:rejected", 0.0)
+    return (used + 1.0) / (total + 2.0) - 0.5  # Laplace-smoothed, 0 without history
+
+
+def features(
+    context: str,
+    candidates: Sequence[SuggestionItem],
+    modes: Sequence[str],
+    history: Optional[Mapping[str, float]] = None,
+    examples: Optional[Sequence[str]] = None,
+) -> np.ndarray:
+    """
+    Build the feature matrix of a candidate pool.
+
+    Args:
+        context: Message being answered
+        candidates: Suggestions in provider order
+        modes: Requested modes
+        history: The user's feedback counters (``FeedbackStore.profile``)
+        examples: The user's past replies retrieved for this context
+
+    Returns:
+        float32 array of shape (len(candidates), len(FEATURES))
+    """
+    n = len(candidates)
+    history = history or {}
+    examples = examples or []
+    out = np.zeros((n, len(FEATURES)), dtype=np.float32)
+    if not n:
+        return out
+    vectors = style_index.embed([c.text for c in candidates] + [context] + list(examples))
+
+    requested = {mode.lower() for mode in modes}
+    tones = [c.tone.lower() for c in candidates]
+    rates = {tone: _acceptance(history, tone) for tone in set(tones)}
+    out[:, 0] = [tone in requested for tone in tones]
+    out[:, 1] = [rates[tone] for tone in tones]
+
+    samples = history.get("used_samples", 0.0)
+    target = history["used_chars"] / samples if samples >= MIN_LENGTH_SAMPLES else DEFAULT_LENGTH
+    lengths = np.fromiter((len(c.text) for c in candidates), dtype=np.float32, count=n)
+    out[:, 2] = -np.abs(np.log((lengths + 1.0) / (target + 1.0)))
+
+    out[:, 3] = vectors[:n] @ vectors[n]
+    if examples:
+        out[:, 4] = (vectors[:n] @ vectors[n + 1:].T).max(axis=1)
+    out[:, 5] = -np.arange(n, dtype=np.float32) / n
+    return out
+
+
+class Reranker:
+    """
+    Linear scorer over ``FEATURES``.
+
+    Args:
+        weights: Feature name -> weight; missing features use ``DEFAULT_WEIGHTS``
+    """
+
+    def __init__(self, weights: Optional[Mapping[str, float]] = None):
+        unknown = set(weights or {}) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown rerank features: {', '.join(sorted(unknown))}")
+        merged = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.weights = np.array([merged[name] for name in FEATURES], dtype=np.float32)
+
+    @classmethod
+    def load(cls, path: str) -> "Reranker":
+        """Load weights from a JSON ``{feature: weight}`` file."""
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: float(w) for name, w in zip(FEATURES, self.weights)}
+
+    def rerank(
+        self,
+        context: str,
+        candidates: Sequence[SuggestionItem],
+        modes: Sequence[str],
+        history: Optional[Mapping[str, float]] = None,
+        examples: Optional[Sequence[str]] = None,
+        k: int = 3,
+    ) -> List[SuggestionItem]:
+        """
+        Return the ``k`` best candidates, best first.
+
+        Ties keep the provider's order. Arguments are as for ``features``.
+        """
+        if len(candidates) <= 1:
+            return list(candidates)[:k]
+        scores = features(context, candidates, modes, history, examples) @ self.weights
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [candidates[i] for i in order]
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Offline Reranker Evaluation
+
+Replays logged suggestion feedback from the telemetry log (see
+backend/telemetry_log.py) and measures how well a reranker weight set puts
+the suggestion the user picked at the top, compared with the provider's order.
+
+Clients log one event per shown pool::
+
+    {"type": "suggestions_shown", "user_id": "u1", "context": "...",
+     "modes": ["casual"], "suggestions": [{"text": "...", "tone": "casual"}, ...],
+     "chosen": 1, "action": "accepted", "final_length": 42}
+
+``chosen`` is the index of the suggestion the user used (null if none) and
+``suggestions`` is the whole pool in provider order. ``user_id`` may also come
+from the batch, as ``/telemetry`` adds it to every event. Events are replayed
+oldest first and each user's feedback counters are rebuilt along the way, so
+every pool is scored with only the history that existed when it was shown.
+Style examples are not logged, so ``style_similarity`` is 0 throughout.
+
+Reports mean reciprocal rank, top-1 and top-3 accuracy. With ``--fit`` it
+also learns weights by pairwise logistic regression (chosen vs. each other
+candidate) on the oldest 80% of pools, reports them on the newest 20%, and
+writes them as JSON for ``RERANK_WEIGHTS_PATH``.
+
+Usage (from the repository root):
+
+    python -m backend.rerank_eval data/telemetry [--weights w.json] [--fit out.json]
+"""
+
+import argparse
+import json
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend import rerank, telemetry_log
+from backend.feedback import FeedbackEvent, event_deltas
+from backend.providers.base import SuggestionItem
+
+EVENT_TYPE = "suggestions_shown"
+Sample = Tuple[np.ndarray, int]
+
+
+def _outcome_deltas(event: Dict[str, Any], pool: List[SuggestionItem], chosen: Optional[int]) -> Counter:
+    totals: Counter = Counter()
+    for i, item in enumerate(pool):
+        if i == chosen:
+            action = "edited" if event.get("action") == "edited" else "accepted"
+            final_length = event.get("final_length")
+        else:
+            action, final_length = "rejected", None
+        totals.update(event_deltas(FeedbackEvent.model_construct(
+            action=action, mode=item.tone, tone=None,
+            suggestion_length=len(item.text), final_length=final_length,
+        )))
+    return totals
+
+
+def samples(events: Iterable[Dict[str, Any]]) -> List[Sample]:
+    """
+    Turn logged pools into (feature matrix, chosen index) pairs.
+
+    Pools nobody picked from, or with a single candidate, only update the
+    replayed history.
+    """
+    history: Dict[str, Counter] = defaultdict(Counter)
+    out: List[Sample] = []
+    for event in events:
+        if event.get("type") != EVENT_TYPE:
+            continue
+        try:
+            pool = [SuggestionItem(text=s["text"], tone=s.get("tone") or "neutral") for s in event["suggestions"]]
+            context = str(event["context"])
+        except (KeyError, TypeError):
+            continue
+        chosen = event.get("chosen")
+        if not isinstance(chosen, int) or not 0 <= chosen < len(pool):
+            chosen = None
+        user = history[str(event.get("user_id", ""))]
+        if chosen is not None and len(pool) > 1:
+            out.append((rerank.features(context, pool, event.get("modes") or [], user), chosen))
+        user.update(_outcome_deltas(event, pool, chosen))
+    return out
+
+
+def evaluate(data: Sequence[Sample], weights: Optional[np.ndarray]) -> Dict[str, float]:
+    """
+    Ranking quality of a weight vector (None: the provider's order).
+
+    Returns:
+        ``{"pools", "mrr", "top1", "top3"}``
+    """
+    ranks = []
+    for features, chosen in data:
+        if weights is None:
+            rank = chosen
+        else:
+            scores = features @ weights
+            order = np.argsort(-scores, kind="stable")
+            rank = int(np.flatnonzero(order == chosen)[0])
+        ranks.append(rank)
+    ranks = np.asarray(ranks, dtype=np.float64)
+    if not ranks.size:
+        return {"pools": 0, "mrr": 0.0, "top1": 0.0, "top3": 0.0}
+    return {
+        "pools": int(ranks.size),
+        "mrr": float(np.mean(1.0 / (ranks + 1))),
+        "top1": float(np.mean(ranks == 0)),
+        "top3": float(np.mean(ranks < 3)),
+    }
+
+
+def fit(data: Sequence[Sample], epochs: int = 300, learning_rate: float = 0.5, l2: float = 1e-3) -> np.ndarray:
+    """Learn weights by pairwise logistic regression (full-batch gradient descent)."""
+    diffs = [features[chosen] - np.delete(features, chosen, axis=0) for features, chosen in data]
+    x = np.concatenate(diffs) if diffs else np.zeros((0, len(rerank.FEATURES)), dtype=np.float32)
+    weights = np.array([rerank.DEFAULT_WEIGHTS[name] for name in rerank.FEATURES], dtype=np.float64)
+    if not len(x):
+        return weights
+    for _ in range(epochs):
+        margins = x @ weights
+        gradient = -(x.T @ (1.0 / (1.0 + np.exp(margins)))) / len(x) + l2 * weights
+        weights -= learning_rate * gradient
+    return weights
+
+
+def _report(name: str, result: Dict[str, float]) -> None:
+    print(f"{name:<10} pools {result['pools']:>7}  MRR {result['mrr']:.3f}  "
+          f"top-1 {result['top1']:.1%}  top-3 {result['top3']:.1%}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("telemetry_dir", help="Telemetry log directory (TELEMETRY_DIR)")
+    parser.add_argument("--weights", help="JSON weights to evaluate instead of the defaults")
+    parser.add_argument("--fit", metavar="PATH", help="Fit weights and write them to PATH")
+    args = parser.parse_args(argv)
+
+    reranker = rerank.Reranker.load(args.weights) if args.weights else rerank.Reranker()
+    data = samples(telemetry_log.scan(args.telemetry_dir))
+    _report("provider", evaluate(data, None))
+    _report("reranked", evaluate(data, reranker.weights))
+    if args.fit:
+        split = int(len(data) * 0.8)
+        weights = fit(data[:split])
+        print(f"held-out newest {len(data) - split} pools:")
+        _report("provider", evaluate(data[split:], None))
+        _report("current", evaluate(data[split:], reranker.weights))
+        _report("fitted", evaluate(data[split:], weights))
+        with open(args.fit, "w") as f:
+            json.dump({name: round(float(w), 4) for name, w in zip(rerank.FEATURES, weights)}, f, indent=2)
+        print(f"wrote {args.fit}")
+
+
+if __name__ == "__main__":
+    main()
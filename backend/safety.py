@@ -0,0 +1,151 @@
+"""
+Output Safety Filter
+
+Provider output goes to the keyboard, so ``/suggest`` checks every suggestion
+against a blocklist for the request's locale and drops the ones that match.
+The gaps are filled from the over-generated pool and then from the local
+fallback provider (see ``_distinct_suggestions`` in backend/main.py), so
+filtering never costs another upstream call.
+
+Blocklists are text files named by locale (``en.txt``, ``pt-br.txt``) with one
+term or phrase per line and ``#`` comments. A trailing ``*`` also matches
+longer words (``darn*`` matches "darned"). The built-in lists in
+backend/blocklists are used unless ``SAFETY_BLOCKLIST_DIR`` points elsewhere.
+A locale's terms are always checked together with those of the default
+locale, and unknown locales fall back to their language, then to the default.
+
+Each locale's terms are compiled once into a single regular expression shaped
+as a trie (terms sharing a prefix share a branch), so a check is one linear
+scan of the suggestion however many terms there are. Texts and terms are
+compared after case folding, removing accents and undoing digit and symbol
+substitutions inside words ("5h1t", "a$$"). Filtering a pool of ten
+suggestions takes tens of microseconds (see backend/benchmarks/bench_safety.py)
+and shows up as the ``safety`` stage in traces and Server-Timing.
+"""
+
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Mapping, Optional, Pattern, Sequence
+
+from backend.providers.base import SuggestionItem
+
+BUILTIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blocklists")
+
+_LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s"})
+# Words containing a digit or symbol that may stand in for a letter
+_SUBSTITUTE = re.compile(r"[\d@$]")
+_SUBSTITUTED = re.compile(r"(?<![\w@$])[\w@$]*[\d@$][\w@$]*")
+_COMBINING = re.compile("[\u0300-\u036f]")
+
+
+def _unmask(match) -> str:
+    # Plain numbers are left alone
+    word = match.group()
+    return word.translate(_LEET) if not word.isalpha() and any(c.isalpha() for c in word) else word
+
+
+def fold(text: str) -> str:
+    """The form texts and terms are compared in."""
+    text = _COMBINING.sub("", unicodedata.normalize("NFKD", text.casefold()))
+    return _SUBSTITUTED.sub(_unmask, text) if _SUBSTITUTE.search(text) else text
+
+
+def _trie_regex(terms: Iterable[str]) -> str:
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def walk(node: dict) -> str:
+        branches = [(r"\s+" if ch == " " else re.escape(ch)) + walk(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if "" in node else "")
+
+    return walk(trie)
+
+
+def compile_terms(terms: Iterable[str]) -> Optional[Pattern]:
+    """Compile blocklist terms into one pattern over folded text (None if empty)."""
+    exact, prefixes = set(), set()
+    for term in terms:
+        term = " ".join(fold(term).split())
+        if term.endswith("*"):
+            term = term.rstrip("*").strip()
+            if term:
+                prefixes.add(term)
+        elif term:
+            exact.add(term)
+    parts = []
+    if exact:
+        parts.append(f"(?:{_trie_regex(exact)})(?!\\w)")
+    if prefixes:
+        parts.append(f"(?:{_trie_regex(prefixes)})")
+    if not parts:
+        return None
+    return re.compile(r"(?<!\w)(?:" + "|".join(parts) + ")")
+
+
+def read_blocklists(directory: str) -> Dict[str, List[str]]:
+    """Read ``<locale>.txt`` blocklists from a directory."""
+    blocklists: Dict[str, List[str]] = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".txt"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            terms = [line.split("#", 1)[0].strip() for line in f]
+        blocklists[name[:-4].lower()] = [t for t in terms if t]
+    return blocklists
+
+
+class SafetyFilter:
+    """
+    Per-locale blocklist filter.
+
+    Args:
+        blocklists: Locale tag -> terms
+        default_locale: Locale whose terms apply to every request, and which
+            requests for unknown locales use
+    """
+
+    def __init__(self, blocklists: Mapping[str, Iterable[str]], default_locale: str = "en"):
+        self.default_locale = default_locale.lower()
+        base = list(blocklists.get(self.default_locale, ()))
+        self._patterns: Dict[str, Optional[Pattern]] = {
+            locale.lower(): compile_terms(base + list(terms)) for locale, terms in blocklists.items()
+        }
+        self._patterns.setdefault(self.default_locale, compile_terms(base))
+
+    @classmethod
+    def load(cls, directory: Optional[str] = None, default_locale: str = "en") -> "SafetyFilter":
+        """Build a filter from a blocklist directory (the built-in lists by default)."""
+        return cls(read_blocklists(directory or BUILTIN_DIR), default_locale)
+
+    @property
+    def locales(self) -> List[str]:
+        return sorted(self._patterns)
+
+    def _pattern(self, locale: Optional[str]) -> Optional[Pattern]:
+        if locale:
+            tag = locale.lower().replace("_", "-")
+            for candidate in (tag, tag.split("-", 1)[0]):
+                if candidate in self._patterns:
+                    return self._patterns[candidate]
+        return self._patterns[self.default_locale]
+
+    def flagged(self, text: str, locale: Optional[str] = None) -> bool:
+        """True if ``text`` contains a blocked term."""
+        pattern = self._pattern(locale)
+        return pattern is not None and pattern.search(fold(text)) is not None
+
+    def filter(self, items: Sequence[SuggestionItem], locale: Optional[str] = None) -> List[SuggestionItem]:
+        """The suggestions without blocked terms, in order."""
+        pattern = self._pattern(locale)
+        if pattern is None:
+            return list(items)
+        return [item for item in items if pattern.search(fold(item.text)) is None]
@@ -0,0 +1,395 @@
+"""
+Shared Worker State
+
+This module holds the state that must stay consistent when the API runs as
+several worker processes (see backend/launcher.py): metric counters,
+rate-limit windows and cache version indices. (Personalization data lives in
+SQLite; see backend/personalization_store.py.)
+
+Every backend has two implementations with the same interface:
+- local: plain in-process structures, used when running a single worker
+- shared: a ``multiprocessing.shared_memory`` segment created by the launcher
+
+Shared counters keep one column per worker, so each worker is the only writer
+of its column and increments need no lock; readers sum the columns. Rate-limit
+and version tables are small open-addressed hash tables guarded by a single
+cross-process lock, held only for a few array reads and writes.
+
+Workers call ``attach()`` before the app is imported; the app then reads the
+module-level ``state``.
+"""
+
+import hashlib
+import logging
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DIGEST_BYTES = 16
+_PROBE_LIMIT = 16
+
+
+def key_digest(key: str) -> bytes:
+    """Stable 16-byte digest used to identify names and keys in shared tables."""
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=_DIGEST_BYTES).digest()
+
+
+def _key_hash(key: str) -> int:
+    value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+    return value or 1  # 0 marks an empty bucket
+
+
+# -- counters -----------------------------------------------------------------
+
+
+class LocalCounters:
+    """In-process counter storage with the same interface as SharedCounters."""
+
+    shared = False
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.local_values = [0.0] * capacity
+        self._slots: Dict[bytes, int] = {}
+
+    def slot(self, name: str) -> int:
+        """Return the slot index for a counter name, allocating it on first use."""
+        digest = key_digest(name)
+        slot = self._slots.get(digest)
+        if slot is None:
+            if len(self._slots) >= self.capacity:
+                raise RuntimeError("Counter capacity exhausted")
+            slot = self._slots[digest] = len(self._slots)
+        return slot
+
+    def value(self, slot: int) -> float:
+        return self.local_values[slot]
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        self.local_values[self.slot(name)] += amount
+
+    def get(self, name: str) -> float:
+        return self.value(self.slot(name))
+
+    def names(self, prefix: str = "") -> List[str]:
+        """Names of all allocated counters starting with ``prefix``."""
+        return []  # every child lives in this process, so nothing to discover
+
+
+class SharedCounters(LocalCounters):
+    """
+    Named float64 counters in shared memory, one column per worker.
+
+    Layout: ``capacity`` name entries (16-byte digest, 1-byte length and up to
+    111 bytes of the name itself, so other workers can discover the series),
+    followed by ``workers`` columns of ``capacity`` float64 values.
+    ``local_values`` is this worker's column.
+    """
+
+    shared = True
+    _ENTRY = 128
+    _TEXT = _ENTRY - _DIGEST_BYTES - 1
+
+    def __init__(self, shm: shared_memory.SharedMemory, lock, capacity: int, workers: int, worker_index: int):
+        self.capacity = capacity
+        self.workers = workers
+        self._lock = lock
+        self._names = shm.buf[: capacity * self._ENTRY]
+        values_offset = capacity * self._ENTRY
+        self._all_values = shm.buf[values_offset: values_offset + capacity * workers * 8].cast("d")
+        self.local_values = self._all_values[worker_index * capacity: (worker_index + 1) * capacity]
+        self._slots: Dict[bytes, int] = {}
+
+    @classmethod
+    def size(cls, capacity: int, workers: int) -> int:
+        return capacity * cls._ENTRY + capacity * workers * 8
+
+    def slot(self, name: str) -> int:
+        digest = key_digest(name)
+        slot = self._slots.get(digest)
+        if slot is not None:
+            return slot
+        empty = bytes(_DIGEST_BYTES)
+        with self._lock:
+            for index in range(self.capacity):
+                offset = index * self._ENTRY
+                stored = bytes(self._names[offset: offset + _DIGEST_BYTES])
+                if stored == digest:
+                    break
+                if stored == empty:
+                    text = name.encode("utf-8")
+                    length = len(text) if len(text) <= self._TEXT else 255  # 255: not discoverable
+                    entry = digest + bytes([length]) + text[: self._TEXT].ljust(self._TEXT, b"\0")
+                    self._names[offset: offset + self._ENTRY] = entry
+                    break
+            else:
+                raise RuntimeError("Counter capacity exhausted")
+        self._slots[digest] = index
+        return index
+
+    def names(self, prefix: str = "") -> List[str]:
+        """Names of all allocated counters (by any worker) starting with ``prefix``."""
+        found = []
+        empty = bytes(_DIGEST_BYTES)
+        for index in range(self.capacity):
+            offset = index * self._ENTRY
+            if bytes(self._names[offset: offset + _DIGEST_BYTES]) == empty:
+                break
+            length = self._names[offset + _DIGEST_BYTES]
+            if length == 255:
+                continue
+            start = offset + _DIGEST_BYTES + 1
+            name = bytes(self._names[start: start + length]).decode("utf-8")
+            if name.startswith(prefix):
+                found.append(name)
+        return found
+
+    def value(self, slot: int) -> float:
+        return sum(self._all_values[worker * self.capacity + slot] for worker in range(self.workers))
+
+    def release(self) -> None:
+        """Drop buffer views so the segment can be closed."""
+        for view in (self.local_values, self._all_values, self._names):
+            view.release()
+
+
+# -- hashed tables ------------------------------------------------------------
+
+
+class _SharedTable:
+    """
+    Fixed-size open-addressed table of (key_hash, a, b) int64 triples.
+
+    The header holds a table-wide generation counter. All access happens under
+    the cross-process lock.
+    """
+
+    _HEADER = 8
+    _BUCKET = struct.Struct("<qqq")
+
+    def __init__(self, buf: memoryview, capacity: int, lock):
+        self._buf = buf
+        self.capacity = capacity
+        self._lock = lock
+
+    @classmethod
+    def size(cls, capacity: int) -> int:
+        return cls._HEADER + capacity * cls._BUCKET.size
+
+    def _read(self, index: int) -> Tuple[int, int, int]:
+        return self._BUCKET.unpack_from(self._buf, self._HEADER + index * self._BUCKET.size)
+
+    def _write(self, index: int, key: int, a: int, b: int) -> None:
+        self._BUCKET.pack_into(self._buf, self._HEADER + index * self._BUCKET.size, key, a, b)
+
+    def _next_generation(self) -> int:
+        generation = struct.unpack_from("<q", self._buf, 0)[0] + 1
+        struct.pack_into("<q", self._buf, 0, generation)
+        return generation
+
+    def _find(self, key: int, reusable) -> Tuple[int, bool]:
+        """Return (bucket, found) for ``key``; reuse an empty or stale bucket otherwise."""
+        start = key % self.capacity
+        candidate = None
+        for probe in range(min(_PROBE_LIMIT, self.capacity)):
+            index = (start + probe) % self.capacity
+            stored, a, b = self._read(index)
+            if stored == key:
+                return index, True
+            if candidate is None and (stored == 0 or reusable(a, b)):
+                candidate = index
+        return (candidate if candidate is not None else start), False
+
+    def release(self) -> None:
+        self._buf.release()
+
+
+class LocalRateLimiter:
+    """Fixed-window request counter per key, kept in process memory."""
+
+    shared = False
+
+    def __init__(self):
+        self._windows: Dict[str, Tuple[int, int]] = {}
+
+    def hit(self, key: str, limit: int, window_seconds: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        """
+        Count a request for ``key`` and decide whether it is within the limit.
+
+        Returns:
+            (allowed, retry_after_seconds)
+        """
+        now = time.time() if now is None else now
+        window_start = int(now // window_seconds) * window_seconds
+        start, count = self._windows.get(key, (window_start, 0))
+        if start != window_start:
+            start, count = window_start, 0
+        count += 1
+        self._windows[key] = (start, count)
+        if len(self._windows) > 100_000:
+            self._windows = {k: v for k, v in self._windows.items() if v[0] == window_start}
+        return count <= limit, max(1, int(start + window_seconds - now))
+
+
+class SharedRateLimiter(_SharedTable):
+    """Fixed-window request counter per key, shared by all workers."""
+
+    shared = True
+
+    def hit(self, key: str, limit: int, window_seconds: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        now = time.time() if now is None else now
+        window_start = int(now // window_seconds) * window_seconds
+        key_hash = _key_hash(key)
+        with self._lock:
+            index, found = self._find(key_hash, lambda start, count: start != window_start)
+            start, count = self._read(index)[1:] if found else (window_start, 0)
+            if start != window_start:
+                start, count = window_start, 0
+            count += 1
+            self._write(index, key_hash, start, count)
+        return count <= limit, max(1, int(start + window_seconds - now))
+
+
+class LocalVersionIndex:
+    """Per-key version numbers used to invalidate cache entries."""
+
+    shared = False
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._generation = 0
+
+    def version(self, key: str) -> int:
+        """Current version for ``key`` (0 if it was never bumped)."""
+        return self._versions.get(key, 0)
+
+    def bump(self, key: str) -> int:
+        """Invalidate everything cached under ``key`` and return the new version."""
+        self._generation += 1
+        self._versions[key] = self._generation
+        return self._generation
+
+
+class SharedVersionIndex(_SharedTable):
+    """
+    Per-key version numbers shared by all workers.
+
+    Versions come from a table-wide generation counter, so they never repeat
+    even when a key's bucket is evicted and later reused; a cache entry stored
+    under an old version can therefore never look current again.
+    """
+
+    shared = True
+
+    def version(self, key: str) -> int:
+        key_hash = _key_hash(key)
+        with self._lock:
+            index, found = self._find(key_hash, lambda a, b: False)
+            return self._read(index)[1] if found else 0
+
+    def bump(self, key: str) -> int:
+        key_hash = _key_hash(key)
+        with self._lock:
+            index, _ = self._find(key_hash, lambda a, b: False)
+            generation = self._next_generation()
+            self._write(index, key_hash, generation, 0)
+        return generation
+
+
+# -- state bundle -------------------------------------------------------------
+
+
+class StateHandles:
+    """Picklable references a worker needs to attach to the shared state."""
+
+    def __init__(self, shm_name: str, lock, workers: int, capacity: int):
+        self.shm_name = shm_name
+        self.lock = lock
+        self.workers = workers
+        self.capacity = capacity
+
+
+class WorkerState:
+    """The state backends used by one process."""
+
+    def __init__(
+        self,
+        counters: LocalCounters,
+        rate_limiter,
+        cache_index,
+        shm: Optional[shared_memory.SharedMemory] = None,
+        worker_index: int = 0,
+    ):
+        self.counters = counters
+        self.rate_limiter = rate_limiter
+        self.cache_index = cache_index
+        self.worker_index = worker_index
+        self._shm = shm
+
+    @property
+    def shared(self) -> bool:
+        return self._shm is not None
+
+    def close(self) -> None:
+        """Release this process's views of the shared segment."""
+        if self._shm is None:
+            return
+        self.counters.release()
+        self.rate_limiter.release()
+        self.cache_index.release()
+        self._shm.close()
+        self._shm = None
+
+
+def local_state(capacity: int = 4096) -> WorkerState:
+    """State for a single-process deployment."""
+    return WorkerState(LocalCounters(capacity), LocalRateLimiter(), LocalVersionIndex())
+
+
+def _layout(capacity: int, workers: int) -> Tuple[int, int, int]:
+    counters_size = SharedCounters.size(capacity, workers)
+    table_size = _SharedTable.size(capacity)
+    return counters_size, table_size, counters_size + 2 * table_size
+
+
+def create_shared(workers: int, capacity: int, ctx) -> Tuple[StateHandles, shared_memory.SharedMemory]:
+    """
+    Create the shared segment in the launcher process.
+
+    Args:
+        workers: Number of worker processes (one counter column each)
+        capacity: Slots per counter column and buckets per hash table
+        ctx: multiprocessing context used to create the lock
+
+    Returns:
+        (handles to pass to workers, the owning SharedMemory to unlink on exit)
+    """
+    total = _layout(capacity, workers)[2]
+    shm = shared_memory.SharedMemory(create=True, size=total)
+    shm.buf[:total] = bytes(total)
+    handles = StateHandles(shm.name, ctx.Lock(), workers, capacity)
+    return handles, shm
+
+
+def attach(handles: StateHandles, worker_index: int) -> WorkerState:
+    """Attach this worker to the shared segment and make it the module state."""
+    global state
+    shm = shared_memory.SharedMemory(name=handles.shm_name)
+    counters_size, table_size, _ = _layout(handles.capacity, handles.workers)
+    buf = shm.buf
+    state = WorkerState(
+        SharedCounters(shm, handles.lock, handles.capacity, handles.workers, worker_index),
+        SharedRateLimiter(buf[counters_size: counters_size + table_size], handles.capacity, handles.lock),
+        SharedVersionIndex(buf[counters_size + table_size: counters_size + 2 * table_size], handles.capacity, handles.lock),
+        shm=shm,
+        worker_index=worker_index,
+    )
+    logger.info("Worker %d attached to shared state %s", worker_index, handles.shm_name)
+    return state
+
+
+# Module state read by the app; replaced by attach() in multi-worker deployments
+state: WorkerState = local_state()
@@ -0,0 +1,265 @@
+"""
+Per-User Style Retrieval Index
+
+This module finds the user's own past replies that best match the message
+being answered. ``/suggest`` passes them to providers as few-shot style
+examples, a retrieval-augmented prompt over the user's own writing.
+
+Everything runs on the CPU with NumPy:
+
+- Embedding: word unigrams/bigrams and character trigrams are hashed into a
+  fixed-size signed vector (the hashing trick) and L2-normalised. No model
+  and no vocabulary are needed, and texts embed in tens of microseconds.
+- Approximate nearest neighbours: random-hyperplane LSH gives each vector a
+  32-bit signature. A query ranks entries by the Hamming distance between
+  signatures, then re-scores the closest few by exact cosine similarity.
+
+Each user's index is a single file written by the personalization training
+job (backend/training.py) and replaced atomically. Readers memory-map it:
+opening costs no parsing and no copy, and pages are shared between worker
+processes through the OS page cache. Layout (little-endian)::
+
+    header   magic "RSIX", version, dim, bits, count, text bytes
+    codes    count x uint32 LSH signatures
+    vectors  count x dim int8 embeddings of the matched text (x 127)
+    offsets  (count + 1) x uint32 into the text blob
+    texts    UTF-8 replies, concatenated
+"""
+
+import functools
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.personalization_store import LruTier
+
+DIM = 256
+BITS = 32
+MAX_EXAMPLES = 2000
+MAX_EXAMPLE_CHARS = 200
+
+_MAGIC = b"RSIX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIIIIQ")
+# Fixed seed: signatures written by one process must match queries in another
+_PLANES = np.random.default_rng(0x5EED).standard_normal((BITS, DIM)).astype(np.float32)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_WORD_SPLIT = str.maketrans({c: " " for c in ".,!?;:\"()[]{}"})
+
+
+@functools.lru_cache(maxsize=65536)
+def _word_hashes(word: str) -> Tuple[int, ...]:
+    # Hashes of a word and its character trigrams; words repeat across texts,
+    # so these are computed once per worker
+    padded = f"<{word}>"
+    return (zlib.crc32(word.encode()),) + tuple(zlib.crc32(padded[i:i + 3].encode()) for i in range(len(padded) - 2))
+
+
+def embed(texts: Sequence[str]) -> np.ndarray:
+    """
+    Embed texts with feature hashing.
+
+    All texts are hashed into one array and accumulated with a single
+    ``np.bincount``, so a batch costs little more than its longest text.
+
+    Returns:
+        float32 array of shape (len(texts), DIM), rows L2-normalised
+    """
+    hashes: List[int] = []
+    counts = []
+    for text in texts:
+        words = text.lower().translate(_WORD_SPLIT).split()
+        start = len(hashes)
+        for word in words:
+            hashes += _word_hashes(word)
+        hashes += [zlib.crc32(f"{a} {b}".encode()) for a, b in zip(words, words[1:])]
+        counts.append(len(hashes) - start)
+    codes = np.array(hashes, dtype=np.uint32)
+    rows = np.repeat(np.arange(len(texts)), counts)
+    signs = np.where(codes & 0x80000000, -1.0, 1.0)
+    out = np.bincount(rows * DIM + codes % DIM, weights=signs, minlength=len(texts) * DIM)
+    out = out.reshape(len(texts), DIM).astype(np.float32)
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+
+def signatures(vectors: np.ndarray) -> np.ndarray:
+    """LSH signatures (one bit per random hyperplane) as uint32."""
+    bits = (vectors @ _PLANES.T) > 0
+    return np.packbits(bits, axis=1, bitorder="little").view("<u4").ravel()
+
+
+def _hamming(codes: np.ndarray, code: int) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(codes ^ np.uint32(code))
+    return _POPCOUNT[(codes ^ np.uint32(code)).view(np.uint8)].reshape(-1, 4).sum(axis=1)
+
+
+def write(path: str, pairs: Iterable[Tuple[Optional[str], str]]) -> int:
+    """
+    Build an index file from (context, reply) pairs and atomically install it.
+
+    Entries are matched on the context a reply answered, or on the reply
+    itself when the context is unknown. Duplicate replies keep their most
+    recent occurrence, and only the newest ``MAX_EXAMPLES`` are kept.
+
+    Returns:
+        Number of entries written
+    """
+    latest = {}
+    for context, reply in pairs:
+        reply = reply.strip()[:MAX_EXAMPLE_CHARS]
+        if reply:
+            latest.pop(reply, None)
+            latest[reply] = context or reply
+    replies = list(latest)[-MAX_EXAMPLES:]
+    vectors = embed([latest[r] for r in replies])
+    blobs = [r.encode() for r in replies]
+    offsets = np.zeros(len(blobs) + 1, dtype="<u4")
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, DIM, BITS, len(replies), int(offsets[-1])))
+            f.write(signatures(vectors).astype("<u4").tobytes())
+            f.write(np.round(vectors * 127).astype(np.int8).tobytes())
+            f.write(offsets.tobytes())
+            f.write(b"".join(blobs))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return len(replies)
+
+
+class StyleIndex:
+    """A read-only, memory-mapped index file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, dim, bits, count, text_bytes = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION or dim != DIM or bits != BITS:
+            raise ValueError(f"{path} is not a compatible style index")
+        self.count = count
+        offset = _HEADER.size
+        self.codes = np.frombuffer(self._map, dtype="<u4", count=count, offset=offset)
+        offset += 4 * count
+        self.vectors = np.frombuffer(self._map, dtype=np.int8, count=count * dim, offset=offset).reshape(count, dim)
+        offset += count * dim
+        self.offsets = np.frombuffer(self._map, dtype="<u4", count=count + 1, offset=offset)
+        self._texts = offset + 4 * (count + 1)
+        self.size = len(self._map)
+
+    def text(self, i: int) -> str:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self._map[self._texts + start:self._texts + end].decode()
+
+    def search(self, vector: np.ndarray, k: int, candidates: int = 64, min_score: float = 0.05) -> List[str]:
+        """
+        Return up to ``k`` replies whose matched text is most similar to ``vector``.
+
+        Args:
+            vector: Query embedding (see ``embed``)
+            k: Number of results
+            candidates: Entries closest in Hamming distance that are re-scored exactly
+            min_score: Cosine similarity below which entries are not returned
+        """
+        if not self.count or k <= 0:
+            return []
+        if self.count > candidates:
+            code = int(signatures(vector[None, :])[0])
+            pool = np.argpartition(_hamming(self.codes, code), candidates)[:candidates]
+        else:
+            pool = np.arange(self.count)
+        scores = (self.vectors[pool].astype(np.float32) @ vector) / 127.0
+        order = np.argsort(-scores)[:k]
+        return [self.text(int(pool[i])) for i in order if scores[i] >= min_score]
+
+
+class StyleIndexStore:
+    """
+    Per-user index files with a bounded cache of open memory maps.
+
+    Args:
+        directory: Directory holding one file per user
+        max_open: Indexes kept mapped
+        versions: Version index used to notice rebuilds made by other
+            processes (``shared_state.state.cache_index``); None for a single process
+        on_lookup: Optional hook called with True/False for cache hits/misses
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_open: int = 1024,
+        versions=None,
+        on_lookup: Optional[Callable[[bool], None]] = None,
+    ):
+        self.directory = directory
+        self._versions = versions
+        self._on_lookup = on_lookup
+        self._open = LruTier(max_open, max_open)
+        self._lock = threading.Lock()
+
+    def path(self, user_id: str) -> str:
+        """Index file of a user (named by a digest, so ids never touch the path)."""
+        return os.path.join(self.directory, hashlib.sha256(user_id.encode()).hexdigest()[:32] + ".idx")
+
+    def _version(self, user_id: str) -> int:
+        return self._versions.version("style:" + user_id) if self._versions is not None else 0
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the cached map after the user's file was rebuilt or removed."""
+        if self._versions is not None:
+            self._versions.bump("style:" + user_id)
+        with self._lock:
+            self._open.discard(user_id)
+
+    def get(self, user_id: str) -> Optional[StyleIndex]:
+        """Return the user's mapped index, or None if they have none."""
+        version = self._version(user_id)
+        with self._lock:
+            hit, index = self._open.get(user_id, version)
+        if not hit:
+            if version == 0 and self._versions is not None:
+                version = self._versions.bump("style:" + user_id)  # see PersonalizationStore._lookup
+            try:
+                index = StyleIndex(self.path(user_id))
+            except (OSError, ValueError):
+                index = None
+            with self._lock:
+                self._open.put(user_id, version, index, 1)
+        if self._on_lookup is not None:
+            self._on_lookup(hit)
+        return index
+
+    def examples(self, user_id: str, context: str, k: int) -> List[str]:
+        """Top-``k`` past replies of the user for a conversation context."""
+        index = self.get(user_id)
+        if index is None:
+            return []
+        return index.search(embed([context])[0], k)
+
+    def delete(self, user_id: str) -> bool:
+        """Remove the user's index; returns True if there was one."""
+        try:
+            os.remove(self.path(user_id))
+            deleted = True
+        except FileNotFoundError:
+            deleted = False
+        self.invalidate(user_id)
+        return deleted
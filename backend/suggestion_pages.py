@@ -0,0 +1,92 @@
+"""
+Suggestion Pages
+
+``/suggest`` asks the provider for more suggestions than it shows
+(``SUGGEST_CANDIDATES``). The first three are returned and the rest are kept
+here, so a request with ``"more": true`` is answered from memory instead of
+another model call.
+
+Entries are keyed by user, context, modes, intensity and provider, where the
+context is canonical (backend/canonical.py) unless ``CANONICALIZE_ENABLED`` is
+off; ``/suggest`` then stores suggestions masked. They expire
+after ``CACHE_TTL`` seconds and the least recently used ones are evicted
+beyond ``MAX_CACHE_SIZE``. Each page is removed as it is served, so a user
+never sees the same suggestion twice. The cache is per worker: a "more"
+request routed to another worker misses and is generated as usual.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from backend.providers.base import SuggestionItem
+
+
+def page_key(user_id: str, context: str, modes: Sequence[str], intensity: int, provider: str) -> bytes:
+    """Cache key of a request (a digest, so contexts are not kept as keys)."""
+    parts = "\0".join([user_id, context.strip(), ",".join(m.lower() for m in modes), str(intensity), provider])
+    return hashlib.blake2b(parts.encode(), digest_size=16).digest()
+
+
+class SuggestionPages:
+    """
+    Per-worker TTL + LRU cache of suggestions not yet shown.
+
+    Only touched from the event loop thread, so no locking is needed.
+
+    Args:
+        max_entries: Requests whose leftovers are kept
+        ttl_seconds: Lifetime of an entry from when it was stored
+        on_lookup: Optional hook called with True/False for cache hits/misses
+        clock: Time source (seconds), replaceable in tests
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 300.0,
+        on_lookup: Optional[Callable[[bool], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._on_lookup = on_lookup
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[float, List[SuggestionItem]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, key: bytes, suggestions: Sequence[SuggestionItem]) -> None:
+        """Store the suggestions left over from a request, replacing older ones."""
+        self._entries.pop(key, None)
+        if not suggestions or self.max_entries <= 0:
+            return
+        self._entries[key] = (self._clock() + self.ttl_seconds, list(suggestions))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def take(self, key: bytes, count: int = 3) -> Optional[Tuple[List[SuggestionItem], int]]:
+        """
+        Remove and return the next page.
+
+        Returns:
+            ``(page, remaining)``, or None if nothing is cached for the key
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            del self._entries[key]
+            entry = None
+        if self._on_lookup is not None:
+            self._on_lookup(entry is not None)
+        if entry is None:
+            return None
+        expires, suggestions = entry
+        page, rest = suggestions[:count], suggestions[count:]
+        if rest:
+            self._entries[key] = (expires, rest)
+            self._entries.move_to_end(key)
+        else:
+            del self._entries[key]
+        return page, len(rest)
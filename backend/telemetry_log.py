@@ -0,0 +1,277 @@
+"""
+Telemetry Ingestion Log
+
+This module takes in batched client telemetry (suggestion acceptance events
+and the like) at far higher rates than ``/suggest`` and keeps request-path
+work to a minimum.
+
+The request handler appends a parsed batch to a bounded in-memory ring buffer
+and returns. When the buffer is full, new batches are dropped and counted;
+the handler never waits for the disk. A writer thread drains the buffer, encodes the
+events and appends them to the current log segment. All events pending at
+that moment go out in one write (and one fsync when enabled). This is a group
+commit: under load the cost of each flush is shared by more events, and when
+the log is quiet a batch waits at most ``flush_interval`` seconds.
+
+Segments are append-only files that roll over at ``segment_bytes``. Each API
+worker writes its own segments, so writers need no cross-process locking.
+Each record is framed as::
+
+    <u32 length><u32 crc32><JSON payload>
+
+Offline consumers read segments with ``read_segment``/``scan``, which walk a
+memory-mapped view of each file and stop at a torn or partially written
+tail, so live segments can be read while they are still being appended to.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("<II")
+SEGMENT_SUFFIX = ".seg"
+
+
+class TelemetryLog:
+    """
+    Ring-buffered, group-committed, segmented append-only event log.
+
+    Args:
+        directory: Directory holding the segment files
+        writer_id: Distinguishes writer processes in segment names
+        buffer_events: Events held in memory awaiting a flush; batches that
+            do not fit are dropped
+        buffer_bytes: Approximate bytes held in memory awaiting a flush
+        flush_events: Pending events that trigger a flush before the interval
+        flush_interval: Longest time in seconds an accepted event waits to be written
+        segment_bytes: Size at which a segment is closed and a new one started
+        max_segments: Segments this writer keeps; older ones are deleted (0 keeps all)
+        fsync: fsync after each group commit
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        writer_id: int = 0,
+        buffer_events: int = 100000,
+        buffer_bytes: int = 32 * 1024 * 1024,
+        flush_events: int = 2000,
+        flush_interval: float = 0.2,
+        segment_bytes: int = 64 * 1024 * 1024,
+        max_segments: int = 0,
+        fsync: bool = False,
+    ):
+        self.directory = directory
+        self.writer_id = writer_id
+        self.buffer_events = buffer_events
+        self.buffer_bytes = buffer_bytes
+        self.flush_events = flush_events
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.fsync = fsync
+
+        self._pending: deque = deque()
+        self._pending_events = 0
+        self._pending_bytes = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._segment: Optional[Tuple[str, int, int]] = None  # (path, fd, size)
+        self._segments: deque = deque()
+
+        self.accepted = 0
+        self.dropped = 0
+        self.written = 0
+        self.flushes = 0
+
+    def append(self, events: List[Dict[str, Any]], size_hint: int, common: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Queue a batch of events for the log.
+
+        Never blocks on I/O: if the batch does not fit in the buffer it is
+        dropped.
+
+        Args:
+            events: JSON-serializable events
+            size_hint: Approximate encoded size of the batch (e.g. request body length)
+            common: Fields added to every event of the batch when it is written
+
+        Returns:
+            True if the batch was accepted
+        """
+        if self._thread is None:
+            self._start()
+        count = len(events)
+        with self._lock:
+            if (self._pending_events + count > self.buffer_events
+                    or self._pending_bytes + size_hint > self.buffer_bytes):
+                self.dropped += count
+                return False
+            self._pending.append((events, common))
+            self._pending_events += count
+            self._pending_bytes += size_hint
+            self.accepted += count
+            wake = self._pending_events >= self.flush_events
+        if wake:
+            self._wakeup.set()
+        return True
+
+    @property
+    def pending(self) -> int:
+        return self._pending_events
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Telemetry flush failed")
+
+    def flush(self) -> int:
+        """
+        Write every pending event as one group commit.
+
+        Returns:
+            Number of events written
+        """
+        with self._write_lock:
+            with self._lock:
+                batches, self._pending = self._pending, deque()
+                self._pending_events = 0
+                self._pending_bytes = 0
+            if not batches:
+                return 0
+            frames = []
+            count = 0
+            for events, common in batches:
+                for event in events:
+                    if common:
+                        event = {**common, **event}
+                    payload = json.dumps(event, separators=(",", ":"), ensure_ascii=False).encode()
+                    frames.append(_HEADER.pack(len(payload), zlib.crc32(payload)))
+                    frames.append(payload)
+                    count += 1
+            self._write(b"".join(frames))
+            self.written += count
+            self.flushes += 1
+            return count
+
+    def _write(self, data: bytes) -> None:
+        if self._segment is None or self._segment[2] >= self.segment_bytes:
+            self._roll()
+        path, fd, size = self._segment
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        if self.fsync:
+            os.fsync(fd)
+        self._segment = (path, fd, size + len(data))
+
+    def _roll(self) -> None:
+        if self._segment is not None:
+            os.close(self._segment[1])
+        os.makedirs(self.directory, exist_ok=True)
+        # Zero-padded wall-clock prefix: lexical order is (roughly) write order across writers
+        name = f"{time.time_ns():020d}-{self.writer_id:03d}{SEGMENT_SUFFIX}"
+        path = os.path.join(self.directory, name)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        self._segment = (path, fd, 0)
+        self._segments.append(path)
+        while self.max_segments and len(self._segments) > self.max_segments:
+            try:
+                os.remove(self._segments.popleft())
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """Flush pending events, stop the writer and close the segment."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.flush()
+        with self._write_lock:
+            if self._segment is not None:
+                os.close(self._segment[1])
+                self._segment = None
+        self._stopping = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Buffer occupancy and counters, for /health."""
+        return {
+            "pending": self._pending_events,
+            "pending_bytes": self._pending_bytes,
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "written": self.written,
+            "flushes": self.flushes,
+            "segment": os.path.basename(self._segment[0]) if self._segment else None,
+        }
+
+
+def read_segment(path: str, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Read the records of one segment through a memory map.
+
+    Args:
+        path: Segment file
+        offset: Byte offset of the first record to read (a previously
+            returned offset, to resume)
+
+    Yields:
+        (offset just past the record, event) pairs; stops at a torn or
+        corrupt tail
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= offset:
+            return
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as view:
+            while offset + _HEADER.size <= size:
+                length, crc = _HEADER.unpack_from(view, offset)
+                start = offset + _HEADER.size
+                end = start + length
+                if end > size:
+                    return
+                payload = view[start:end]
+                if zlib.crc32(payload) != crc:
+                    logger.warning("Corrupt telemetry record in %s at %d", path, offset)
+                    return
+                offset = end
+                yield offset, json.loads(payload)
+
+
+def segments(directory: str) -> List[str]:
+    """Segment files under ``directory``, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory) if n.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, n) for n in names]
+
+
+def scan(directory: str) -> Iterator[Dict[str, Any]]:
+    """Yield every event in the log, segment by segment."""
+    for path in segments(directory):
+        for _, event in read_segment(path):
+            yield event
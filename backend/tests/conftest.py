@@ -0,0 +1,15 @@
+"""
+Shared test configuration.
+"""
+
+import os
+import tempfile
+
+# Keep the personalization data created by backend.main out of the working tree
+_data_dir = tempfile.mkdtemp(prefix="replyai-tests-")
+os.environ.setdefault("PERSONALIZATION_DB_PATH", os.path.join(_data_dir, "personalization.db"))
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_data_dir, "uploads"))
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(_data_dir, "jobs.db"))
+os.environ.setdefault("TELEMETRY_DIR", os.path.join(_data_dir, "telemetry"))
+os.environ.setdefault("STYLE_INDEX_DIR", os.path.join(_data_dir, "style_index"))
+os.environ.setdefault("HOT_CONTEXTS_PATH", os.path.join(_data_dir, "hot_contexts.tbl"))
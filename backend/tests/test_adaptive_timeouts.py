@@ -0,0 +1,150 @@
+"""
+Tests for adaptive provider timeouts.
+"""
+
+import asyncio
+import random
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.config import Settings
+from backend.providers.base import ProviderError, SuggestionItem, SuggestResponse
+from backend.providers.timeouts import AdaptiveTimeouts, LatencySketch
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def timeouts(clock):
+    return AdaptiveTimeouts(quantile=0.9, margin_seconds=0.5, min_seconds=1.0, min_samples=10, clock=clock)
+
+
+def _sleep(clock, seconds, error=None):
+    async def call():
+        clock.now += seconds
+        if error is not None:
+            raise error
+        return "ok"
+    return call()
+
+
+def _observe(timeouts, seconds, n, provider="gemini", model="flash"):
+    for _ in range(n):
+        timeouts.observe(provider, model, seconds)
+
+
+class TestLatencySketch:
+    """Test suite for LatencySketch."""
+
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(0)
+        samples = [rng.lognormvariate(0, 0.8) for _ in range(5000)]
+        sketch = LatencySketch(window=10000)
+        for s in samples:
+            sketch.add(s)
+        for q in (0.5, 0.9, 0.99):
+            assert sketch.quantile(q) == pytest.approx(np.quantile(samples, q), rel=0.03)
+
+    def test_old_samples_fade_out(self):
+        sketch = LatencySketch(window=100)
+        for _ in range(1000):
+            sketch.add(5.0)
+        for _ in range(1000):
+            sketch.add(0.5)
+        assert sketch.quantile(0.99) == pytest.approx(0.5, rel=0.02)
+        assert sketch.count < 200 and sketch.total == 2000
+
+    def test_empty(self):
+        assert LatencySketch().quantile(0.5) is None
+
+
+class TestAdaptiveTimeouts:
+    """Test suite for AdaptiveTimeouts."""
+
+    def test_configured_timeout_until_enough_samples(self, timeouts):
+        _observe(timeouts, 2.0, 9)
+        assert timeouts.call("gemini", "flash", 10).seconds == 10
+        _observe(timeouts, 2.0, 1)
+        assert timeouts.call("gemini", "flash", 10).seconds == pytest.approx(2.5, rel=0.02)
+        assert timeouts.call("gemini", "pro", 10).seconds == 10  # per model
+
+    def test_clamped_to_minimum_and_configured(self, timeouts):
+        _observe(timeouts, 0.1, 10)
+        assert timeouts.call("gemini", "flash", 10).seconds == 1.0
+        _observe(timeouts, 30.0, 100, model="slow")
+        assert timeouts.call("gemini", "slow", 10).seconds == 10
+
+    def test_disabled(self, timeouts):
+        _observe(timeouts, 2.0, 10)
+        timeouts.configure(enabled=False)
+        assert timeouts.call("gemini", "flash", 10).seconds == 10
+
+    def test_budget_caps_the_timeout(self, timeouts, clock):
+        async def scenario():
+            timeouts.start_budget(3.0)
+            first = timeouts.call("gemini", "flash", 10)
+            clock.now += 2.5
+            second = timeouts.call("gemini", "flash", 10)
+            clock.now += 1.0
+            with pytest.raises(ProviderError) as e:
+                timeouts.call("gemini", "flash", 10)
+            return first.seconds, second.seconds, e.value.retryable
+
+        assert asyncio.run(scenario()) == (3.0, pytest.approx(0.5), False)
+        assert timeouts.remaining_budget() is None  # the budget belongs to the request's context
+
+    def test_run_records_latencies_and_timeouts(self, timeouts, clock):
+        async def scenario():
+            call = timeouts.call("gemini", "flash", 2)
+            assert await call.run(_sleep(clock, 0.3)) == "ok"
+            with pytest.raises(ProviderError):
+                await call.run(_sleep(clock, 2.0, ProviderError("timed out", "gemini", True)))
+            with pytest.raises(ProviderError):  # fast failure: not a latency sample
+                await call.run(_sleep(clock, 0.01, ProviderError("bad request", "gemini")))
+            timeouts.start_budget(1.0)
+            limited = timeouts.call("gemini", "flash", 2)
+            with pytest.raises(ProviderError):  # cut short by the budget: not recorded
+                await limited.run(_sleep(clock, 1.0, ProviderError("timed out", "gemini", True)))
+
+        asyncio.run(scenario())
+        snapshot = timeouts.snapshot()["gemini:flash"]
+        assert snapshot["samples"] == 2 and snapshot["timed_out"] == 1
+        assert snapshot["timeout_seconds"] == 2  # still below min_samples
+
+
+class TestSuggestBudget:
+    """Test that /suggest gives provider calls a budget."""
+
+    def test_provider_sees_the_budget(self, monkeypatch):
+        seen = []
+
+        class BudgetProvider(main.MockProvider):
+            async def suggest(self, request):
+                seen.append(main.adaptive_timeouts.remaining_budget())
+                return SuggestResponse(suggestions=[SuggestionItem(text=f"Reply {i}", tone="casual") for i in range(3)])
+
+        monkeypatch.setattr(main.settings, "suggest_budget_seconds", 4.0)
+        monkeypatch.setitem(main.providers, "budget", BudgetProvider(main.ProviderConfig()))
+        client = TestClient(main.app)
+        client.post("/suggest", json={"user_id": "u1", "context": "Lunch?", "provider": "budget"})
+        assert 0 < seen[0] <= 4.0
+        assert "timeouts" in client.get("/health").json()
+
+    @pytest.mark.parametrize("value, expected", [("", None), (" ", None), ("0", 0.0), ("2.5", 2.5)])
+    def test_budget_setting(self, monkeypatch, value, expected):
+        monkeypatch.setenv("SUGGEST_BUDGET_SECONDS", value)
+        assert Settings().suggest_budget_seconds == expected
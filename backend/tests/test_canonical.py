@@ -0,0 +1,108 @@
+"""
+Tests for context canonicalization.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.canonical import canonicalize, mask, restore
+from backend.providers.base import SuggestionItem, SuggestResponse
+from backend.suggestion_pages import SuggestionPages
+
+
+class TestCanonicalize:
+    """Test suite for canonicalize, mask and restore."""
+
+    def test_times_share_a_key(self):
+        keys = {canonicalize(text).key for text in ("Meet at 5pm?", "meet at 6 pm?", "  MEET   at 17:30??? ")}
+        assert keys == {"meet at <time1> ?"}
+
+    def test_surface_variants_share_a_key(self):
+        assert canonicalize("Can't wait!!! 😂😂👍🏽").key == canonicalize("cant wait 😂👍").key
+        assert canonicalize("Ｍeet at ５ＰＭ?").key == canonicalize("meet at 5pm?").key
+
+    def test_entities_are_masked_in_order(self):
+        key, entities = canonicalize("Hey Sam, call me at 555-1234 or see https://x.co/a!! Thanks Sam")
+        assert key == "hey <name1> call me at <phone1> or see <url1> thanks <name1>"
+        assert entities == [("<name1>", "Sam"), ("<phone1>", "555-1234"), ("<url1>", "https://x.co/a")]
+
+    def test_sentence_starts_are_not_names(self):
+        key, entities = canonicalize("Great. Are we on for Friday, John? I'm in")
+        assert key == "great are we on for <day1> <name1> ? im in"
+        assert entities == [("<day1>", "Friday"), ("<name1>", "John")]
+
+    def test_distinct_messages_keep_distinct_keys(self):
+        assert canonicalize("meet at 5pm?").key != canonicalize("meet at 5pm").key
+        assert canonicalize("dinner at 7?").key != canonicalize("lunch at 7?").key
+
+    @pytest.mark.parametrize("first, second", [
+        ("Ok Thanks!", "Ok Sorry!"),
+        ("Ok Thanks!", "Ok Bye"),
+        ("Happy Birthday", "Happy Anniversary"),
+        ("Hey, Congrats", "Hey, Sorry"),
+    ])
+    def test_capitalised_words_are_not_names(self, first, second):
+        assert canonicalize(first).key != canonicalize(second).key
+        assert canonicalize(first).entities == []
+
+    @pytest.mark.parametrize("text", ["I sat there for hours", "the sun is out", "we wed in May", "Sun is out"])
+    def test_lowercase_words_are_not_weekdays(self, text):
+        assert canonicalize(text).entities == []
+
+    def test_weekday_abbreviations(self):
+        assert canonicalize("See you Sat?").key == canonicalize("see you saturday?").key == "see you <day1> ?"
+
+    def test_mask_and_restore_round_trip(self):
+        _, first = canonicalize("Meet at 5pm with Anna?")
+        _, second = canonicalize("meet at 6 pm with Ben?")
+        masked = mask("Sure, 5pm works, say hi to Anna", first)
+        assert masked == "Sure, <time1> works, say hi to <name1>"
+        assert restore(masked, second) == "Sure, 6 pm works, say hi to Ben"
+        assert mask("No entities here", []) == "No entities here"
+        assert restore("Keep <time9> as is", second) == "Keep <time9> as is"
+
+    def test_mask_only_replaces_exact_entity_surfaces(self):
+        assert mask("You are welcome, thanks for asking", [("<name1>", "Thanks")]) == \
+            "You are welcome, thanks for asking"
+        assert mask("Annabel and anna say hi", [("<name1>", "Anna")]) == "Annabel and anna say hi"
+
+
+class TestSuggestCanonicalCache:
+    """Test that /suggest caches by canonical context."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        calls = []
+
+        class EchoProvider(main.MockProvider):
+            async def suggest(self, request):
+                calls.append(request)
+                return SuggestResponse(suggestions=[
+                    SuggestionItem(text=f"{i}. {request.context}", tone="casual")
+                    for i in range(request.num_suggestions)
+                ])
+
+        monkeypatch.setattr(main.settings, "suggest_candidates", 9)
+        monkeypatch.setattr(main.settings, "rerank_enabled", False)
+        monkeypatch.setattr(main.settings, "diversity_enabled", False)
+        monkeypatch.setattr(main, "_suggestion_pages", SuggestionPages())
+        monkeypatch.setitem(main.providers, "echo", EchoProvider(main.ProviderConfig()))
+        client = TestClient(main.app)
+        client.calls = calls
+        return client
+
+    def test_variants_share_pages_with_their_own_values(self, client):
+        body = {"user_id": "u1", "context": "Meet at 5pm?", "provider": "echo"}
+        client.post("/suggest", json=body)
+        more = client.post("/suggest", json={**body, "context": "meet at 6 pm?", "more": True}).json()
+        assert [s["text"] for s in more["suggestions"]] == ["3. Meet at 6 pm?", "4. Meet at 6 pm?", "5. Meet at 6 pm?"]
+        assert more["metadata"]["cached"] is True
+        assert len(client.calls) == 1
+
+    def test_disabled_keys_by_raw_context(self, client, monkeypatch):
+        monkeypatch.setattr(main.settings, "canonicalize_enabled", False)
+        body = {"user_id": "u1", "context": "Meet at 5pm?", "provider": "echo"}
+        client.post("/suggest", json=body)
+        client.post("/suggest", json={**body, "context": "meet at 6 pm?", "more": True})
+        assert len(client.calls) == 2
@@ -0,0 +1,173 @@
+"""
+Tests for the model cascade.
+"""
+
+import asyncio
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.providers import cascade as cascade_module, registry as registry_module
+from backend.providers.base import (
+    PARSE_FALLBACK, BaseProvider, ProviderConfig, ProviderError, SuggestRequest, SuggestResponse, SuggestionItem,
+)
+from backend.providers.cascade import CascadeProvider
+from backend.providers.registry import ProviderRegistry, ProviderSpec, parse_cascade_tiers
+
+GOOD = ["Sounds good!", "See you there", "Can't wait"]
+
+
+class TierProvider(BaseProvider):
+    """Tier returning canned texts (or raising) and counting its calls."""
+
+    def __init__(self, texts=None, error=False, cost=0.0):
+        self.texts = texts if texts is not None else GOOD
+        self.error = error
+        self.cost = cost
+        self.calls = 0
+        super().__init__(ProviderConfig())
+
+    def _validate_config(self):
+        pass
+
+    async def suggest(self, request):
+        self.calls += 1
+        if self.error:
+            raise ProviderError("down", "tier", retryable=True)
+        return SuggestResponse(
+            suggestions=[SuggestionItem(text=t, tone="casual") for t in self.texts],
+            metadata={"provider": "tier"},
+        )
+
+    def get_provider_name(self):
+        return "Tier"
+
+    def get_cost_estimate(self, request):
+        return self.cost
+
+
+def _request(**kwargs):
+    return SuggestRequest(**{"user_id": "u1", "context": "Dinner?", "modes": ["casual"], "intensity": 5, **kwargs})
+
+
+def _run(cascade, request=None):
+    return asyncio.run(cascade.suggest(request or _request()))
+
+
+class TestCascadeProvider:
+    """Test suite for CascadeProvider."""
+
+    def test_good_answer_stops_at_first_tier(self):
+        small, large = TierProvider(cost=0.0001), TierProvider(cost=0.001)
+        cascade = CascadeProvider([("small", small), ("large", large)])
+        response = _run(cascade)
+        assert [s.text for s in response.suggestions] == GOOD
+        assert response.metadata == {"provider": "tier", "cascade_tier": "small"}
+        assert (small.calls, large.calls) == (1, 0)
+
+    @pytest.mark.parametrize("texts, reason", [
+        (list(PARSE_FALLBACK), "parse"),
+        ([], "parse"),
+        (["ok!", "OK", "ok.", "Sure"], "duplicates"),
+        (["x" * 150, "y" * 120, "Sure"], "length"),
+        (["darn it", "darn!", "Sure"], "unsafe"),
+    ])
+    def test_cheap_checks_escalate(self, texts, reason):
+        large = TierProvider()
+        cascade = CascadeProvider([("small", TierProvider(texts)), ("large", large)], accept=lambda t: "darn" not in t)
+        response = _run(cascade)
+        assert response.metadata["cascade_tier"] == "large"
+        assert response.metadata["cascade_escalations"] == [{"tier": "small", "reason": reason}]
+        assert cascade.stats["small"].escalations == {reason: 1}
+
+    def test_errors_escalate_except_on_the_last_tier(self):
+        cascade = CascadeProvider([("small", TierProvider(error=True)), ("large", TierProvider())])
+        assert _run(cascade).metadata["cascade_escalations"] == [{"tier": "small", "reason": "error"}]
+        failing = CascadeProvider([("small", TierProvider(error=True)), ("large", TierProvider(error=True))])
+        with pytest.raises(ProviderError):
+            _run(failing)
+
+    def test_last_tier_is_returned_as_is(self):
+        cascade = CascadeProvider([("small", TierProvider(["ok"])), ("large", TierProvider(["ok", "ok"]))])
+        response = _run(cascade)
+        assert response.metadata["cascade_tier"] == "large"
+        assert [s.text for s in response.suggestions] == ["ok", "ok"]
+
+    def test_fewer_wanted_than_min_usable(self):
+        cascade = CascadeProvider([("small", TierProvider(["Sure"])), ("large", TierProvider())])
+        assert _run(cascade, _request(num_suggestions=1)).metadata["cascade_tier"] == "small"
+
+    def test_module_hook_is_the_default_check(self, monkeypatch):
+        monkeypatch.setattr(cascade_module, "suggestion_check", lambda text: False)
+        cascade = CascadeProvider([("small", TierProvider()), ("large", TierProvider())])
+        assert _run(cascade).metadata["cascade_escalations"] == [{"tier": "small", "reason": "unsafe"}]
+
+    def test_snapshot_reports_hit_rates_and_savings(self):
+        ticks = iter(range(100))
+        small, large = TierProvider(cost=0.0001), TierProvider(cost=0.001)
+        cascade = CascadeProvider([("small", small), ("large", large)], clock=lambda: next(ticks) * 0.1)
+        for _ in range(3):
+            _run(cascade)
+        small.texts = []
+        _run(cascade)
+        snapshot = cascade.snapshot()
+        assert snapshot["requests"] == 4
+        tiers = {t["tier"]: t for t in snapshot["tiers"]}
+        assert tiers["small"]["hit_rate"] == 0.75 and tiers["large"]["hit_rate"] == 0.25
+        assert tiers["small"]["escalations"] == {"parse": 1}
+        assert snapshot["cost_saved_usd"] == pytest.approx(4 * 0.001 - (4 * 0.0001 + 0.001))
+        # Each call takes one 100 ms tick; the large model alone would take 400 ms
+        assert snapshot["latency_saved_ms"] == pytest.approx(400 - 500)
+
+    def test_needs_a_tier(self):
+        with pytest.raises(ValueError):
+            CascadeProvider([])
+
+
+class TestCascadeRegistry:
+    """Test registering the cascade from settings."""
+
+    def test_parse_tiers(self):
+        assert parse_cascade_tiers("gemini:gemini-1.5-flash-8b, openrouter:qwen/qwen-2.5-7b-instruct:free,qwen") == [
+            ("gemini", "gemini-1.5-flash-8b"), ("openrouter", "qwen/qwen-2.5-7b-instruct:free"), ("qwen", None),
+        ]
+        assert parse_cascade_tiers(None) == [] and parse_cascade_tiers(" ") == []
+        with pytest.raises(ValueError):
+            parse_cascade_tiers("claude:x")
+
+    def test_cascade_builds_one_adapter_per_tier(self, monkeypatch):
+        def build(config):
+            provider = TierProvider()
+            provider.config = config
+            return provider
+
+        spec = ProviderSpec("gemini", "unused", "Unused", "gemini_api_key", factory=build)
+        monkeypatch.setattr(registry_module, "BUILTIN_PROVIDERS", (spec,))
+        settings = types.SimpleNamespace(
+            gemini_api_key="key", cascade_tiers="gemini:gemini-1.5-flash-8b,gemini:gemini-1.5-flash", cascade_min_usable=2,
+        )
+        registry = ProviderRegistry.from_settings(settings)
+        assert registry.status() == {"gemini": "pending", "cascade": "pending"}
+        cascade = registry["cascade"]
+        assert [label for label, _ in cascade.tiers] == ["gemini:gemini-1.5-flash-8b", "gemini:gemini-1.5-flash"]
+        assert all(p.config.api_key == "key" for _, p in cascade.tiers)
+        assert cascade.min_usable == 2 and cascade.max_chars == 100
+
+
+class TestSuggestCascade:
+    """Test /suggest and /health with a cascade provider."""
+
+    def test_health_reports_the_cascade(self, monkeypatch):
+        small = TierProvider(["darn it", "darn", "Sure"])
+        cascade = CascadeProvider([("small", small), ("large", TierProvider())])
+        monkeypatch.setattr(main.settings, "rerank_enabled", False)
+        monkeypatch.setattr(main, "_safety_filter", main.SafetyFilter({"en": ["darn"]}))
+        monkeypatch.setitem(main.providers, "cascade", cascade)
+        client = TestClient(main.app)
+        data = client.post("/suggest", json={"user_id": "u1", "context": "Dinner?", "provider": "cascade"}).json()
+        assert [s["text"] for s in data["suggestions"]] == GOOD
+        health = client.get("/health").json()["cascade"]
+        assert [t["escalations"] for t in health["tiers"]] == [{"unsafe": 1}, {}]
+        assert 'provider_cascade_attempts_total{tier="large",outcome="served"} 1' in client.get("/metrics").text
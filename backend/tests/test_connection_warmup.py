@@ -0,0 +1,103 @@
+"""
+Tests for provider connection warm-up and the readiness probe.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.providers.base import BaseProvider, ProviderConfig, SuggestResponse
+from backend.providers.registry import ProviderRegistry
+from backend.providers.warmup import ConnectionWarmer
+
+
+class PooledProvider(BaseProvider):
+    def __init__(self, fail_times: int = 0):
+        super().__init__(ProviderConfig())
+        self.fail_times = fail_times
+        self.calls = []
+
+    def _validate_config(self):
+        pass
+
+    async def warm_connections(self, count):
+        self.calls.append(count)
+        if len(self.calls) <= self.fail_times:
+            raise ConnectionError("unreachable")
+        return count
+
+    async def suggest(self, request):
+        return SuggestResponse(suggestions=[])
+
+    def get_provider_name(self):
+        return "Pooled"
+
+    def get_cost_estimate(self, request):
+        return 0.0
+
+
+class TestConnectionWarmer:
+    """Test suite for ConnectionWarmer."""
+
+    def test_warms_pooled_providers_only(self):
+        """Test that adapters without a pool are ignored and do not block readiness."""
+        pooled = PooledProvider()
+        registry = ProviderRegistry({"pooled": pooled, "mock": main.MockProvider(ProviderConfig())})
+        warmer = ConnectionWarmer(registry, connections=3)
+        assert not warmer.ready
+        asyncio.run(warmer.warm())
+        assert warmer.ready
+        assert pooled.calls == [3]
+        assert set(warmer.pools) == {"pooled"}
+        assert warmer.snapshot()["pools"]["pooled"]["warm"] == 3
+
+    def test_failure_keeps_not_ready_until_retry_succeeds(self):
+        """Test that a failed warm-up is reported and retried on the short interval."""
+        pooled = PooledProvider(fail_times=1)
+        warmer = ConnectionWarmer(ProviderRegistry({"pooled": pooled}), refresh_seconds=60, retry_seconds=0.01)
+
+        async def run_test():
+            await warmer.warm()
+            assert not warmer.ready
+            assert "unreachable" in warmer.pools["pooled"].error
+            warmer.start()
+            for _ in range(100):
+                if warmer.ready:
+                    break
+                await asyncio.sleep(0.01)
+            await warmer.stop()
+
+        asyncio.run(run_test())
+        assert warmer.ready
+        assert warmer.pools["pooled"].error is None
+
+
+class TestReadyEndpoint:
+    """Test suite for the /ready probe."""
+
+    @pytest.fixture
+    def warmer(self, monkeypatch):
+        warmer = ConnectionWarmer(ProviderRegistry({"pooled": PooledProvider(fail_times=1)}))
+        monkeypatch.setattr(main, "connection_warmer", warmer)
+        monkeypatch.setattr(main.settings, "connection_warmup_enabled", True)
+        return warmer
+
+    def test_not_ready_until_pools_are_warm(self, warmer):
+        """Test that /ready answers 503 while a pool is cold and 200 once warm."""
+        client = TestClient(main.app)
+        asyncio.run(warmer.warm())
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming"
+
+        asyncio.run(warmer.warm())
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["pools"]["pooled"]["warm"] == 4
+
+    def test_ready_when_warmup_disabled(self, warmer, monkeypatch):
+        """Test that disabling warm-up does not hold the instance out of rotation."""
+        monkeypatch.setattr(main.settings, "connection_warmup_enabled", False)
+        assert TestClient(main.app).get("/ready").status_code == 200
@@ -0,0 +1,98 @@
+"""
+Tests for near-duplicate suppression of suggestions.
+"""
+
+import asyncio
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend import diversity, main
+from backend.providers.base import ProviderConfig, SuggestionItem, SuggestRequest, SuggestResponse
+from backend.providers.canned import CANNED_REPLIES, CannedProvider
+
+
+def items(*texts, tone="casual"):
+    return [SuggestionItem(text=t, tone=tone) for t in texts]
+
+
+class TestSimilarity:
+    """Test suite for MinHash similarity estimates."""
+
+    def test_near_duplicates_score_high(self):
+        sim = diversity.similarity(["Sounds good!", "sounds good :)", "Can't make it tonight, sorry", "👍", "👍"])
+        assert sim.shape == (5, 5) and np.allclose(np.diag(sim), 1.0)
+        assert sim[0, 1] == 1.0  # same after normalisation
+        assert (diversity.fingerprints(["Sounds good!"]).sum(), diversity.fingerprints(["ok"]).sum()) == (9, 1)
+        assert sim[0, 2] < 0.2
+        assert sim[3, 4] == 1.0 and sim[0, 3] < 0.2  # emoji-only replies are compared too
+        assert diversity.similarity([]).shape == (0, 0)
+
+    def test_matches_exact_jaccard(self):
+        a, b = "see you at the cinema at eight then", "See you at the cinema at NINE then!"
+        sa, sb = ({t[i:i + 3] for i in range(len(t) - 2)} for t in (diversity.normalize(a), diversity.normalize(b)))
+        assert abs(diversity.similarity([a, b])[0, 1] - len(sa & sb) / len(sa | sb)) < 0.02
+
+    def test_quoted_context_is_ignored(self):
+        context = "Can you send me the quarterly report before the meeting on Friday afternoon?"
+        texts = [f"{context} — sounds good to me", f"{context}. I will proceed as discussed"]
+        assert diversity.similarity(texts)[0, 1] > 0.5
+        assert diversity.similarity(texts, context)[0, 1] < 0.2
+
+
+class TestDiversify:
+    """Test suite for diversify."""
+
+    def test_keeps_rank_order_and_skips_duplicates(self):
+        pool = items("Sounds good!", "sounds good :)", "Sounds good!!", "Can't tonight", "Let me check", "Maybe later")
+        assert [s.text for s in diversity.diversify(pool)] == ["Sounds good!", "Can't tonight", "Let me check"]
+
+    def test_fills_from_fallback_only_when_short(self):
+        pool = items("Sounds good!", "sounds good :)", "")
+        fallback = items("sounds good!!!", "On my way", "Running late", tone="formal")
+        assert [s.text for s in diversity.diversify(pool, fallback=fallback)] == ["Sounds good!", "On my way", "Running late"]
+        assert diversity.diversify(items("a", "b", "c"), fallback=fallback) == items("a", "b", "c")
+        assert diversity.diversify([]) == []
+
+
+class TestSuggestDiversity:
+    """Test that /suggest returns distinct suggestions without a second provider call."""
+
+    def test_duplicates_are_replaced(self, monkeypatch):
+        calls = []
+
+        class RepetitiveProvider(main.MockProvider):
+            async def suggest(self, request):
+                calls.append(request)
+                return SuggestResponse(suggestions=items("Sounds good!", "sounds good :)", "Sounds good!!"))
+
+        monkeypatch.setattr(main.settings, "diversity_enabled", True)
+        monkeypatch.setitem(main.providers, "repetitive", RepetitiveProvider(main.ProviderConfig()))
+        body = TestClient(main.app).post(
+            "/suggest", json={"user_id": "u1", "context": "dinner at 8?", "modes": ["casual"], "provider": "repetitive"}
+        ).json()
+        texts = [s["text"] for s in body["suggestions"]]
+        assert len(calls) == 1 and len(texts) == 3
+        assert sum(t.lower().startswith("sounds good") for t in texts) == 1
+        assert diversity.similarity(texts, "dinner at 8?").max(initial=0, where=~np.eye(3, dtype=bool)) < 0.5
+        assert not any("dinner at 8" in t for t in texts)  # the fill-in does not echo the message
+
+
+class TestCannedProvider:
+    """Test suite for the local fallback provider."""
+
+    def _suggest(self, **fields):
+        request = SuggestRequest(**{"user_id": "u1", "context": "Are you free tonight?", "modes": ["casual"],
+                                    "intensity": 5, **fields})
+        return asyncio.run(CannedProvider(ProviderConfig()).suggest(request)).suggestions
+
+    def test_cycles_modes_without_echoing(self):
+        suggestions = self._suggest(modes=["casual", "formal", "witty"], num_suggestions=6)
+        assert [s.tone for s in suggestions] == ["casual", "formal", "witty"] * 2
+        assert all("free tonight" not in s.text for s in suggestions)
+        assert len({s.text for s in suggestions}) == 6
+
+    def test_deterministic_per_context_and_bounded(self):
+        assert self._suggest() == self._suggest()
+        assert len(self._suggest(num_suggestions=50)) == len(CANNED_REPLIES["casual"])
+        assert {s.tone for s in self._suggest(modes=["sarcastic"])} == {"neutral"}
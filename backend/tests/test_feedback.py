@@ -0,0 +1,111 @@
+"""
+Tests for incremental suggestion feedback.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.feedback import FeedbackEvent, FeedbackStore, describe, event_deltas
+from backend.providers.base import SuggestResponse
+from backend.shared_state import LocalVersionIndex
+
+
+def events(action, mode, n, **fields):
+    return [FeedbackEvent(action=action, mode=mode, **fields) for _ in range(n)]
+
+
+class TestFeedbackAggregates:
+    """Test suite for FeedbackStore and the preference note."""
+
+    def test_events_are_constant_size_deltas(self):
+        """Test that an event touches a fixed set of counters and keeps no text."""
+        deltas = event_deltas(FeedbackEvent(action="edited", mode="Witty", tone="playful",
+                                            suggestion_length=40, final_length=20))
+        assert deltas == {
+            "events": 1.0, "edited": 1.0, "mode:witty:edited": 1.0, "tone:playful:edited": 1.0,
+            "edit_samples": 1.0, "edit_length_ratio": 0.5, "used_samples": 1.0, "used_chars": 20.0,
+        }
+
+    def test_counters_accumulate_across_batches(self, tmp_path):
+        """Test that batches add to, rather than replace, the stored counters."""
+        store = FeedbackStore(str(tmp_path / "p.db"))
+        assert store.record("u1", events("accepted", "casual", 3)) == 3
+        assert store.record("u1", events("rejected", "casual", 1) + events("accepted", "witty", 2)) == 3
+        store.close()
+
+        stats = FeedbackStore(store.path).stats("u1")
+        assert stats["events"] == 6
+        assert stats["mode:casual:accepted"] == 3 and stats["mode:casual:rejected"] == 1
+        assert stats["accepted"] == 5
+
+    def test_describe(self):
+        stats = {"mode:casual:accepted": 8, "mode:casual:rejected": 2,
+                 "mode:formal:rejected": 9, "mode:formal:accepted": 1,
+                 "mode:witty:accepted": 1,  # too few events to judge
+                 "edit_samples": 5, "edit_length_ratio": 3.0}
+        assert describe(stats) == ("Feedback: prefers casual suggestions (80% used), "
+                                   "usually rejects formal ones (10% used), shortens suggestions when editing.")
+        assert describe({"mode:casual:accepted": 2}) is None
+
+    def test_note_cache_is_invalidated_by_feedback(self, tmp_path):
+        """Test that notes are cached per worker until any worker records feedback."""
+        versions = LocalVersionIndex()
+        path = str(tmp_path / "p.db")
+        a, b = FeedbackStore(path, versions=versions), FeedbackStore(path, versions=versions)
+        lookups = []
+        b._on_lookup = lookups.append
+
+        assert b.preferences("u1") is None
+        a.record("u1", events("accepted", "casual", 5))
+        assert "prefers casual" in b.preferences("u1")
+        assert b.preferences("u1") == b.preferences("u1")
+        assert lookups == [False, False, True, True]
+
+        assert a.delete("u1") is True
+        assert b.preferences("u1") is None
+
+    def test_peek_profile_only_serves_cached_entries(self, tmp_path):
+        versions = LocalVersionIndex()
+        store = FeedbackStore(str(tmp_path / "p.db"), versions=versions)
+        store.record("u1", events("accepted", "casual", 5))
+        assert store.peek_profile("u1") is None
+        assert store.peek_profile("u1") is None  # peeking never loads
+        profile = store.profile("u1")
+        assert store.peek_profile("u1") == profile
+        store.record("u1", events("rejected", "formal", 5))
+        assert store.peek_profile("u1") is None
+
+
+class TestFeedbackEndpoint:
+    """Test suite for POST /feedback."""
+
+    @pytest.fixture
+    def captured(self, tmp_path, monkeypatch):
+        requests = []
+
+        class CapturingProvider(main.MockProvider):
+            async def suggest(self, request):
+                requests.append(request)
+                return SuggestResponse(suggestions=[])
+
+        monkeypatch.setattr(main, "_feedback_store", FeedbackStore(str(tmp_path / "p.db")))
+        monkeypatch.setitem(main.providers, "capture", CapturingProvider(main.ProviderConfig()))
+        return requests
+
+    def test_feedback_reaches_suggest(self, captured):
+        client = TestClient(main.app)
+        batch = [{"action": "accepted", "mode": "witty", "tone": "playful"}] * 5
+        response = client.post("/feedback", json={"user_id": "fb-user", "events": batch})
+        assert response.json() == {"status": "ok", "applied": 5}
+        assert client.get("/personalization/fb-user/feedback").json()["stats"]["mode:witty:accepted"] == 5
+
+        client.post("/suggest", json={"user_id": "fb-user", "context": "hi", "provider": "capture"})
+        assert "prefers witty suggestions" in captured[-1].user_profile_summary
+
+    def test_rejects_malformed_events(self, captured):
+        client = TestClient(main.app)
+        assert client.post("/feedback", json={"user_id": "u", "events": []}).status_code == 422
+        bad = [{"action": "liked", "mode": "witty"}, {"action": "accepted", "mode": "has spaces"}]
+        for event in bad:
+            assert client.post("/feedback", json={"user_id": "u", "events": [event]}).status_code == 422
@@ -0,0 +1,168 @@
+"""
+Tests for the precomputed hot-context table.
+"""
+
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import canonical, main
+from backend.hot_contexts import _HEADER, HotContextFile, HotContextTable, mine, precompute, table_key, write
+from backend.providers.base import SuggestionItem
+from backend.suggestion_pages import SuggestionPages
+
+
+def items(*texts):
+    return [SuggestionItem(text=t, tone="casual") for t in texts]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHotContextFile:
+    """Test suite for the table file format."""
+
+    def test_every_key_is_found(self, tmp_path):
+        path = str(tmp_path / "hot.tbl")
+        entries = {f"context {i}".encode(): items(f"reply {i}", f"other {i}") for i in range(2000)}
+        assert write(path, entries) == 2000
+        table = HotContextFile(path)
+        for key, value in entries.items():
+            assert [s.text for s in table.get(key)] == [s.text for s in value]
+        assert table.get(b"context 2000") is None
+        assert table.get(b"") is None
+
+    def test_empty_table(self, tmp_path):
+        path = str(tmp_path / "hot.tbl")
+        assert write(path, {}) == 0
+        assert HotContextFile(path).get(b"anything") is None
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "hot.tbl"
+        path.write_bytes(b"not a table" * 10)
+        with pytest.raises(ValueError):
+            HotContextFile(str(path))
+
+    def test_rejects_tables_built_for_other_keys(self, tmp_path):
+        path = tmp_path / "hot.tbl"
+        write(str(path), {b"thanks": items("You're welcome!")})
+        data = bytearray(path.read_bytes())
+        _HEADER.pack_into(data, 0, *((b"RHCT", 1) + _HEADER.unpack_from(data, 0)[2:]))
+        path.write_bytes(bytes(data))
+        with pytest.raises(ValueError):
+            HotContextFile(str(path))
+
+
+class TestHotContextTable:
+    """Test suite for hot-swapping the table."""
+
+    def test_replaced_file_is_swapped_in(self, tmp_path):
+        path = str(tmp_path / "hot.tbl")
+        clock = FakeClock()
+        lookups = []
+        table = HotContextTable(path, check_seconds=5.0, on_lookup=lookups.append, clock=clock)
+        assert table.lookup(b"thanks") is None
+
+        write(path, {b"thanks": items("You're welcome!")})
+        assert table.lookup(b"thanks") is None  # not checked again yet
+        clock.now = 5.0
+        old = table.lookup(b"thanks")
+        assert [s.text for s in old] == ["You're welcome!"]
+
+        write(path, {b"thanks": items("Anytime!")})
+        clock.now = 10.0
+        assert [s.text for s in table.lookup(b"thanks")] == ["Anytime!"]
+        assert table.snapshot()["entries"] == 1
+
+        os.remove(path)
+        clock.now = 15.0
+        assert table.lookup(b"thanks") is None
+        assert lookups == [False, False, True, True, False]
+
+
+class TestBuild:
+    """Test suite for mining logs and precomputing suggestions."""
+
+    def test_mine_groups_canonical_contexts(self):
+        shown = [
+            {"type": "suggestions_shown", "context": "Meet at 5pm?", "modes": ["casual"]},
+            {"type": "suggestions_shown", "context": "meet at 6 pm?", "modes": ["casual"]},
+            {"type": "suggestions_shown", "context": "Meet at 5pm?", "modes": ["casual"]},
+            {"type": "suggestions_shown", "context": "thanks!", "modes": ["casual"]},
+            {"type": "suggestions_shown", "context": "Thanks", "modes": ["casual"], "intensity": 8},
+            {"type": "app_open", "context": "thanks!"},
+        ]
+        hot = mine(shown, "mock", top=10)
+        assert len(hot) == 1
+        assert hot[0].context == "Meet at 5pm?" and hot[0].count == 3
+        assert hot[0].key == table_key("meet at <time1> ?", ["casual"], 5, "mock")
+        assert mine(shown, "mock", top=10, min_count=1)[1].modes == ("casual",)
+
+    @pytest.mark.parametrize("first, second", [
+        ("Ok Thanks!", "Ok Sorry!"), ("Happy Birthday", "Happy Anniversary"), ("Hey, Congrats", "Hey, Sorry"),
+    ])
+    def test_different_messages_get_different_keys(self, first, second):
+        shown = [{"type": "suggestions_shown", "context": c, "modes": ["casual"]} for c in (first, first, second, second)]
+        hot = mine(shown, "mock", top=10)
+        assert sorted(h.context for h in hot) == sorted([first, second])
+        assert len({h.key for h in hot}) == 2
+
+    def test_precompute_masks_entities(self):
+        hot = mine([{"type": "suggestions_shown", "context": "Meet at 5pm?"}] * 2, "mock", top=1)
+        entries = asyncio.run(precompute(hot, main.providers["mock"], candidates=9))
+        texts = [s.text for s in entries[hot[0].key]]
+        assert texts and all("<time1>" in t and "5pm" not in t for t in texts)
+
+
+class TestSuggestHotContexts:
+    """Test the hot-context stage of /suggest."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "hot.tbl")
+        key = table_key(canonical.canonicalize("Meet at 5pm?").key, ["casual", "formal", "witty"], 5, "mock")
+        write(path, {key: items(*(f"Option {i}: <time1> works" for i in range(5)))})
+        monkeypatch.setattr(main, "_hot_contexts", HotContextTable(path))
+        monkeypatch.setattr(main, "_suggestion_pages", SuggestionPages())
+        return TestClient(main.app)
+
+    def test_hot_context_skips_the_provider(self, client, monkeypatch):
+        async def fail(*args):
+            raise AssertionError("provider called")
+
+        monkeypatch.setattr(main, "_call_provider", fail)
+        body = {"user_id": "hot-user", "context": "meet at 6 pm?"}
+        data = client.post("/suggest", json=body).json()
+        assert [s["text"] for s in data["suggestions"]] == [f"Option {i}: 6 pm works" for i in range(3)]
+        assert data["metadata"] == {"cached": True, "more_available": 2}
+
+        more = client.post("/suggest", json={**body, "more": True}).json()
+        assert [s["text"] for s in more["suggestions"]] == [f"Option {i}: 6 pm works" for i in (3, 4)]
+
+    def test_other_requests_are_generated(self, client, monkeypatch):
+        data = client.post("/suggest", json={"user_id": "hot-user", "context": "meet at 6 pm?", "modes": ["casual"]}).json()
+        assert "cached" not in (data.get("metadata") or {})
+        monkeypatch.setattr(main.settings, "hot_contexts_enabled", False)
+        data = client.post("/suggest", json={"user_id": "hot-user", "context": "meet at 6 pm?"}).json()
+        assert "cached" not in (data.get("metadata") or {})
+
+    def test_personalized_users_reach_the_provider(self, client, monkeypatch):
+        calls = []
+        call_provider = main._call_provider
+
+        async def record(*args):
+            calls.append(args[2])
+            return await call_provider(*args)
+
+        monkeypatch.setattr(main, "_call_provider", record)
+        main._personalization_store.put("hot-personal", {"artifacts": {}}, summary="Writes short replies.")
+        data = client.post("/suggest", json={"user_id": "hot-personal", "context": "meet at 6 pm?"}).json()
+        assert "cached" not in (data.get("metadata") or {})
+        assert calls[0].user_profile_summary.startswith("Writes short replies.")
@@ -0,0 +1,150 @@
+"""
+Tests for the shared provider HTTP transport.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend.providers.base import ProviderAuthError, ProviderConfig, ProviderError, ProviderRateLimitError
+from backend.providers.transport import HttpTransport
+
+
+def make_transport(handler, **options) -> HttpTransport:
+    return HttpTransport(transport=httpx.MockTransport(handler), **options)
+
+
+class TestHttpTransport:
+    """Test suite for HttpTransport."""
+
+    def test_post_json(self):
+        """Test that JSON bodies and headers are sent and the response decoded."""
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200, json={"ok": True})
+
+        transport = make_transport(handler)
+        data = asyncio.run(transport.post_json("p", "https://api.example/v1/x", {"a": 1}, headers={"X-K": "v"}))
+        assert data == {"ok": True}
+        assert json.loads(seen[0].content) == {"a": 1}
+        assert seen[0].headers["x-k"] == "v"
+
+    @pytest.mark.parametrize("status, error, retryable", [
+        (401, ProviderAuthError, False),
+        (429, ProviderRateLimitError, True),
+        (400, ProviderError, False),
+        (503, ProviderError, True),
+    ])
+    def test_status_mapping(self, status, error, retryable):
+        """Test that HTTP errors map onto the provider error hierarchy."""
+        transport = make_transport(lambda request: httpx.Response(status, headers={"Retry-After": "7"}))
+        with pytest.raises(error) as info:
+            asyncio.run(transport.post_json("p", "https://api.example/v1/x", {}))
+        assert info.value.retryable is retryable
+        assert info.value.provider_name == "p"
+        if status == 429:
+            assert info.value.retry_after_seconds == 7
+
+    def test_transport_failure_is_retryable(self):
+        """Test that connection errors become retryable ProviderErrors."""
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        with pytest.raises(ProviderError) as info:
+            asyncio.run(make_transport(handler).post_json("p", "https://api.example/v1/x", {}))
+        assert info.value.retryable
+
+    def test_per_host_limit(self):
+        """Test that concurrency is capped per host but not across hosts."""
+        active = {}
+        peak = {}
+
+        async def handler(request):
+            host = request.url.host
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+            return httpx.Response(200, json={})
+
+        transport = make_transport(handler, per_host_limit=2)
+
+        async def run_test():
+            await asyncio.gather(*(
+                transport.post_json("p", f"https://{host}/x", {}) for host in ("a.example", "b.example") for _ in range(6)
+            ))
+
+        asyncio.run(run_test())
+        assert peak == {"a.example": 2, "b.example": 2}
+
+    def test_queue_wait_counts_against_timeout(self):
+        """Test that a request stuck behind the per-host cap times out."""
+        async def handler(request):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200, json={})
+
+        transport = make_transport(handler, per_host_limit=1)
+
+        async def run_test():
+            slow = asyncio.ensure_future(transport.post_json("p", "https://a.example/x", {}))
+            await asyncio.sleep(0.01)
+            with pytest.raises(ProviderError, match="queued"):
+                await transport.post_json("p", "https://a.example/x", {}, timeout=0.05)
+            await slow
+
+        asyncio.run(run_test())
+
+    def test_warm(self):
+        """Test that warm-up issues one request per connection over HTTP/1.1."""
+        calls = []
+        transport = make_transport(lambda request: calls.append(request.method) or httpx.Response(404), http2=False)
+        assert asyncio.run(transport.warm("https://a.example/v1", 3)) == 3
+        assert calls == ["HEAD"] * 3
+
+
+class TestAdapterTransport:
+    """Test suite for adapters calling their REST API through the transport."""
+
+    def test_openrouter_request_and_error_passthrough(self, monkeypatch):
+        """Test the chat completions call and that transport errors are not re-wrapped."""
+        from backend.providers.base import SuggestRequest
+        from backend.providers.openrouter import provider as openrouter
+
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(429)
+
+        monkeypatch.setattr(openrouter, "http_transport", make_transport(handler))
+        adapter = openrouter.OpenRouterProvider(ProviderConfig(api_key="k", use_shared_transport=True))
+        assert adapter.client is None
+
+        request = SuggestRequest(user_id="u", context="hi", modes=["casual"], intensity=5)
+        with pytest.raises(ProviderRateLimitError):
+            asyncio.run(adapter.suggest(request))
+        assert str(seen[0].url) == "https://openrouter.ai/api/v1/chat/completions"
+        assert seen[0].headers["authorization"] == "Bearer k"
+        assert json.loads(seen[0].content)["model"] == adapter.config.model_name
+
+    def test_output_tokens_scale_with_requested_suggestions(self, monkeypatch):
+        """Test that an over-generated pool gets room for every suggestion."""
+        from backend.providers.base import SuggestRequest
+        from backend.providers.openrouter import provider as openrouter
+
+        seen = []
+
+        def handler(request):
+            seen.append(json.loads(request.content)["max_tokens"])
+            return httpx.Response(200, json={"choices": [{"message": {"content": '["Sure thing"]'}}]})
+
+        monkeypatch.setattr(openrouter, "http_transport", make_transport(handler))
+        adapter = openrouter.OpenRouterProvider(ProviderConfig(api_key="k", use_shared_transport=True))
+        for n in (3, 9, 100):
+            request = SuggestRequest(user_id="u", context="hi", modes=["casual"], intensity=5, num_suggestions=n)
+            asyncio.run(adapter.suggest(request))
+        assert seen == [150, 450, 2000]
@@ -0,0 +1,222 @@
+"""
+Tests for the /train job queue and runner.
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main, training
+from backend.config import settings
+from backend.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, JobRunner
+from backend.personalization_store import PersonalizationStore
+from backend.style_index import StyleIndexStore
+
+MESSAGES = ["omw!! 😂", "lol same", "on my way now", "on my way!! 😂", "haha ok see u"]
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    yield queue
+    queue.close()
+
+
+async def _run_until_done(runner: JobRunner, job_id: str, timeout: float = 60.0) -> dict:
+    runner.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = runner.queue.get(job_id)
+            if job["status"] in (SUCCEEDED, FAILED):
+                return job
+            await asyncio.sleep(0.05)
+        raise AssertionError(f"job {job_id} did not finish")
+    finally:
+        await runner.stop()
+
+
+class TestJobQueue:
+    """Test suite for JobQueue."""
+
+    def test_deduplicates_queued_jobs_per_user(self, queue):
+        """Test that a user has at most one queued job of a kind."""
+        job, created = queue.enqueue("personalization", "u1", {"user_id": "u1"})
+        assert created and job["status"] == QUEUED
+        again, created = queue.enqueue("personalization", "u1", {"user_id": "u1"})
+        assert not created and again["id"] == job["id"]
+        assert queue.enqueue("personalization", "u2")[1] is True
+
+    def test_enqueue_while_running_waits_for_the_run(self, queue):
+        """Test that an upload made during a run queues a job that runs after it."""
+        job, _ = queue.enqueue("personalization", "u1")
+        assert queue.claim()["id"] == job["id"]
+        newer, created = queue.enqueue("personalization", "u1")
+        assert created and newer["id"] != job["id"]
+        assert queue.enqueue("personalization", "u1")[0]["id"] == newer["id"]
+        assert queue.claim() is None  # the first job is still running
+
+        queue.finish(job["id"], {"summary": "s"})
+        assert queue.claim()["id"] == newer["id"]
+
+    def test_superseded_job_is_not_retried(self, queue):
+        """Test that a failed run is not requeued over a newer queued job."""
+        job, _ = queue.enqueue("personalization", "u1")
+        queue.claim()
+        newer, _ = queue.enqueue("personalization", "u1")
+        queue.fail(job["id"], "boom", retry=True)
+        assert queue.get(job["id"])["status"] == FAILED
+        assert queue.claim()["id"] == newer["id"]
+
+        queue.enqueue("personalization", "u1")
+        assert queue.requeue_running() == 0
+        assert queue.get(newer["id"])["status"] == FAILED
+
+    def test_claim_progress_and_retry(self, queue):
+        """Test the claim -> progress -> fail/retry -> finish lifecycle."""
+        first, _ = queue.enqueue("personalization", "u1")
+        second, _ = queue.enqueue("personalization", "u2")
+        claimed = queue.claim()
+        assert claimed["id"] == first["id"] and claimed["status"] == RUNNING and claimed["attempts"] == 1
+
+        queue.report(first["id"], 0.5, "halfway")
+        assert (queue.get(first["id"])["progress"], queue.get(first["id"])["message"]) == (0.5, "halfway")
+
+        queue.fail(first["id"], "boom", retry=True)
+        assert queue.get(first["id"])["status"] == QUEUED
+        assert queue.claim()["id"] == first["id"]  # oldest first
+        assert queue.claim()["id"] == second["id"]
+        assert queue.claim() is None
+
+        queue.finish(first["id"], {"n": 1})
+        done = queue.get(first["id"])
+        assert (done["status"], done["progress"], done["result"], done["attempts"]) == (SUCCEEDED, 1.0, {"n": 1}, 2)
+        queue.fail(second["id"], "boom")
+        assert queue.get(second["id"])["status"] == FAILED
+
+    def test_survives_restart(self, queue):
+        """Test that queued jobs and jobs interrupted mid-run are not lost."""
+        queued, _ = queue.enqueue("personalization", "u1")
+        running, _ = queue.enqueue("personalization", "u2")
+        queue.claim()
+        queue.close()
+
+        reopened = JobQueue(queue.path)
+        assert reopened.requeue_running() == 1
+        assert {reopened.get(queued["id"])["status"], reopened.get(running["id"])["status"]} == {QUEUED}
+        reopened.close()
+
+
+class TestJobRunner:
+    """Test suite for JobRunner (real process pool)."""
+
+    def test_personalization_job(self, tmp_path):
+        """Test that a job rebuilds the summary and style index out of process."""
+        store = PersonalizationStore(settings.personalization_db_path)
+        store.put("job-user", {"artifacts": {"messages": MESSAGES}}, summary=None)
+        queue = JobQueue(str(tmp_path / "jobs.db"))
+        applied = []
+
+        def apply(job, result):
+            applied.append(store.set_summary(job["user_id"], result["summary"], result["updated_at"]))
+
+        runner = JobRunner(queue, training.HANDLERS, workers=1, poll_seconds=0.05,
+                           on_success={"personalization": apply})
+        job, _ = queue.enqueue("personalization", "job-user", {"user_id": "job-user"})
+        done = asyncio.run(_run_until_done(runner, job["id"]))
+
+        assert done["status"] == SUCCEEDED and done["progress"] == 1.0
+        assert done["result"]["messages"] == done["result"]["examples"] == len(MESSAGES)
+        assert StyleIndexStore(settings.style_index_dir).examples("job-user", "lol", 1) == ["lol same"]
+        assert applied == [True]
+        assert store.get_summary("job-user") == done["result"]["summary"]
+        assert '"on my way"' in done["result"]["summary"]
+        store.close()
+        queue.close()
+
+    def test_upload_during_run_is_applied(self, tmp_path):
+        """Test that a job queued by an upload during a run applies the newer upload."""
+        store = PersonalizationStore(settings.personalization_db_path)
+        store.put("race-user", {"artifacts": {"messages": MESSAGES[:2]}}, summary=None)
+        queue = JobQueue(str(tmp_path / "jobs.db"))
+        applied, requeued = [], []
+
+        def apply(job, result):
+            if not applied:  # an upload lands while the first job runs
+                time.sleep(0.01)
+                store.put("race-user", {"artifacts": {"messages": MESSAGES}}, summary=None)
+                requeued.append(queue.enqueue("personalization", "race-user", {"user_id": "race-user"})[0])
+            applied.append(store.set_summary(job["user_id"], result["summary"], result["updated_at"]))
+
+        runner = JobRunner(queue, training.HANDLERS, workers=1, poll_seconds=0.05,
+                           on_success={"personalization": apply})
+        job, _ = queue.enqueue("personalization", "race-user", {"user_id": "race-user"})
+        assert asyncio.run(_run_until_done(runner, job["id"]))["status"] == SUCCEEDED
+        done = asyncio.run(_run_until_done(runner, requeued[0]["id"]))
+
+        assert applied == [False, True]  # the first summary was stale
+        assert done["result"]["messages"] == len(MESSAGES)
+        assert store.get_summary("race-user") == done["result"]["summary"]
+        store.close()
+        queue.close()
+
+    def test_failing_job_is_retried_then_failed(self, tmp_path):
+        """Test that handler errors are retried up to max_attempts."""
+        queue = JobQueue(str(tmp_path / "jobs.db"))
+        runner = JobRunner(queue, {"broken": "backend.training:missing"}, workers=1, max_attempts=2,
+                           poll_seconds=0.05)
+        job, _ = queue.enqueue("broken", "u1")
+        done = asyncio.run(_run_until_done(runner, job["id"]))
+        assert done["status"] == FAILED and done["attempts"] == 2
+        assert "AttributeError" in done["error"]
+        queue.close()
+
+
+class TestSummaryGuard:
+    """Test that stale job results never overwrite newer uploads."""
+
+    def test_set_summary_checks_record_version(self, tmp_path):
+        store = PersonalizationStore(str(tmp_path / "p.db"))
+        store.put("u1", {"artifacts": {}}, summary="old")
+        derived_from = store.updated_at("u1")
+        time.sleep(0.01)
+        store.put("u1", {"artifacts": {"k": "v"}}, summary="new")
+        assert store.set_summary("u1", "stale", derived_from) is False
+        assert store.get_summary("u1") == "new"
+        assert store.set_summary("u1", "fresh", store.updated_at("u1")) is True
+        assert store.get_summary("u1") == "fresh"
+        assert store.set_summary("missing", "x") is False
+
+
+class TestTrainEndpoint:
+    """Test suite for POST /train and GET /train/{job_id}."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(main, "_job_queue", JobQueue(str(tmp_path / "jobs.db")))
+        return TestClient(main.app)
+
+    def test_enqueue_deduplicate_and_poll(self, client):
+        response = client.post("/train", json={"user_id": "u1"})
+        assert response.status_code == 202
+        body = response.json()
+        assert body["status"] == QUEUED and body["deduplicated"] is False
+
+        again = client.post("/train", json={"user_id": "u1"}).json()
+        assert again == {"job_id": body["job_id"], "status": QUEUED, "deduplicated": True}
+
+        status = client.get(f"/train/{body['job_id']}").json()
+        assert (status["user_id"], status["kind"], status["progress"]) == ("u1", "personalization", 0.0)
+
+    def test_queue_counts_in_health_and_metrics(self, client, monkeypatch):
+        monkeypatch.setattr(main.settings, "metrics_enabled", True)
+        client.post("/train", json={"user_id": "u1"})
+        assert client.get("/health").json()["jobs"]["by_status"] == {QUEUED: 1}
+        assert 'training_jobs{status="queued"} 1' in client.get("/metrics").text
+
+    def test_errors(self, client):
+        assert client.post("/train", json={}).status_code == 400
+        assert client.post("/train", json={"user_id": "u1", "kind": "nope"}).status_code == 400
+        assert client.get("/train/unknown").status_code == 404
@@ -0,0 +1,98 @@
+"""
+Tests for the in-process metrics registry and the /metrics endpoint.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main, metrics
+from backend.metrics import MetricsRegistry
+from backend.providers.base import ProviderRateLimitError
+
+
+class TestMetricsRegistry:
+    """Test suite for MetricsRegistry."""
+
+    @pytest.fixture
+    def registry(self):
+        return MetricsRegistry()
+
+    def test_counter_children_are_cached(self, registry):
+        """Test that binding the same labels returns the same child."""
+        counter = registry.counter("requests_total", "Requests", ("route",))
+        child = counter.labels("/suggest")
+        assert counter.labels("/suggest") is child
+        child.inc()
+        child.inc(2)
+        assert 'requests_total{route="/suggest"} 3' in registry.render()
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        """Test histogram rendering in Prometheus format."""
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_count 3" in text
+
+    def test_callback_metric(self, registry):
+        """Test that callback metrics are read at render time."""
+        state = {"value": 1}
+        registry.callback("pool_in_flight", "In flight", "gauge", lambda: state["value"])
+        state["value"] = 7
+        assert "pool_in_flight 7" in registry.render()
+
+    def test_label_mismatch(self, registry):
+        """Test that the wrong number of label values is rejected."""
+        counter = registry.counter("errors_total", "Errors", ("provider", "error"))
+        with pytest.raises(ValueError):
+            counter.labels("gemini")
+
+    def test_duplicate_registration(self, registry):
+        """Test that metric names are unique."""
+        registry.counter("dup_total", "Dup")
+        with pytest.raises(ValueError):
+            registry.counter("dup_total", "Dup")
+
+    def test_record_token_usage_shapes(self):
+        """Test token extraction from each provider's metadata shape."""
+        metrics.record_token_usage("gemini", {"prompt_tokens": 5, "response_tokens": 7})
+        metrics.record_token_usage("qwen", {"usage": {"input_tokens": 3, "output_tokens": 4}})
+        assert metrics.provider_tokens.labels("gemini", "completion").value >= 7
+        assert metrics.provider_tokens.labels("qwen", "prompt").value >= 3
+
+
+class TestMetricsEndpoint:
+    """Test the /metrics endpoint and request instrumentation."""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(main.app, raise_server_exceptions=False)
+
+    def test_requests_are_counted_by_route_template(self, client):
+        """Test that requests are labelled with the route template, not the raw path."""
+        client.get("/personalization/some-user")
+        client.post("/suggest", json={"user_id": "u1", "context": "hello there"})
+        text = client.get("/metrics").text
+        assert 'http_requests_total{route="/personalization/{user_id}",method="GET",status="200"}' in text
+        assert 'provider_requests_total{provider="mock"}' in text
+        assert "provider_pool_saturation" in text
+
+    def test_provider_errors_by_type(self, client, monkeypatch):
+        """Test that provider errors are split by exception type and retryability."""
+        class FailingProvider(main.MockProvider):
+            async def suggest(self, request):
+                raise ProviderRateLimitError("failing")
+
+        monkeypatch.setitem(main.providers, "failing", FailingProvider(main.ProviderConfig()))
+        response = client.post("/suggest", json={"user_id": "u1", "context": "hi", "provider": "failing"})
+        assert response.status_code == 500
+        text = client.get("/metrics").text
+        assert 'provider_errors_total{provider="failing",error="ProviderRateLimitError",retryable="true"} 1' in text
+
+    def test_disabled(self, client, monkeypatch):
+        """Test that /metrics is hidden when metrics are disabled."""
+        monkeypatch.setattr(main.settings, "metrics_enabled", False)
+        assert client.get("/metrics").status_code == 404
@@ -0,0 +1,109 @@
+"""
+Tests for event-loop-lag based overload protection.
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.overload import OverloadController, Decision, LoadLevel, parse_priority
+
+
+class TestOverloadController:
+    """Test suite for OverloadController."""
+
+    @pytest.fixture
+    def controller(self):
+        """Controller with small, easy-to-cross thresholds."""
+        return OverloadController(lag_threshold_ms=10, max_in_flight=4, smoothing=1.0)
+
+    def test_accepts_when_idle(self, controller):
+        """Test that every priority is accepted below thresholds."""
+        assert controller.level() is LoadLevel.OK
+        for priority in ("low", "normal", "high"):
+            assert controller.decide(priority) is Decision.ACCEPT
+
+    def test_elevated_by_lag(self, controller):
+        """Test that elevated lag sheds low and degrades normal traffic."""
+        controller.record_lag(15)
+        assert controller.level() is LoadLevel.ELEVATED
+        assert controller.decide("low") is Decision.SHED
+        assert controller.decide("normal") is Decision.DEGRADE
+        assert controller.decide("high") is Decision.ACCEPT
+
+    def test_critical_by_in_flight(self, controller):
+        """Test that critical in-flight counts shed all but high priority."""
+        controller.in_flight = 8
+        assert controller.level() is LoadLevel.CRITICAL
+        assert controller.decide("normal") is Decision.SHED
+        assert controller.decide("high") is Decision.DEGRADE
+        assert controller.shed_count == 1
+        assert controller.degraded_count == 1
+
+    def test_lag_is_smoothed(self):
+        """Test that a single slow tick does not flip the controller."""
+        controller = OverloadController(lag_threshold_ms=10, smoothing=0.1)
+        controller.record_lag(50)
+        assert controller.level() is LoadLevel.OK
+        assert controller.max_lag_ms == 50
+
+    def test_probe_measures_blocked_loop(self):
+        """Test that the background probe observes a blocked event loop."""
+        controller = OverloadController(sample_interval_ms=5, smoothing=1.0)
+
+        async def run_test():
+            controller.start()
+            await asyncio.sleep(0.01)
+            import time
+            time.sleep(0.05)  # block the loop
+            await asyncio.sleep(0.01)
+            await controller.stop()
+
+        asyncio.run(run_test())
+        assert controller.max_lag_ms >= 30
+
+    def test_parse_priority(self):
+        """Test priority header normalization."""
+        assert parse_priority(None) == "normal"
+        assert parse_priority(" HIGH ") == "high"
+        assert parse_priority("urgent") == "normal"
+
+
+class TestOverloadMiddleware:
+    """Test the middleware wiring in the FastAPI app."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        controller = OverloadController(lag_threshold_ms=10, max_in_flight=4, retry_after_seconds=3)
+        monkeypatch.setattr(main, "overload_controller", controller)
+        return TestClient(main.app), controller
+
+    def test_sheds_low_priority_with_retry_after(self, client):
+        """Test that overloaded low-priority requests get a fast 503."""
+        client, controller = client
+        controller.lag_ms = 50
+        response = client.post(
+            "/suggest",
+            json={"user_id": "u1", "context": "hi there"},
+            headers={"X-Request-Priority": "low"},
+        )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+
+    def test_degrades_to_fallback_provider(self, client, monkeypatch):
+        """Test that degraded requests are served by the fallback provider."""
+        client, controller = client
+        controller.lag_ms = 15
+        monkeypatch.setitem(main.providers, "expensive", None)  # would fail if used
+        response = client.post("/suggest", json={"user_id": "u1", "context": "hi", "provider": "expensive"})
+        assert response.status_code == 200
+        assert len(response.json()["suggestions"]) == 3
+
+    def test_health_is_never_shed(self, client):
+        """Test that health checks bypass load shedding."""
+        client, controller = client
+        controller.lag_ms = 1000
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json()["load"]["level"] == "critical"
@@ -0,0 +1,134 @@
+"""
+Tests for the SQLite-backed personalization store.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.personalization_store import LruTier, PersonalizationStore
+from backend.shared_state import LocalVersionIndex
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "personalization.db")
+
+
+class TestPersonalizationStore:
+    """Test suite for PersonalizationStore."""
+
+    def test_round_trip_survives_restart(self, db_path):
+        """Test that records are persisted, not just cached."""
+        store = PersonalizationStore(db_path)
+        store.put("u1", {"artifacts": {"tone": "casual", "emoji": "🙂"}})
+        store.close()
+
+        reopened = PersonalizationStore(db_path)
+        assert reopened.get("u1") == {"artifacts": {"tone": "casual", "emoji": "🙂"}}
+        assert reopened.get("missing") is None
+
+    def test_delete(self, db_path):
+        """Test that deletes report whether a record existed and evict the hot entry."""
+        store = PersonalizationStore(db_path)
+        store.put("u1", {"artifacts": {}})
+        assert store.delete("u1") is True
+        assert store.get("u1") is None
+        assert store.delete("u1") is False
+
+    def test_hot_tier_serves_repeat_reads(self, db_path):
+        """Test that repeat reads, including of unknown users, skip SQLite."""
+        lookups = []
+        store = PersonalizationStore(db_path, on_lookup=lookups.append)
+        store.put("u1", {"artifacts": {"k": "v"}})
+        store.get("u1")
+        store.get("nobody")
+        store.get("nobody")
+        assert lookups == [True, False, True]
+
+    def test_peek_summary_never_reads_sqlite(self, db_path):
+        """Test that peek_summary reports misses instead of loading, and hits once loaded."""
+        versions = LocalVersionIndex()
+        writer = PersonalizationStore(db_path, versions=versions)
+        store = PersonalizationStore(db_path, versions=versions)
+        writer.put("u1", {"artifacts": {}}, summary="Short replies.")
+        assert store.peek_summary("u1") == (False, None)
+        assert store.get_summary("u1") == "Short replies."
+        assert store.peek_summary("u1") == (True, "Short replies.")
+        writer.set_summary("u1", "Long replies.")
+        assert store.peek_summary("u1") == (False, None)
+
+    def test_hot_tier_is_bounded(self, db_path):
+        """Test LRU eviction by entry count and by total bytes."""
+        store = PersonalizationStore(db_path, max_entries=2)
+        for user in ("a", "b", "c"):
+            store.put(user, {"artifacts": {}})
+        store.get("b")
+        assert list(store._hot.entries) == ["c", "b"]
+
+        small = PersonalizationStore(db_path, max_bytes=100)
+        small.put("big", {"artifacts": {"blob": "x" * 200}})
+        small.put("a", {"artifacts": {"k": "v"}})
+        assert list(small._hot.entries) == ["a"]
+        assert small.snapshot()["hot_bytes"] <= 100
+        assert small.get("big")["artifacts"]["blob"] == "x" * 200
+
+    def test_write_invalidates_other_workers(self, db_path):
+        """Test that a write through one store is seen by another sharing the version index."""
+        versions = LocalVersionIndex()
+        first = PersonalizationStore(db_path, versions=versions)
+        second = PersonalizationStore(db_path, versions=versions)
+        first.put("u1", {"artifacts": {"v": 1}})
+        assert second.get("u1") == {"artifacts": {"v": 1}}
+
+        first.put("u1", {"artifacts": {"v": 2}})
+        assert second.get("u1") == {"artifacts": {"v": 2}}
+        first.delete("u1")
+        assert second.get("u1") is None
+
+    def test_evicted_version_is_not_served_stale(self, db_path):
+        """Test that a key dropped from a full version index forces a reload."""
+        versions = LocalVersionIndex()
+        reader = PersonalizationStore(db_path, versions=versions)
+        writer = PersonalizationStore(db_path, versions=versions)
+        writer.put("u1", {"artifacts": {"v": 1}})
+        versions._versions.clear()  # index evicted the key
+        assert reader.get("u1") == {"artifacts": {"v": 1}}
+
+        writer.put("u1", {"artifacts": {"v": 2}})
+        versions._versions.clear()
+        assert reader.get("u1") == {"artifacts": {"v": 2}}
+
+
+class TestLruTier:
+    """Test suite for LruTier."""
+
+    def test_versions_and_bounds(self):
+        tier = LruTier(max_entries=2, max_bytes=10)
+        tier.put("a", 1, "A", 4)
+        assert tier.get("a", 1) == (True, "A")
+        assert tier.get("a", 2) == (False, None)  # stale version
+
+        tier.put("b", 1, "B", 4)
+        tier.get("a", 1)
+        tier.put("c", 1, "C", 4)  # over both bounds: evicts b, the least recently used
+        assert [tier.get(k, 1)[0] for k in "abc"] == [True, False, True]
+        assert tier.bytes == 8
+
+        tier.put("d", 1, "D", 11)  # too large to cache
+        assert tier.get("d", 1) == (False, None)
+        tier.discard("a")
+        assert list(tier.entries) == ["c"] and tier.bytes == 4
+
+
+class TestPersonalizationEndpoints:
+    """Test suite for the personalization endpoints."""
+
+    def test_upload_get_delete(self, db_path, monkeypatch):
+        monkeypatch.setattr(main, "_personalization_store", PersonalizationStore(db_path))
+        client = TestClient(main.app)
+        assert client.get("/personalization/u1").json() == {}
+        client.post("/upload_personalization", json={"user_id": "u1", "artifacts": {"k": "v"}})
+        assert client.get("/personalization/u1").json() == {"artifacts": {"k": "v"}}
+        assert client.post("/delete_personalization", json={"user_id": "u1"}).json() == {"status": "ok", "deleted": True}
+        assert client.get("/personalization/u1").json() == {}
@@ -0,0 +1,107 @@
+"""
+Tests for profile summaries and their use on /suggest.
+"""
+
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.personalization_store import PersonalizationStore
+from backend.profile_summary import extract_messages, style_features, summarize_artifacts
+from backend.providers.base import SuggestRequest, SuggestResponse
+
+MESSAGES = [
+    "sounds good to me!",
+    "on my way 😂",
+    "lol sounds good to me",
+    "ok on my way",
+    "haha 😂😂 see you soon",
+    "see you soon!",
+]
+
+
+def android_export(messages, consent=True) -> str:
+    examples = [{"context": "hey", "response": m, "ts": 0} for m in messages]
+    return base64.b64encode(json.dumps({"consent": consent, "examples": examples}).encode()).decode()
+
+
+class TestProfileSummary:
+    """Test suite for summary derivation."""
+
+    def test_reads_android_export(self):
+        """Test that the base64 export's responses are the analysed messages."""
+        assert extract_messages({"export": android_export(MESSAGES)}) == MESSAGES
+
+    def test_no_summary_without_consent_or_messages(self):
+        assert summarize_artifacts({"export": android_export(MESSAGES, consent=False)}) is None
+        assert summarize_artifacts({"k": "v"}) is None
+        assert summarize_artifacts({"export": "not base64 or json"}) is None
+
+    def test_style_emoji_and_phrases(self):
+        """Test the features the summary is built from."""
+        features = style_features(MESSAGES)
+        assert features["lowercase_start"] == 1.0
+        assert features["top_emoji"] == ["😂"]
+        assert features["phrases"][:3] == ["sounds good to me", "on my way", "see you soon"]
+
+        summary = summarize_artifacts({"messages": MESSAGES})
+        assert "starts lowercase" in summary
+        assert "😂" in summary
+        assert '"on my way"' in summary
+        assert len(summary) <= 320
+
+
+class TestSummaryOnSuggest:
+    """Test suite for summaries reaching providers."""
+
+    @pytest.fixture
+    def captured(self, tmp_path, monkeypatch):
+        requests = []
+
+        class CapturingProvider(main.MockProvider):
+            async def suggest(self, request):
+                requests.append(request)
+                return SuggestResponse(suggestions=[])
+
+        store = PersonalizationStore(str(tmp_path / "p.db"))
+        monkeypatch.setattr(main, "_personalization_store", store)
+        monkeypatch.setitem(main.providers, "capture", CapturingProvider(main.ProviderConfig()))
+        return requests
+
+    def test_upload_then_suggest(self, captured):
+        """Test that the summary computed at upload is passed on every /suggest."""
+        client = TestClient(main.app)
+        client.post("/upload_personalization", json={"user_id": "u1", "artifacts": {"export": android_export(MESSAGES)}})
+        summary = client.get("/personalization/u1/summary").json()["user_profile_summary"]
+        assert summary.startswith("User writes")
+
+        lookups = []
+        main._personalization_store._on_lookup = lookups.append
+        for _ in range(2):
+            client.post("/suggest", json={"user_id": "u1", "context": "hi", "provider": "capture"})
+        assert [r.user_profile_summary for r in captured] == [summary, summary]
+        assert lookups == [True, True]  # served from the hot tier, never recomputed
+
+        client.post("/upload_personalization", json={"user_id": "u1", "artifacts": {"k": "v"}})
+        client.post("/suggest", json={"user_id": "u1", "context": "hi", "provider": "capture"})
+        assert captured[-1].user_profile_summary is None
+
+    def test_summary_reaches_adapter_prompt(self):
+        from backend.providers.openrouter.provider import OpenRouterProvider
+
+        adapter = OpenRouterProvider(main.ProviderConfig(api_key="k", use_shared_transport=True))
+        request = SuggestRequest(user_id="u", context="hi", modes=["casual"], intensity=5,
+                                 user_profile_summary="User writes very short replies.")
+        assert "User writing style: User writes very short replies." in adapter._build_messages(request)[0]["content"]
+
+    def test_profile_text_is_shared_by_adapters(self):
+        adapter = main.MockProvider(main.ProviderConfig())
+        request = SuggestRequest(user_id="u", context="hi", modes=["casual"], intensity=5)
+        assert adapter._profile_text(request) == ""
+        request = request.model_copy(update={"user_profile_summary": "Short replies.", "style_examples": ["omw", "lol"]})
+        lines = adapter._profile_text(request).splitlines()
+        assert lines[1] == "User writing style: Short replies."
+        assert lines[-2:] == ['- "omw"', '- "lol"']
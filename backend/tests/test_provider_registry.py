@@ -0,0 +1,89 @@
+"""
+Tests for the lazy provider registry.
+"""
+
+import asyncio
+import sys
+import types
+
+import pytest
+
+from backend.providers.base import BaseProvider, ProviderConfig, SuggestResponse
+from backend.providers.registry import ProviderRegistry, ProviderSpec
+
+
+class FakeProvider(BaseProvider):
+    def _validate_config(self):
+        if self.config.api_key == "bad":
+            raise ValueError("bad key")
+
+    async def suggest(self, request):
+        return SuggestResponse(suggestions=[])
+
+    def get_provider_name(self):
+        return "Fake"
+
+    def get_cost_estimate(self, request):
+        return 0.0
+
+
+@pytest.fixture
+def fake_module(monkeypatch):
+    """A provider module that records when it is imported."""
+    imports = []
+
+    def factory(config):
+        imports.append(config.api_key)
+        return FakeProvider(config)
+
+    module = types.ModuleType("fake_provider_module")
+    module.FakeProvider = factory
+    monkeypatch.setitem(sys.modules, "fake_provider_module", module)
+    return imports
+
+
+class TestProviderRegistry:
+    """Test suite for ProviderRegistry."""
+
+    def test_from_settings_registers_only_configured_providers(self):
+        """Test that providers without an API key are not registered."""
+        settings = types.SimpleNamespace(gemini_api_key=None, openrouter_api_key="key", qwen_api_key="")
+        registry = ProviderRegistry.from_settings(settings)
+        assert registry.status() == {"openrouter": "pending"}
+        assert "openrouter" in registry
+        assert "gemini" not in registry
+
+    def test_registration_does_not_import(self, fake_module):
+        """Test that the adapter is only constructed on first use."""
+        registry = ProviderRegistry()
+        registry.register(ProviderSpec("fake", "fake_provider_module", "FakeProvider"), ProviderConfig(api_key="k"))
+        assert fake_module == []
+        provider = asyncio.run(registry.acquire("fake"))
+        assert isinstance(provider, FakeProvider)
+        assert registry["fake"] is provider
+        assert fake_module == ["k"]
+        assert registry.status() == {"fake": "loaded"}
+
+    def test_failed_load_is_reported(self, fake_module):
+        """Test that a provider failing validation is dropped, not retried on every request."""
+        registry = ProviderRegistry()
+        registry.register(ProviderSpec("fake", "fake_provider_module", "FakeProvider"), ProviderConfig(api_key="bad"))
+        assert asyncio.run(registry.acquire("fake")) is None
+        assert "fake" not in registry
+        assert registry.status() == {"fake": "failed"}
+
+    def test_warm_up_loads_everything(self, fake_module):
+        """Test that warm-up loads all pending providers."""
+        registry = ProviderRegistry({"mock": FakeProvider(ProviderConfig())})
+        for name in ("a", "b"):
+            registry.register(ProviderSpec(name, "fake_provider_module", "FakeProvider"), ProviderConfig(api_key=name))
+        asyncio.run(registry.warm_up())
+        assert registry.status() == {"mock": "loaded", "a": "loaded", "b": "loaded"}
+        assert sorted(registry) == ["a", "b", "mock"]
+
+    def test_unknown_provider(self):
+        """Test that unknown names behave like a missing dict key."""
+        registry = ProviderRegistry()
+        assert asyncio.run(registry.acquire("nope")) is None
+        with pytest.raises(KeyError):
+            registry["nope"]
@@ -0,0 +1,79 @@
+"""
+Tests for PII redaction before provider calls.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.providers.base import SuggestionItem, SuggestResponse
+from backend.redaction import redact, restore
+
+
+class TestRedact:
+    """Test suite for redact and restore."""
+
+    @pytest.mark.parametrize("text, expected", [
+        ("Call me at +1 (555) 123-4567 or 555.987.6543", "Call me at [PHONE_1] or [PHONE_2]"),
+        ("mail ann.lee+work@example.co.uk!", "mail [EMAIL_1]!"),
+        ("card 4111 1111 1111 1111 or 4012-8888-8888-1881", "card [CARD_1] or [CARD_2]"),
+        ("I live at 221B Baker Street, Apt 3 now", "I live at [ADDRESS_1] now"),
+        ("drop it at 1600 pennsylvania ave", "drop it at [ADDRESS_1]"),
+    ])
+    def test_pii_is_replaced(self, text, expected):
+        found = []
+        assert redact(text, found) == expected
+        assert restore(expected, found) == text
+
+    @pytest.mark.parametrize("text", [
+        "ok see you soon",
+        "5 min by the way",
+        "meeting on 2024-01-15, order 12345",
+        "not a card: 4111 1111 1111 1112",
+        "at 10:30 or 11",
+    ])
+    def test_other_text_is_untouched(self, text):
+        found = []
+        assert redact(text, found) == text and found == []
+
+    def test_values_keep_their_placeholder_across_texts(self):
+        found = []
+        assert redact("text 555-123-4567", found) == "text [PHONE_1]"
+        assert redact("call 555-123-4567 or 555-765-4321", found) == "call [PHONE_1] or [PHONE_2]"
+        assert [p for p, _ in found] == ["[PHONE_1]", "[PHONE_2]"]
+
+    def test_unknown_placeholders_are_kept(self):
+        assert restore("Reach me at [PHONE_2]", [("[PHONE_1]", "555-123-4567")]) == "Reach me at [PHONE_2]"
+
+
+class TestSuggestRedaction:
+    """Test that /suggest redacts the provider request and restores its output."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        requests = []
+
+        class RecordingProvider(main.MockProvider):
+            async def suggest(self, request):
+                requests.append(request)
+                return SuggestResponse(suggestions=[
+                    SuggestionItem(text=f"{i}: I'll text {request.context}", tone="casual") for i in range(3)
+                ])
+
+        monkeypatch.setattr(main.settings, "rerank_enabled", False)
+        monkeypatch.setattr(main.settings, "diversity_enabled", False)
+        monkeypatch.setitem(main.providers, "recording", RecordingProvider(main.ProviderConfig()))
+        client = TestClient(main.app)
+        client.requests = requests
+        return client
+
+    def test_provider_never_sees_pii(self, client):
+        body = {"user_id": "u1", "context": "ann@example.com", "provider": "recording"}
+        data = client.post("/suggest", json=body).json()
+        assert client.requests[-1].context == "[EMAIL_1]"
+        assert [s["text"] for s in data["suggestions"]] == [f"{i}: I'll text ann@example.com" for i in range(3)]
+
+    def test_disabled(self, client, monkeypatch):
+        monkeypatch.setattr(main.settings, "pii_redaction_enabled", False)
+        client.post("/suggest", json={"user_id": "u1", "context": "ann@example.com", "provider": "recording"})
+        assert client.requests[-1].context == "ann@example.com"
@@ -0,0 +1,140 @@
+"""
+Tests for suggestion reranking and its offline evaluator.
+"""
+
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main, rerank, rerank_eval, telemetry_log
+from backend.providers.base import SuggestionItem, SuggestResponse
+from backend.rerank import FEATURES, Reranker
+from backend.telemetry_log import TelemetryLog
+
+POOL = [
+    SuggestionItem(text="Certainly. I shall confirm the arrangements for dinner tomorrow evening.", tone="formal"),
+    SuggestionItem(text="yes dinner tomorrow works!", tone="casual"),
+    SuggestionItem(text="Only if dessert is involved 🍰", tone="witty"),
+    SuggestionItem(text="ok", tone="casual"),
+]
+CASUAL_FAN = {
+    "mode:casual:accepted": 30.0, "mode:formal:rejected": 30.0, "mode:witty:rejected": 10.0,
+    "used_samples": 30.0, "used_chars": 750.0,
+}
+
+
+def _column(matrix: np.ndarray, name: str) -> np.ndarray:
+    return matrix[:, FEATURES.index(name)]
+
+
+class TestFeatures:
+    """Test suite for the candidate feature matrix."""
+
+    def test_feature_columns(self):
+        matrix = rerank.features("dinner tomorrow?", POOL, ["casual"], CASUAL_FAN, ["yess dinner sounds great"])
+        assert matrix.shape == (len(POOL), len(FEATURES)) and matrix.dtype == np.float32
+        assert _column(matrix, "tone_match").tolist() == [0, 1, 0, 1]
+        acceptance = _column(matrix, "tone_acceptance")
+        assert acceptance[1] > 0.4 and acceptance[0] < -0.4
+        length_fit = _column(matrix, "length_fit")
+        assert np.argmax(length_fit) == 1  # closest to the 25-character mean
+        assert _column(matrix, "context_similarity")[1] > _column(matrix, "context_similarity")[2]
+        assert _column(matrix, "style_similarity")[1] > 0
+        assert _column(matrix, "position").tolist() == [0, -0.25, -0.5, -0.75]
+
+    def test_without_history_or_examples(self):
+        matrix = rerank.features("hi", POOL, ["formal"])
+        assert not _column(matrix, "tone_acceptance").any()
+        assert not _column(matrix, "style_similarity").any()
+        assert rerank.features("hi", [], ["formal"]).shape == (0, len(FEATURES))
+
+
+class TestReranker:
+    """Test suite for Reranker."""
+
+    def test_history_reorders_pool(self):
+        top = Reranker().rerank("dinner tomorrow?", POOL, ["casual", "formal", "witty"], CASUAL_FAN)
+        assert top == [POOL[1], POOL[2], POOL[0]]  # formal falls behind; "ok" is far too short
+
+    def test_keeps_provider_order_on_ties(self):
+        pool = [SuggestionItem(text="same", tone="casual") for _ in range(4)]
+        assert Reranker({name: 0.0 for name in FEATURES}).rerank("x", pool, ["casual"]) == pool[:3]
+
+    def test_weights_file(self, tmp_path):
+        path = tmp_path / "w.json"
+        path.write_text(json.dumps({"position": 50.0}))
+        reranker = Reranker.load(str(path))
+        assert reranker.as_dict()["position"] == 50.0
+        assert reranker.rerank("dinner tomorrow?", POOL, ["casual"], CASUAL_FAN) == POOL[:3]
+        with pytest.raises(ValueError):
+            Reranker({"colour": 1.0})
+
+
+class TestSuggestReranking:
+    """Test that /suggest over-generates and returns the best three."""
+
+    def test_pool_is_reranked(self, monkeypatch):
+        requests = []
+
+        class PoolProvider(main.MockProvider):
+            async def suggest(self, request):
+                requests.append(request)
+                return SuggestResponse(suggestions=POOL)
+
+        monkeypatch.setattr(main.settings, "rerank_enabled", True)
+        monkeypatch.setattr(main.settings, "suggest_candidates", 6)
+        monkeypatch.setattr(main._feedback_store, "peek_profile", lambda user_id: (None, CASUAL_FAN))
+        monkeypatch.setitem(main.providers, "pool", PoolProvider(main.ProviderConfig()))
+        body = TestClient(main.app).post(
+            "/suggest", json={"user_id": "u1", "context": "dinner tomorrow?", "provider": "pool"}
+        ).json()
+        assert requests[-1].num_suggestions == 6
+        assert len(body["suggestions"]) == 3
+        assert body["suggestions"][0]["text"] == POOL[1].text
+
+        monkeypatch.setattr(main.settings, "rerank_enabled", False)
+        body = TestClient(main.app).post(
+            "/suggest", json={"user_id": "u1", "context": "dinner tomorrow?", "provider": "pool"}
+        ).json()
+        assert body["suggestions"][0]["text"] == POOL[0].text
+
+
+class TestOfflineEvaluator:
+    """Test suite for replaying logged feedback."""
+
+    @staticmethod
+    def _log(directory):
+        log = TelemetryLog(str(directory), writer_id=0)
+        events = []
+        for i in range(60):
+            pool = [
+                {"text": "I acknowledge receipt of your message and will respond in due course.", "tone": "formal"},
+                {"text": "haha nice, see ya", "tone": "casual"},
+                {"text": "Is this a trick question?", "tone": "witty"},
+                {"text": "Noted, thank you.", "tone": "formal"},
+            ]
+            events.append({"type": "suggestions_shown", "context": f"are you coming tonight {i}",
+                           "modes": ["formal", "casual"], "suggestions": pool, "chosen": 1 if i % 4 else 2})
+        events.append({"type": "suggestions_shown", "context": "x", "suggestions": [], "chosen": None})
+        events.append({"type": "page_view"})
+        log.append(events, 10000, {"user_id": "u1"})
+        log.close()
+
+    def test_replay_and_fit(self, tmp_path, capsys):
+        self._log(tmp_path / "log")
+        data = rerank_eval.samples(telemetry_log.scan(str(tmp_path / "log")))
+        assert len(data) == 60
+        # The first pool is scored with no history; later ones see earlier choices
+        assert not _column(data[0][0], "tone_acceptance").any()
+        assert _column(data[-1][0], "tone_acceptance")[1] > 0
+
+        provider = rerank_eval.evaluate(data, None)
+        assert provider["pools"] == 60 and provider["top1"] == 0.0 and provider["top3"] == 1.0
+        assert rerank_eval.evaluate(data, Reranker().weights)["mrr"] > provider["mrr"]
+
+        out = tmp_path / "fitted.json"
+        rerank_eval.main([str(tmp_path / "log"), "--fit", str(out)])
+        assert "fitted" in capsys.readouterr().out
+        assert set(Reranker.load(str(out)).as_dict()) == set(FEATURES)
@@ -0,0 +1,95 @@
+"""
+Tests for the output safety filter.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.providers.base import SuggestionItem, SuggestResponse
+from backend.providers.canned import CANNED_REPLIES
+from backend.safety import BUILTIN_DIR, SafetyFilter, compile_terms, fold, read_blocklists
+
+
+@pytest.fixture
+def safety():
+    return SafetyFilter({"en": ["darn", "heck*", "go away"], "es": ["caramba"], "pt-br": ["poxa"]})
+
+
+class TestSafetyFilter:
+    """Test suite for SafetyFilter."""
+
+    @pytest.mark.parametrize("text", [
+        "Darn, I missed it", "what the HECK", "heckin late", "just go   away", "d4rn it", "Caramba!",
+    ])
+    def test_blocked_terms_are_flagged(self, safety, text):
+        assert safety.flagged(text, "es")
+
+    @pytest.mark.parametrize("text", ["darning socks", "check it", "go on, I'm away", "room 4", "see you at 5"])
+    def test_other_words_are_not(self, safety, text):
+        assert not safety.flagged(text, "en")
+
+    def test_locale_fallbacks(self, safety):
+        assert safety.flagged("caramba", "es-MX")
+        assert not safety.flagged("caramba", "en")
+        assert not safety.flagged("caramba", "fr")  # unknown: default locale only
+        assert safety.flagged("poxa", "pt_BR") and not safety.flagged("poxa", "pt")
+        assert safety.flagged("darn", "pt-BR") and safety.flagged("darn", None)
+
+    def test_filter_keeps_order(self, safety):
+        items = [SuggestionItem(text=t, tone="casual") for t in ("ok", "darn it", "sure", "heck no")]
+        assert [s.text for s in safety.filter(items, "en")] == ["ok", "sure"]
+        assert SafetyFilter({}).filter(items) == items
+
+    def test_fold(self):
+        assert fold("Ça VA, 5h1t, a$$, room 455") == "ca va, shit, ass, room 455"
+        assert compile_terms(["*", " "]) is None
+
+    def test_builtin_blocklists(self):
+        blocklists = read_blocklists(BUILTIN_DIR)
+        assert {"en", "es", "fr", "de", "pt"} <= set(blocklists)
+        builtin = SafetyFilter.load()
+        assert builtin.flagged("fucking hell") and builtin.flagged("mierda", "es")
+        assert not builtin.flagged("Sounds good, see you at the class tomorrow!")
+
+    @pytest.mark.parametrize("text, locale", [
+        ("I love shitake mushrooms", "en"),
+        ("The curtains are fire retardant", "en"),
+        ("Flame retardants and growth retardation", "en"),
+        ("Don't be niggardly with the snacks", "en"),
+        ("Es su padre putativo", "es"),
+        ("Pai putativo", "pt"),
+    ])
+    def test_builtin_blocklists_spare_ordinary_words(self, text, locale):
+        assert not SafetyFilter.load().flagged(text, locale)
+
+    @pytest.mark.parametrize("text", ["shit", "this is shitty", "retarded", "bullshitting me"])
+    def test_builtin_blocklists_keep_inflections(self, text):
+        assert SafetyFilter.load().flagged(text)
+
+
+class TestSuggestSafety:
+    """Test the safety stage of /suggest."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        class RudeProvider(main.MockProvider):
+            async def suggest(self, request):
+                texts = ["darn it, fine", "Sure thing", "heck no", "Let me check my calendar", "darn!"]
+                return SuggestResponse(suggestions=[SuggestionItem(text=t, tone="casual") for t in texts])
+
+        monkeypatch.setattr(main.settings, "rerank_enabled", False)
+        monkeypatch.setattr(main, "_safety_filter", SafetyFilter({"en": ["darn", "heck"]}))
+        monkeypatch.setitem(main.providers, "rude", RudeProvider(main.ProviderConfig()))
+        return TestClient(main.app)
+
+    def test_flagged_suggestions_are_replaced_locally(self, client):
+        data = client.post("/suggest", json={"user_id": "u1", "context": "Dinner?", "provider": "rude"}).json()
+        texts = [s["text"] for s in data["suggestions"]]
+        assert texts[:2] == ["Sure thing", "Let me check my calendar"]
+        assert len(texts) == 3 and texts[2] in CANNED_REPLIES["casual"]  # from the local fallback
+
+    def test_disabled(self, client, monkeypatch):
+        monkeypatch.setattr(main.settings, "safety_filter_enabled", False)
+        data = client.post("/suggest", json={"user_id": "u1", "context": "Dinner?", "provider": "rude"}).json()
+        assert data["suggestions"][0]["text"] == "darn it, fine"
@@ -0,0 +1,149 @@
+"""
+Tests for shared worker state and the multi-process launcher.
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from backend import shared_state
+from backend.metrics import MetricsRegistry
+from backend.shared_state import LocalRateLimiter, LocalVersionIndex
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """Two attachments to one shared segment, standing in for two worker processes."""
+    monkeypatch.setattr(shared_state, "state", shared_state.state)  # attach() replaces it
+    handles, shm = shared_state.create_shared(2, 64, multiprocessing.get_context("spawn"))
+    attached = [shared_state.attach(handles, 0), shared_state.attach(handles, 1)]
+    yield attached
+    for worker in attached:
+        worker.close()
+    shm.close()
+    shm.unlink()
+
+
+class TestSharedState:
+    """Test suite for the shared-memory backends."""
+
+    def test_counters_sum_across_workers(self, workers):
+        """Test that each worker writes its own column and reads see the total."""
+        first, second = workers
+        first.counters.incr("requests", 2)
+        second.counters.incr("requests", 3)
+        assert first.counters.get("requests") == 5
+        assert second.counters.slot("requests") == first.counters.slot("requests")
+
+    def test_metrics_discover_other_workers_series(self, workers):
+        """Test that /metrics on one worker includes series recorded by another."""
+        first = MetricsRegistry(workers[0].counters)
+        second = MetricsRegistry(workers[1].counters)
+        for registry in (first, second):
+            registry.counter("errors_total", "Errors", ("provider",))
+            registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1,))
+        second.get("errors_total").labels("qwen").inc()
+        second.get("latency_seconds").labels("/suggest").observe(0.05)
+        first.get("latency_seconds").labels("/suggest").observe(0.5)
+
+        text = first.render()
+        assert 'errors_total{provider="qwen"} 1' in text
+        assert 'latency_seconds_bucket{route="/suggest",le="0.1"} 1' in text
+        assert 'latency_seconds_count{route="/suggest"} 2' in text
+
+    def test_shared_rate_limit(self, workers):
+        """Test that a key's window is enforced across workers."""
+        first, second = workers
+        assert first.rate_limiter.hit("u1", 2, 60, now=1000.0) == (True, 20)
+        assert second.rate_limiter.hit("u1", 2, 60, now=1001.0)[0]
+        assert not first.rate_limiter.hit("u1", 2, 60, now=1002.0)[0]
+        assert first.rate_limiter.hit("u1", 2, 60, now=1021.0)[0]  # next window
+
+    def test_shared_version_index(self, workers):
+        """Test that invalidations are visible to every worker and never repeat."""
+        first, second = workers
+        assert second.cache_index.version("user:u1") == 0
+        version = first.cache_index.bump("user:u1")
+        assert second.cache_index.version("user:u1") == version
+        assert second.cache_index.bump("user:u2") > version
+
+
+class TestLocalState:
+    """Test suite for the single-process backends."""
+
+    def test_local_rate_limiter(self):
+        limiter = LocalRateLimiter()
+        assert limiter.hit("u1", 1, 10, now=5.0) == (True, 5)
+        assert limiter.hit("u1", 1, 10, now=6.0) == (False, 4)
+        assert limiter.hit("u1", 1, 10, now=10.0)[0]
+
+    def test_local_version_index(self):
+        index = LocalVersionIndex()
+        first = index.bump("a")
+        assert index.bump("b") > first
+        assert index.version("a") == first
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(url: str, payload: dict = None) -> dict:
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        body = resp.read().decode()
+    return json.loads(body) if body.startswith("{") else body
+
+
+class TestLauncher:
+    """End-to-end test of the multi-worker launcher."""
+
+    def test_workers_share_state(self, tmp_path):
+        """Test that state written through one worker is visible through all of them."""
+        port = _free_port()
+        env = dict(os.environ, API_WORKERS="2", API_HOST="127.0.0.1", API_PORT=str(port),
+                   LOG_LEVEL="WARNING", BLOCKING_WATCHDOG_ENABLED="false",
+                   PERSONALIZATION_DB_PATH=str(tmp_path / "personalization.db"))
+        process = subprocess.Popen([sys.executable, "-m", "backend.launcher"], cwd=REPO_ROOT,
+                                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    _request(base + "/health")
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.2)
+
+            _request(base + "/upload_personalization", {"user_id": "shared-user", "artifacts": {"k": "v"}})
+            for _ in range(20):
+                assert _request(base + "/personalization/shared-user") == {"artifacts": {"k": "v"}}
+                _request(base + "/suggest", {"user_id": "shared-user", "context": "hello"})
+
+            # An update through one worker invalidates the others' hot tiers
+            _request(base + "/upload_personalization", {"user_id": "shared-user", "artifacts": {"k": "v2"}})
+            for _ in range(10):
+                assert _request(base + "/personalization/shared-user") == {"artifacts": {"k": "v2"}}
+
+            text = _request(base + "/metrics")
+            assert 'provider_requests_total{provider="mock"} 20' in text
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=20)
@@ -0,0 +1,105 @@
+"""
+Tests for the per-user style retrieval index.
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main, style_index
+from backend.providers.base import SuggestRequest, SuggestResponse
+from backend.shared_state import LocalVersionIndex
+from backend.style_index import StyleIndex, StyleIndexStore, embed
+
+PAIRS = [
+    ("are we still on for dinner tomorrow?", "yess can't wait 😋"),
+    ("can you send me the report by friday", "sure, will do by thu"),
+    ("happy birthday!!", "aww thank youu ❤️"),
+    (None, "lol same"),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StyleIndexStore(str(tmp_path / "style"))
+
+
+class TestStyleIndex:
+    """Test suite for embedding, LSH search and the index file."""
+
+    def test_embeddings_are_normalised_and_deterministic(self):
+        vectors = embed(["see you tomorrow", "see you tomorrow", ""])
+        assert vectors.shape == (3, style_index.DIM)
+        assert np.isclose(np.linalg.norm(vectors[0]), 1.0)
+        assert np.array_equal(vectors[0], vectors[1]) and not vectors[2].any()
+
+    def test_retrieves_replies_to_similar_messages(self, store):
+        """Test that entries are matched on the context they answered."""
+        assert style_index.write(store.path("u1"), PAIRS + [(None, "lol same")]) == 4  # duplicate kept once
+        assert store.examples("u1", "still on for dinner tonight?", 1) == ["yess can't wait 😋"]
+        assert store.examples("u1", "did you get the report", 1) == ["sure, will do by thu"]
+        assert store.examples("missing", "hi", 3) == []
+
+    def test_lsh_prefilter_on_large_indexes(self, store):
+        """Test that Hamming-ranked candidates still contain the nearest neighbour."""
+        rng = np.random.default_rng(1)
+        words = "hey sure thing omw see you soon late call later ok sounds good haha work movie".split()
+        pairs = [(" ".join(rng.choice(words, 8)), f"reply {i}") for i in range(1500)]
+        pairs.insert(700, ("are we still on for dinner tomorrow?", "target"))
+        style_index.write(store.path("u1"), pairs)
+        index = store.get("u1")
+        assert index.count == 1501 and index.count > 64
+        assert index.search(embed(["are we still on for dinner tomorrow"])[0], 1) == ["target"]
+
+    def test_rebuilds_are_picked_up_by_other_workers(self, tmp_path):
+        versions = LocalVersionIndex()
+        writer = StyleIndexStore(str(tmp_path / "s"), versions=versions)
+        reader = StyleIndexStore(str(tmp_path / "s"), versions=versions)
+        assert reader.get("u1") is None
+
+        style_index.write(writer.path("u1"), PAIRS)
+        assert reader.get("u1") is None  # cached miss until invalidated
+        writer.invalidate("u1")
+        assert reader.get("u1").count == 4
+        assert reader.get("u1") is reader.get("u1")  # stays mapped
+
+        assert writer.delete("u1") is True
+        assert reader.get("u1") is None
+
+    def test_rejects_foreign_files(self, store, tmp_path):
+        path = store.path("u1")
+        style_index.write(path, PAIRS)
+        with open(path, "r+b") as f:
+            f.write(b"XXXX")
+        with pytest.raises(ValueError):
+            StyleIndex(path)
+        assert store.get("u1") is None
+
+
+class TestStyleExamplesInPrompt:
+    """Test that /suggest passes retrieved examples on to the providers."""
+
+    def test_suggest_includes_examples(self, store, monkeypatch):
+        captured = []
+
+        class CapturingProvider(main.MockProvider):
+            async def suggest(self, request):
+                captured.append(request)
+                return SuggestResponse(suggestions=[])
+
+        style_index.write(store.path("style-user"), PAIRS)
+        monkeypatch.setattr(main, "_style_index", store)
+        monkeypatch.setitem(main.providers, "capture", CapturingProvider(main.ProviderConfig()))
+        client = TestClient(main.app)
+        client.post("/suggest", json={"user_id": "style-user", "context": "dinner tomorrow still on?", "provider": "capture"})
+        assert captured[-1].style_examples[0] == "yess can't wait 😋"
+        client.post("/suggest", json={"user_id": "nobody", "context": "hi", "provider": "capture"})
+        assert captured[-1].style_examples is None
+
+    def test_examples_reach_adapter_prompt(self):
+        from backend.providers.qwen.provider import QwenProvider
+
+        adapter = QwenProvider(main.ProviderConfig(api_key="k", use_shared_transport=True))
+        request = SuggestRequest(user_id="u", context="hi", modes=["casual"], intensity=5,
+                                 style_examples=["yess can't wait 😋"])
+        assert '- "yess can\'t wait 😋"' in adapter._build_messages(request)[0]["content"]
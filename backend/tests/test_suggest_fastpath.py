@@ -0,0 +1,63 @@
+"""
+Tests for the /suggest fast serialization path.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.providers.base import SuggestResponse, SuggestionItem
+
+
+class TestSuggestFastPath:
+    """Test suite for request parsing and response encoding on /suggest."""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(main.app)
+
+    def test_defaults_applied(self, client):
+        """Test that request defaults match the declared model."""
+        response = client.post("/suggest", json={"user_id": "u1", "context": "see you soon"})
+        assert response.status_code == 200
+        body = response.json()
+        assert sorted(s["tone"] for s in body["suggestions"]) == ["casual", "formal", "witty"]  # reranked
+        assert body["metadata"] is None
+
+    def test_validation_error_shape(self, client):
+        """Test that invalid bodies produce FastAPI-style 422 errors."""
+        response = client.post("/suggest", json={"context": "hi", "intensity": "loud"})
+        assert response.status_code == 422
+        locations = {tuple(err["loc"]) for err in response.json()["detail"]}
+        assert ("body", "user_id") in locations
+        assert ("body", "intensity") in locations
+
+    def test_malformed_json(self, client):
+        """Test that non-JSON bodies are rejected with 422."""
+        response = client.post("/suggest", content=b"{not json", headers={"Content-Type": "application/json"})
+        assert response.status_code == 422
+
+    def test_empty_context(self, client):
+        """Test that blank context is still rejected with 400."""
+        response = client.post("/suggest", json={"user_id": "u1", "context": "   "})
+        assert response.status_code == 400
+
+    def test_encode_falls_back_for_sdk_objects(self):
+        """Test that metadata holding arbitrary objects still serializes."""
+        class Usage:
+            def __init__(self):
+                self.prompt_tokens = 3
+
+        response = SuggestResponse(
+            suggestions=[SuggestionItem(text="ok", tone="casual")],
+            metadata={"usage": Usage()},
+        )
+        encoded = main._encode_response(response)
+        assert encoded.status_code == 200
+        assert b'"prompt_tokens":3' in encoded.body
+
+    def test_openapi_documents_request_body(self, client):
+        """Test that the request schema is still published in OpenAPI."""
+        schema = client.get("/openapi.json").json()
+        body = schema["paths"]["/suggest"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+        assert "user_id" in body["properties"]
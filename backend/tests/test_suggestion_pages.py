@@ -0,0 +1,114 @@
+"""
+Tests for serving "more suggestions" pages from the over-generated pool.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.providers.base import SuggestionItem, SuggestResponse
+from backend.suggestion_pages import SuggestionPages, page_key
+
+REPLIES = [
+    "Sure, see you then", "Can't make it, sorry", "Running a bit late", "What time works for you?",
+    "Let me check my calendar", "Absolutely, count me in", "Maybe next week instead?",
+    "I'll bring snacks", "Who else is coming?",
+]
+
+
+def items(texts):
+    return [SuggestionItem(text=t, tone="casual") for t in texts]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSuggestionPages:
+    """Test suite for SuggestionPages."""
+
+    def test_pages_are_served_once(self):
+        pages = SuggestionPages()
+        key = page_key("u1", "dinner?", ["casual"], 5, "mock")
+        pages.put(key, items(REPLIES[3:]))
+        page, remaining = pages.take(key)
+        assert [s.text for s in page] == REPLIES[3:6] and remaining == 3
+        page, remaining = pages.take(key)
+        assert [s.text for s in page] == REPLIES[6:9] and remaining == 0
+        assert pages.take(key) is None and len(pages) == 0
+
+    def test_keys_cover_user_context_modes_and_provider(self):
+        base = page_key("u1", "dinner?", ["casual"], 5, "mock")
+        assert base == page_key("u1", " dinner? ", ["Casual"], 5, "mock")
+        assert len({base, page_key("u2", "dinner?", ["casual"], 5, "mock"),
+                    page_key("u1", "lunch?", ["casual"], 5, "mock"),
+                    page_key("u1", "dinner?", ["formal"], 5, "mock"),
+                    page_key("u1", "dinner?", ["casual"], 6, "mock"),
+                    page_key("u1", "dinner?", ["casual"], 5, "gemini")}) == 6
+
+    def test_ttl_and_lru_eviction(self):
+        clock = FakeClock()
+        lookups = []
+        pages = SuggestionPages(max_entries=2, ttl_seconds=10, on_lookup=lookups.append, clock=clock)
+        pages.put(b"a", items(REPLIES[:6]))
+        pages.put(b"b", items(REPLIES[:6]))
+        clock.now = 5
+        assert pages.take(b"a") is not None  # a is now the most recently used
+        pages.put(b"c", items(REPLIES[:6]))
+        assert pages.take(b"b") is None
+        clock.now = 10
+        assert pages.take(b"a") is None  # expired; paging does not extend the TTL
+        assert pages.take(b"c") is not None
+        assert lookups == [True, False, False, True]
+
+
+class TestMoreSuggestions:
+    """Test the "more" parameter of /suggest."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        calls = []
+
+        class PoolProvider(main.MockProvider):
+            async def suggest(self, request):
+                calls.append(request)
+                return SuggestResponse(suggestions=items(REPLIES[:request.num_suggestions]))
+
+        monkeypatch.setattr(main.settings, "suggest_candidates", 9)
+        monkeypatch.setattr(main.settings, "rerank_enabled", False)
+        monkeypatch.setattr(main, "_suggestion_pages", SuggestionPages())
+        monkeypatch.setitem(main.providers, "pool", PoolProvider(main.ProviderConfig()))
+        client = TestClient(main.app)
+        client.calls = calls
+        return client
+
+    def test_more_pages_come_from_cache(self, client):
+        body = {"user_id": "u1", "context": "dinner friday?", "provider": "pool"}
+        first = client.post("/suggest", json=body).json()
+        assert [s["text"] for s in first["suggestions"]] == REPLIES[:3]
+        assert first["metadata"]["more_available"] == 6
+
+        second = client.post("/suggest", json={**body, "more": True}).json()
+        third = client.post("/suggest", json={**body, "more": True}).json()
+        assert [s["text"] for s in second["suggestions"]] == REPLIES[3:6]
+        assert [s["text"] for s in third["suggestions"]] == REPLIES[6:9]
+        assert (second["metadata"], third["metadata"]) == (
+            {"more_available": 3, "cached": True}, {"more_available": 0, "cached": True}
+        )
+        assert len(client.calls) == 1 and client.calls[0].num_suggestions == 9
+
+        # Exhausted, or a different context: generated as usual
+        client.post("/suggest", json={**body, "more": True})
+        client.post("/suggest", json={**body, "context": "lunch?", "more": True})
+        assert len(client.calls) == 3
+
+    def test_more_is_rate_limited(self, client, monkeypatch):
+        monkeypatch.setattr(main.settings, "rate_limit_requests", 1)
+        monkeypatch.setattr(main.shared_state.state, "rate_limiter", main.shared_state.LocalRateLimiter())
+        body = {"user_id": "limited", "context": "dinner friday?", "provider": "pool"}
+        assert client.post("/suggest", json=body).status_code == 200
+        assert client.post("/suggest", json={**body, "more": True}).status_code == 429
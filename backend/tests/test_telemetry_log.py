@@ -0,0 +1,99 @@
+"""
+Tests for the telemetry ingestion log.
+"""
+
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.telemetry_log import TelemetryLog, read_segment, scan, segments
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = TelemetryLog(str(tmp_path / "telemetry"), flush_interval=60)
+    yield log
+    log.close()
+
+
+class TestTelemetryLog:
+    """Test suite for TelemetryLog."""
+
+    def test_group_commit_and_scan(self, log):
+        """Test that all pending batches are written in one flush and read back in order."""
+        assert log.append([{"n": 1}, {"n": 2}], 20, {"user_id": "u1"})
+        assert log.append([{"n": 3, "user_id": "override"}], 10, {"user_id": "u2"})
+        assert log.pending == 3
+        assert log.flush() == 3
+        assert (log.pending, log.flushes, log.flush()) == (0, 1, 0)
+        assert list(scan(log.directory)) == [
+            {"user_id": "u1", "n": 1}, {"user_id": "u1", "n": 2}, {"user_id": "override", "n": 3},
+        ]
+
+    def test_bounded_buffer_drops_instead_of_blocking(self, tmp_path):
+        """Test that batches beyond the buffer bounds are dropped and counted."""
+        log = TelemetryLog(str(tmp_path / "t"), buffer_events=3, buffer_bytes=100, flush_interval=60)
+        assert log.append([{}, {}], 10)
+        assert not log.append([{}, {}], 10)  # too many events
+        assert not log.append([{}], 95)  # too many bytes
+        assert (log.accepted, log.dropped, log.pending) == (2, 3, 2)
+        log.close()
+        assert log.written == 2
+
+    def test_segments_roll_and_are_retained(self, tmp_path):
+        log = TelemetryLog(str(tmp_path / "t"), segment_bytes=64, max_segments=2, flush_interval=60)
+        for i in range(5):
+            log.append([{"i": i, "pad": "x" * 60}], 80)
+            log.flush()
+        log.close()
+        assert len(segments(log.directory)) == 2
+        assert [e["i"] for e in scan(log.directory)] == [3, 4]
+
+    def test_reader_resumes_and_stops_at_torn_tail(self, log):
+        """Test that readers can resume from an offset and ignore a partial record."""
+        log.append([{"n": 1}, {"n": 2}], 20)
+        log.flush()
+        path = segments(log.directory)[0]
+        offsets = [offset for offset, _ in read_segment(path)]
+        assert [e for _, e in read_segment(path, offsets[0])] == [{"n": 2}]
+
+        with open(path, "ab") as f:
+            f.write(b"\x40\x00\x00\x00garbage")  # header claims more bytes than exist
+        assert [e for _, e in read_segment(path)] == [{"n": 1}, {"n": 2}]
+        assert list(read_segment(path, os.path.getsize(path))) == []
+
+    def test_writer_thread_flushes_in_background(self, tmp_path):
+        log = TelemetryLog(str(tmp_path / "t"), flush_events=2, flush_interval=60)
+        log.append([{"n": 1}, {"n": 2}], 20)  # reaches flush_events: wakes the writer
+        for _ in range(200):
+            if log.written == 2:
+                break
+            time.sleep(0.01)
+        assert log.written == 2
+        log.close()
+
+
+class TestTelemetryEndpoint:
+    """Test suite for POST /telemetry."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(main, "telemetry_log", TelemetryLog(str(tmp_path / "t"), buffer_events=3, flush_interval=60))
+        yield TestClient(main.app)
+        main.telemetry_log.close()
+
+    def test_ingest(self, client):
+        response = client.post("/telemetry", json={"user_id": "u1", "events": [{"type": "accepted", "mode": "witty"}]})
+        assert (response.status_code, response.json()) == (202, {"accepted": 1})
+        main.telemetry_log.flush()
+        (event,) = scan(main.telemetry_log.directory)
+        assert event["user_id"] == "u1" and event["type"] == "accepted" and "received_at" in event
+
+    def test_full_buffer_and_bad_batches(self, client):
+        full = client.post("/telemetry", json={"events": [{}] * 4})
+        assert full.status_code == 503 and "Retry-After" in full.headers
+        assert client.post("/telemetry", json={"events": [1]}).status_code == 400
+        assert client.post("/telemetry", content=b"not json").status_code == 400
@@ -0,0 +1,99 @@
+"""
+Tests for per-stage request tracing and Server-Timing headers.
+"""
+
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from backend import main, tracing
+from backend.providers.base import ProviderExecutor
+
+
+class TestTracing:
+    """Test suite for the tracing primitives."""
+
+    def test_span_without_trace_is_noop(self):
+        """Test that spans outside a request cost nothing and record nothing."""
+        async def run_test():
+            with tracing.span("orphan"):
+                pass
+            return tracing.current_trace()
+
+        assert asyncio.run(run_test()) is None
+
+    def test_spans_and_server_timing(self):
+        """Test that spans are aggregated per stage in the Server-Timing header."""
+        async def run_test():
+            trace = tracing.start_trace("/suggest")
+            with tracing.span("parse_response"):
+                pass
+            with tracing.span("parse_response"):
+                pass
+            tracing.record("provider_call", trace.started, trace.started + 0.002)
+            trace.finish()
+            return trace
+
+        trace = asyncio.run(run_test())
+        header = trace.server_timing()
+        assert header.count("parse_response;dur=") == 1
+        assert "provider_call;dur=2.000" in header
+        assert header.endswith(f"total;dur={trace.duration_ms:.3f}")
+
+    def test_ring_buffer_is_bounded(self):
+        """Test that the buffer keeps only the newest traces."""
+        buffer = tracing.TraceBuffer(maxlen=2)
+        traces = [tracing.Trace(f"/r{i}") for i in range(3)]
+        for trace in traces:
+            buffer.add(trace)
+        assert len(buffer) == 2
+        assert [t.route for t in buffer.recent()] == ["/r2", "/r1"]
+        assert [t.route for t in buffer.recent(1)] == ["/r2"]
+        assert buffer.recent(0) == [] and buffer.recent(-1) == []
+
+    def test_json_lines_exporter(self, tmp_path):
+        """Test that the exporter writes one JSON line per trace."""
+        path = tmp_path / "traces.jsonl"
+        exporter = tracing.JsonLinesExporter(str(path))
+        buffer = tracing.TraceBuffer(exporter=exporter)
+        trace = tracing.Trace("/suggest")
+        trace.finish()
+        buffer.add(trace)
+        exporter.close()
+        line = json.loads(path.read_text().strip())
+        assert line["trace_id"] == trace.trace_id
+
+    def test_executor_reports_wait_and_call(self, monkeypatch):
+        """Test that the provider executor reports queueing and call time separately."""
+        from backend.providers import base
+
+        recorded = []
+        monkeypatch.setattr(base, "stage_recorder", lambda name, start, end: recorded.append(name))
+        executor = ProviderExecutor(max_workers=1)
+
+        async def run_test():
+            await executor.run(lambda: time.sleep(0.001))
+
+        asyncio.run(run_test())
+        assert recorded == ["executor_wait", "provider_call"]
+
+
+class TestServerTimingHeader:
+    """Test tracing wiring in the FastAPI app."""
+
+    def test_suggest_returns_server_timing(self):
+        """Test that /suggest carries a stage breakdown and lands in the ring buffer."""
+        client = TestClient(main.app)
+        response = client.post("/suggest", json={"user_id": "u1", "context": "hello"})
+        header = response.headers["Server-Timing"]
+        assert "validate;dur=" in header
+        assert "provider;dur=" in header
+        traces = client.get("/debug/traces?limit=1").json()["traces"]
+        assert traces[0]["route"] == "/suggest"
+
+    def test_health_is_not_traced(self):
+        """Test that health checks are excluded from tracing."""
+        client = TestClient(main.app)
+        assert "Server-Timing" not in client.get("/health").headers
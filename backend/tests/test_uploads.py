@@ -0,0 +1,187 @@
+"""
+Tests for resumable chunked personalization uploads.
+"""
+
+import asyncio
+import base64
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.personalization_store import PersonalizationStore
+from backend.uploads import ChunkCipher, ChunkedUploadStore, UploadError
+
+
+async def _body(*pieces):
+    for piece in pieces:
+        yield piece
+
+
+def _append(store, upload_id, offset, *pieces):
+    return asyncio.run(store.append(upload_id, offset, _body(*pieces)))
+
+
+@pytest.fixture
+def payload():
+    raw = os.urandom(10_000)
+    return raw, base64.b64encode(raw)
+
+
+class TestChunkedUploadStore:
+    """Test suite for ChunkedUploadStore."""
+
+    def test_decodes_across_arbitrary_piece_boundaries(self, tmp_path, payload):
+        """Test that base64 split mid-quantum decodes into fixed-size chunks."""
+        raw, encoded = payload
+        store = ChunkedUploadStore(str(tmp_path), chunk_size=4096)
+        session = store.create("u1")
+        pieces = [encoded[i:i + 1001] for i in range(0, len(encoded), 1001)]
+        _append(store, session.upload_id, 0, *pieces)
+        session = asyncio.run(store.complete(session.upload_id))
+
+        chunks = list(store.iter_chunks(session.upload_id))
+        assert [len(c) for c in chunks] == [4096, 4096, 10_000 - 8192]
+        assert b"".join(chunks) == raw
+        assert session.size == len(raw)
+
+    def test_resume_after_interruption(self, tmp_path, payload):
+        """Test that state is committed per request and a second request continues it."""
+        raw, encoded = payload
+        store = ChunkedUploadStore(str(tmp_path), chunk_size=4096)
+        upload_id = store.create("u1", length=len(encoded)).upload_id
+        _append(store, upload_id, 0, encoded[:5003])
+
+        reloaded = ChunkedUploadStore(str(tmp_path), chunk_size=4096)  # e.g. another worker
+        assert reloaded.load(upload_id).offset == 5003
+        with pytest.raises(UploadError) as info:
+            _append(reloaded, upload_id, 0, encoded)
+        assert info.value.status_code == 409 and info.value.offset == 5003
+        with pytest.raises(UploadError):
+            asyncio.run(reloaded.complete(upload_id))  # declared length not reached
+
+        _append(reloaded, upload_id, 5003, encoded[5003:])
+        asyncio.run(reloaded.complete(upload_id))
+        assert b"".join(reloaded.iter_chunks(upload_id)) == raw
+
+    def test_client_disconnect_keeps_received_data(self, tmp_path, payload):
+        """Test that a body cut off mid-stream is committed up to what arrived."""
+        raw, encoded = payload
+        store = ChunkedUploadStore(str(tmp_path), chunk_size=4096)
+        upload_id = store.create("u1").upload_id
+
+        async def broken():
+            yield encoded[:3000]
+            raise ConnectionResetError()
+
+        with pytest.raises(ConnectionResetError):
+            asyncio.run(store.append(upload_id, 0, broken()))
+        assert store.load(upload_id).offset == 3000
+        _append(store, upload_id, 3000, encoded[3000:])
+        asyncio.run(store.complete(upload_id))
+        assert b"".join(store.iter_chunks(upload_id)) == raw
+
+    def test_encrypted_chunks(self, tmp_path, payload):
+        """Test that chunks and the partial buffer are never stored in the clear."""
+        raw, encoded = payload
+        store = ChunkedUploadStore(str(tmp_path), chunk_size=4096, cipher=ChunkCipher("secret"))
+        upload_id = store.create("u1").upload_id
+        _append(store, upload_id, 0, encoded[:6000])
+        for name in os.listdir(tmp_path / upload_id):
+            if name.startswith(("chunk-", "partial-")):
+                assert raw[:64] not in (tmp_path / upload_id / name).read_bytes()
+        _append(store, upload_id, 6000, encoded[6000:])
+        asyncio.run(store.complete(upload_id))
+        assert b"".join(store.iter_chunks(upload_id)) == raw
+
+        with pytest.raises(Exception):
+            list(ChunkedUploadStore(str(tmp_path), cipher=ChunkCipher("other")).iter_chunks(upload_id))
+
+    def test_limits_and_validation(self, tmp_path):
+        """Test size limits, invalid base64 and unknown ids."""
+        store = ChunkedUploadStore(str(tmp_path), max_bytes=100)
+        with pytest.raises(UploadError) as info:
+            store.create("u1", length=1000)
+        assert info.value.status_code == 413
+
+        upload_id = store.create("u1").upload_id
+        with pytest.raises(UploadError) as info:
+            _append(store, upload_id, 0, base64.b64encode(b"x" * 200))
+        assert info.value.status_code == 413
+        with pytest.raises(UploadError) as info:
+            _append(store, upload_id, 0, b"not*base64")
+        assert info.value.status_code == 400
+        assert store.load(upload_id).offset == 0  # failed appends commit nothing
+
+        with pytest.raises(UploadError) as info:
+            store.load("../../etc")
+        assert info.value.status_code == 404
+
+    def test_sweep_and_delete_user(self, tmp_path):
+        """Test that stale unfinished uploads expire and user deletion removes everything."""
+        store = ChunkedUploadStore(str(tmp_path), ttl_seconds=10)
+        stale = store.create("u1").upload_id
+        kept = store.create("u2").upload_id
+        assert store.sweep(now=store.load(stale).created_at + 100) == 2
+        assert not os.path.exists(tmp_path / kept)
+
+        store.create("u1")
+        store.create("u1")
+        store.create("u2")
+        assert store.delete_user("u1") == 2
+        assert len(os.listdir(tmp_path)) == 1
+
+    def test_sweep_runs_in_the_background(self, tmp_path):
+        """Test that creating uploads never sweeps; the background task does."""
+        store = ChunkedUploadStore(str(tmp_path), ttl_seconds=0, sweep_seconds=0.01)
+        store.create("u1")
+        store.create("u2")
+        assert len(os.listdir(tmp_path)) == 2
+
+        async def sweep_for_a_while():
+            store.start()
+            await asyncio.sleep(0.2)
+            await store.stop()
+
+        asyncio.run(sweep_for_a_while())
+        assert os.listdir(tmp_path) == []
+
+
+class TestUploadEndpoints:
+    """Test suite for the /uploads endpoints."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(main, "_upload_store", ChunkedUploadStore(str(tmp_path / "uploads"), chunk_size=1024))
+        monkeypatch.setattr(main, "_personalization_store", PersonalizationStore(str(tmp_path / "p.db")))
+        return TestClient(main.app)
+
+    def test_streamed_upload_becomes_personalization_export(self, client, payload):
+        raw, encoded = payload
+        created = client.post("/uploads", json={"user_id": "u1", "length": len(encoded)})
+        assert created.status_code == 201
+        upload_id = created.json()["upload_id"]
+
+        half = len(encoded) // 2
+        response = client.patch(f"/uploads/{upload_id}", content=iter([encoded[:100], encoded[100:half]]),
+                                headers={"Upload-Offset": "0"})
+        assert response.headers["Upload-Offset"] == str(half)
+        conflict = client.patch(f"/uploads/{upload_id}", content=encoded[half:], headers={"Upload-Offset": "0"})
+        assert conflict.status_code == 409
+        assert conflict.headers["Upload-Offset"] == str(half)
+
+        client.patch(f"/uploads/{upload_id}", content=encoded[half:], headers={"Upload-Offset": str(half)})
+        assert client.get(f"/uploads/{upload_id}").json()["offset"] == len(encoded)
+        assert client.post(f"/uploads/{upload_id}/complete").json()["bytes"] == len(raw)
+
+        export = client.get("/personalization/u1").json()["artifacts"]["export_upload"]
+        assert export["upload_id"] == upload_id and export["bytes"] == len(raw)
+        assert b"".join(main._upload_store.iter_chunks(upload_id)) == raw
+
+        assert client.post("/delete_personalization", json={"user_id": "u1"}).json()["deleted"] is True
+        assert client.get(f"/uploads/{upload_id}").status_code == 404
+
+    def test_missing_offset_header(self, client):
+        upload_id = client.post("/uploads", json={"user_id": "u1"}).json()["upload_id"]
+        assert client.patch(f"/uploads/{upload_id}", content=b"AAAA").status_code == 400
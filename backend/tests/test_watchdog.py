@@ -0,0 +1,80 @@
+"""
+Tests for the blocking-call watchdog.
+"""
+
+import asyncio
+import time
+
+from backend.watchdog import BlockingWatchdog, BlockingEvent, provider_from_filename
+
+
+def _blocking_helper():
+    time.sleep(0.15)
+
+
+class TestBlockingWatchdog:
+    """Test suite for BlockingWatchdog."""
+
+    def test_provider_from_filename(self):
+        """Test that provider adapters are recognized by path."""
+        assert provider_from_filename("/srv/backend/providers/qwen/provider.py") == "qwen"
+        assert provider_from_filename("/srv/backend/main.py") is None
+
+    def test_detects_blocked_loop_with_stack(self):
+        """Test that a synchronous sleep on the loop is detected and its stack captured."""
+        watchdog = BlockingWatchdog(threshold_ms=40, log_interval_seconds=0)
+
+        async def run_test():
+            watchdog.start()
+            await asyncio.sleep(0.03)
+            _blocking_helper()
+            await asyncio.sleep(0.03)
+            await watchdog.stop()
+
+        asyncio.run(run_test())
+
+        assert watchdog.blocked_count == 1
+        event = watchdog.events[0]
+        assert "_blocking_helper" in event.stack
+        assert event.duration_ms >= 80
+        assert watchdog.counts["unknown"] == 1
+
+    def test_quiet_loop_has_no_events(self):
+        """Test that a loop that only awaits is never reported."""
+        watchdog = BlockingWatchdog(threshold_ms=40)
+
+        async def run_test():
+            watchdog.start()
+            await asyncio.sleep(0.1)
+            await watchdog.stop()
+
+        asyncio.run(run_test())
+        assert watchdog.blocked_count == 0
+
+    def test_route_attribution(self):
+        """Test that stalls inside a registered endpoint are attributed to its path."""
+        watchdog = BlockingWatchdog(threshold_ms=40)
+
+        async def endpoint():
+            _blocking_helper()
+
+        class Route:
+            path = "/suggest"
+
+        Route.endpoint = endpoint
+        watchdog.register_routes([Route])
+
+        async def run_test():
+            watchdog.start()
+            await asyncio.sleep(0.03)
+            await endpoint()
+            await asyncio.sleep(0.03)
+            await watchdog.stop()
+
+        asyncio.run(run_test())
+        assert watchdog.counts["route:/suggest"] == 1
+
+    def test_event_source_prefers_provider(self):
+        """Test that provider attribution wins over route attribution."""
+        event = BlockingEvent(0.0, "/suggest", "openrouter", "")
+        assert event.source == "provider:openrouter"
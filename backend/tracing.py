@@ -0,0 +1,212 @@
+"""
+Request Tracing
+
+This module implements lightweight per-request timing spans. The HTTP
+middleware opens a Trace for each request and stores it in a context variable;
+code anywhere on the request path records stages into it with ``span()`` or
+``record()``, which are no-ops when no trace is active.
+
+Finished traces go to an in-process ring buffer (for ``/debug/traces``) and,
+optionally, to an exporter. The per-stage breakdown is also rendered as a
+``Server-Timing`` response header so client-side dashboards can attribute
+latency to validation, prompt building, executor wait, the network call and
+response parsing.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """A single timed stage within a trace."""
+
+    __slots__ = ("name", "start", "end")
+
+    def __init__(self, name: str, start: float, end: float):
+        self.name = name
+        self.start = start
+        self.end = end
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) * 1000.0
+
+
+class Trace:
+    """All spans recorded while serving one request."""
+
+    __slots__ = ("trace_id", "route", "started", "ended", "wall_time", "spans")
+
+    def __init__(self, route: str):
+        self.trace_id = uuid.uuid4().hex
+        self.route = route
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+        self.wall_time = time.time()
+        self.spans: List[Span] = []
+
+    def add(self, name: str, start: float, end: float) -> None:
+        self.spans.append(Span(name, start, end))
+
+    def finish(self) -> None:
+        self.ended = time.perf_counter()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.ended if self.ended is not None else time.perf_counter()
+        return (end - self.started) * 1000.0
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Total milliseconds per stage name, in first-seen order."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return totals
+
+    def server_timing(self) -> str:
+        """Render the stage breakdown as a Server-Timing header value."""
+        entries = [f"{name};dur={duration:.3f}" for name, duration in self.stage_totals().items()]
+        entries.append(f"total;dur={self.duration_ms:.3f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "route": self.route,
+            "timestamp": self.wall_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "offset_ms": round((span.start - self.started) * 1000.0, 3),
+                    "duration_ms": round(span.duration_ms, 3),
+                }
+                for span in self.spans
+            ],
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """Return the trace for the request being served, if any."""
+    return _current_trace.get()
+
+
+def start_trace(route: str) -> Trace:
+    """Start a trace and make it current for this context."""
+    trace = Trace(route)
+    _current_trace.set(trace)
+    return trace
+
+
+def record(name: str, start: float, end: float) -> None:
+    """Record a stage measured with time.perf_counter() into the current trace."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, start, end)
+
+
+class _SpanContext:
+    __slots__ = ("name", "trace", "start")
+
+    def __init__(self, name: str, trace: Trace):
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, self.start, time.perf_counter())
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str):
+    """Context manager timing a stage into the current trace (no-op without one)."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _SpanContext(name, trace)
+
+
+class JsonLinesExporter:
+    """
+    Exporter writing finished traces as JSON lines to a file.
+
+    Writes happen on a background thread so exporting never blocks the event loop.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[dict]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def __call__(self, trace: Trace) -> None:
+        self._queue.put(trace.to_dict())
+
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                fh.write(json.dumps(item) + "\n")
+                if self._queue.empty():
+                    fh.flush()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=1.0)
+
+
+class TraceBuffer:
+    """Bounded ring buffer of finished traces with an optional exporter."""
+
+    def __init__(self, maxlen: int = 1024, exporter: Optional[Callable[[Trace], None]] = None):
+        self._traces: deque = deque(maxlen=maxlen)
+        self.exporter = exporter
+
+    def add(self, trace: Trace) -> None:
+        self._traces.append(trace)
+        if self.exporter is not None:
+            try:
+                self.exporter(trace)
+            except Exception:
+                logger.exception("Trace exporter failed")
+
+    def recent(self, limit: int = 50) -> List[Trace]:
+        """Return up to ``limit`` most recent traces, newest first (none if ``limit`` <= 0)."""
+        if limit <= 0:
+            return []
+        traces = list(self._traces)[-limit:]
+        traces.reverse()
+        return traces
+
+    def __len__(self) -> int:
+        return len(self._traces)
@@ -0,0 +1,91 @@
+"""
+Training Jobs
+
+This module holds the handlers that ``/train`` jobs run (see backend/jobs.py).
+
+Handlers run in the job pool's low-priority processes. They take
+``(payload, report)`` and return a JSON-serializable result, which the API
+process then applies. Storage locations and keys come from settings, never
+from the payload, so a job can only touch the data of the user it names.
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend import profile_summary, style_index
+from backend.config import settings
+from backend.personalization_store import PersonalizationStore
+from backend.uploads import ChunkCipher, ChunkedUploadStore, UploadError
+
+Report = Callable[..., None]
+
+
+def _upload_examples(upload: Dict[str, Any]) -> List[Tuple[Optional[str], str]]:
+    store = ChunkedUploadStore(
+        settings.upload_dir,
+        cipher=ChunkCipher(settings.encryption_key) if settings.encryption_key else None,
+    )
+    try:
+        return profile_summary.extract_examples(b"".join(store.iter_chunks(str(upload.get("upload_id")))))
+    except UploadError:
+        return []
+
+
+def personalization(payload: Dict[str, Any], report: Report) -> Dict[str, Any]:
+    """
+    Rebuild a user's profile summary and style retrieval index from
+    everything they have uploaded.
+
+    Covers both artifacts sent to ``/upload_personalization`` and exports
+    uploaded through ``/uploads``. The index file is installed here; the
+    summary is returned for the API process to store.
+
+    Args:
+        payload: ``{"user_id": str}``
+        report: Progress callback ``report(fraction, message)``
+
+    Returns:
+        ``{"summary", "messages", "examples", "updated_at"}``; ``updated_at``
+        identifies the stored record the summary was derived from
+    """
+    user_id = payload["user_id"]
+    store = PersonalizationStore(settings.personalization_db_path)
+    try:
+        report(0.1, "loading artifacts")
+        updated_at = store.updated_at(user_id)
+        record = store.get(user_id) or {}
+    finally:
+        store.close()
+    artifacts = record.get("artifacts")
+    pairs = []
+    if isinstance(artifacts, dict):
+        upload = artifacts.get("export_upload")
+        if isinstance(upload, dict):
+            report(0.2, "reading uploaded export")
+            pairs += _upload_examples(upload)
+        pairs += profile_summary.extract_examples({k: v for k, v in artifacts.items() if k != "export_upload"})
+    elif artifacts is not None:
+        pairs += profile_summary.extract_examples(artifacts)
+    messages = [reply for _, reply in pairs]
+    report(0.4, "analysing %d messages" % len(messages))
+    features = profile_summary.style_features(messages[-profile_summary.MAX_MESSAGES:])
+    report(0.6, "building style index")
+    index_path = style_index.StyleIndexStore(settings.style_index_dir).path(user_id)
+    if pairs:
+        examples = style_index.write(index_path, pairs)
+    else:
+        examples = 0
+        if os.path.exists(index_path):
+            os.remove(index_path)
+    return {
+        "summary": profile_summary.format_summary(features) if features else None,
+        "messages": len(messages),
+        "examples": examples,
+        "updated_at": updated_at,
+    }
+
+
+# Job kind -> handler, as passed to ``jobs.JobRunner``
+HANDLERS = {
+    "personalization": "backend.training:personalization",
+}
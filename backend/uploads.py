@@ -0,0 +1,429 @@
+"""
+Chunked Personalization Uploads
+
+This module stores large personalization exports (the base64 string produced by
+the Android ``PersonalizationStore.exportPersonalization()``) without holding
+them in memory.
+
+An upload is created once and then appended to with any number of requests.
+Each append streams its body, decodes base64 incrementally and writes the
+decoded bytes to disk in fixed-size chunk files, encrypting each chunk with
+AES-GCM when ``Settings.encryption_key`` is set. The upload's state (offset,
+chunk count, the undecoded base64 tail and the not-yet-full last chunk) is
+committed when the append ends, even if the client disconnects, so an
+interrupted upload resumes from the offset the server reports.
+
+Reading and decrypting the upload state, chunk writes and encryption run on a
+worker thread; only base64 decoding of network-sized pieces happens on the
+event loop. Expired uploads are swept by a background task (``start()``),
+never on the request path.
+
+Layout under the upload root::
+
+    <upload_id>/meta.json        session state (atomically replaced)
+    <upload_id>/partial-<offset> buffered bytes of the last, unfinished chunk
+    <upload_id>/chunk-000000     fixed-size chunks of decoded export data
+"""
+
+import asyncio
+import base64
+import binascii
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.hashes import SHA256
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+except ImportError:
+    AESGCM = None
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = b" \t\r\n"
+
+
+class UploadError(Exception):
+    """Upload request that cannot be applied; carries the HTTP status to return."""
+
+    def __init__(self, message: str, status_code: int = 400, offset: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+
+class ChunkCipher:
+    """
+    AES-GCM encryption of individual chunks.
+
+    The 256-bit key is derived from ``Settings.encryption_key`` with HKDF. Each
+    chunk gets a random nonce, stored in front of the ciphertext, and is bound
+    to its upload and position through the associated data, so chunks cannot
+    be swapped between uploads or reordered.
+    """
+
+    NONCE_SIZE = 12
+
+    def __init__(self, secret: str):
+        if AESGCM is None:
+            raise RuntimeError("ENCRYPTION_KEY is set but the 'cryptography' package is not installed")
+        key = HKDF(algorithm=SHA256(), length=32, salt=None, info=b"replyai-upload-chunks").derive(secret.encode())
+        self._aead = AESGCM(key)
+
+    def encrypt(self, data: bytes, associated: bytes) -> bytes:
+        nonce = os.urandom(self.NONCE_SIZE)
+        return nonce + self._aead.encrypt(nonce, data, associated)
+
+    def decrypt(self, blob: bytes, associated: bytes) -> bytes:
+        return self._aead.decrypt(blob[:self.NONCE_SIZE], blob[self.NONCE_SIZE:], associated)
+
+
+class UploadSession:
+    """State of one upload, as persisted in its meta.json."""
+
+    def __init__(
+        self,
+        upload_id: str,
+        user_id: str,
+        length: Optional[int] = None,
+        offset: int = 0,
+        chunks: int = 0,
+        size: int = 0,
+        complete: bool = False,
+        encrypted: bool = False,
+        created_at: Optional[float] = None,
+    ):
+        self.upload_id = upload_id
+        self.user_id = user_id
+        self.length = length
+        self.offset = offset
+        self.chunks = chunks
+        self.size = size
+        self.complete = complete
+        self.encrypted = encrypted
+        self.created_at = created_at if created_at is not None else time.time()
+        # Not persisted in meta.json: restored from the partial file
+        self.tail = b""
+        self.buffer = bytearray()
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "upload_id": self.upload_id,
+            "user_id": self.user_id,
+            "length": self.length,
+            "offset": self.offset,
+            "chunks": self.chunks,
+            "size": self.size,
+            "complete": self.complete,
+            "encrypted": self.encrypted,
+            "created_at": self.created_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "UploadSession":
+        return cls(**data)
+
+
+class ChunkedUploadStore:
+    """
+    Resumable, streaming storage for base64 personalization exports.
+
+    Args:
+        root: Directory holding one sub-directory per upload
+        chunk_size: Size in bytes of each decoded chunk file
+        max_bytes: Largest decoded export accepted
+        cipher: Chunk cipher, or None to store chunks in the clear
+        ttl_seconds: Unfinished uploads older than this are removed
+        sweep_seconds: How often the background task looks for them
+    """
+
+    def __init__(
+        self,
+        root: str,
+        chunk_size: int = 1024 * 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        cipher: Optional[ChunkCipher] = None,
+        ttl_seconds: float = 24 * 3600,
+        sweep_seconds: float = 600.0,
+    ):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.cipher = cipher
+        self.ttl_seconds = ttl_seconds
+        self.sweep_seconds = sweep_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    # -- paths and persistence ------------------------------------------------
+
+    def _dir(self, upload_id: str) -> str:
+        try:
+            uuid.UUID(hex=upload_id)
+        except ValueError:
+            raise UploadError("Unknown upload", 404) from None
+        return os.path.join(self.root, upload_id)
+
+    def _associated(self, session: UploadSession, part: str) -> bytes:
+        return f"{session.upload_id}:{part}".encode()
+
+    def _seal(self, session: UploadSession, part: str, data: bytes) -> bytes:
+        return self.cipher.encrypt(data, self._associated(session, part)) if session.encrypted else data
+
+    def _open(self, session: UploadSession, part: str, blob: bytes) -> bytes:
+        return self.cipher.decrypt(blob, self._associated(session, part)) if session.encrypted else blob
+
+    def _write_file(self, path: str, data: bytes) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_chunk(self, session: UploadSession, index: int, data: bytes) -> None:
+        name = f"chunk-{index:06d}"
+        self._write_file(os.path.join(self._dir(session.upload_id), name), self._seal(session, name, data))
+
+    def _commit(self, session: UploadSession) -> None:
+        """
+        Persist the partial chunk, then the session state.
+
+        The partial file is named after the offset it belongs to, so a crash
+        between the two writes leaves meta.json pointing at a matching one.
+        """
+        directory = self._dir(session.upload_id)
+        current = f"partial-{session.offset}"
+        if not session.complete:
+            partial = bytes([len(session.tail)]) + session.tail + bytes(session.buffer)
+            self._write_file(os.path.join(directory, current), self._seal(session, "partial", partial))
+        self._write_file(os.path.join(directory, "meta.json"), json.dumps(session.to_dict()).encode())
+        for name in os.listdir(directory):
+            if name.startswith("partial-") and (session.complete or name != current):
+                os.remove(os.path.join(directory, name))
+
+    @contextlib.contextmanager
+    def _locked(self, upload_id: str) -> Iterator[None]:
+        """Hold the upload's lock file, across worker processes; fail fast if busy."""
+        try:
+            lock = open(os.path.join(self._dir(upload_id), "lock"), "a")
+        except FileNotFoundError:
+            raise UploadError("Unknown upload", 404) from None
+        try:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError("Upload is being written by another request", 409) from None
+            yield
+        finally:
+            lock.close()
+
+    def load(self, upload_id: str) -> UploadSession:
+        """
+        Read an upload's persisted state, including its partial chunk.
+
+        Raises:
+            UploadError: 404 if the upload does not exist
+        """
+        directory = self._dir(upload_id)
+        try:
+            with open(os.path.join(directory, "meta.json"), "rb") as f:
+                session = UploadSession.from_dict(json.loads(f.read()))
+        except FileNotFoundError:
+            raise UploadError("Unknown upload", 404) from None
+        if session.encrypted and self.cipher is None:
+            raise UploadError("Upload was encrypted but no encryption key is configured", 500)
+        try:
+            with open(os.path.join(directory, f"partial-{session.offset}"), "rb") as f:
+                partial = self._open(session, "partial", f.read())
+        except FileNotFoundError:
+            partial = b"\x00"
+        tail_length = partial[0]
+        session.tail = partial[1:1 + tail_length]
+        session.buffer = bytearray(partial[1 + tail_length:])
+        return session
+
+    # -- lifecycle ------------------------------------------------------------
+
+    def create(self, user_id: str, length: Optional[int] = None) -> UploadSession:
+        """
+        Start a new upload.
+
+        Args:
+            user_id: Owner of the export
+            length: Declared length of the base64 body, if known
+
+        Returns:
+            The new session, at offset 0
+        """
+        if length is not None and length * 3 // 4 > self.max_bytes:
+            raise UploadError("Upload exceeds the maximum size", 413)
+        session = UploadSession(uuid.uuid4().hex, user_id, length=length, encrypted=self.cipher is not None)
+        os.makedirs(self._dir(session.upload_id))
+        self._commit(session)
+        return session
+
+    async def append(self, upload_id: str, offset: int, body: AsyncIterator[bytes]) -> UploadSession:
+        """
+        Stream base64 text onto the end of an upload.
+
+        Args:
+            upload_id: Upload to append to
+            offset: Offset of the body's first byte; must equal the upload's
+                current offset
+            body: The request body, as received
+
+        Returns:
+            The session after the append
+
+        Raises:
+            UploadError: 404 unknown upload, 409 offset mismatch, completed
+                upload or concurrent append, 413 too large, 400 invalid base64
+        """
+        loop = asyncio.get_running_loop()
+        with self._locked(upload_id):
+            session = await loop.run_in_executor(None, self.load, upload_id)
+            if session.complete:
+                raise UploadError("Upload already completed", 409, session.offset)
+            if offset != session.offset:
+                raise UploadError("Offset does not match the upload", 409, session.offset)
+
+            try:
+                async for piece in body:
+                    session.offset += len(piece)
+                    if session.length is not None and session.offset > session.length:
+                        raise UploadError("Body is longer than the declared length", 413)
+                    data = session.tail + piece.translate(None, _WHITESPACE)
+                    cut = len(data) - len(data) % 4
+                    session.tail = data[cut:]
+                    try:
+                        session.buffer += base64.b64decode(data[:cut], validate=True)
+                    except binascii.Error as e:
+                        raise UploadError(f"Invalid base64 data: {e}") from None
+                    if session.size + len(session.buffer) > self.max_bytes:
+                        raise UploadError("Upload exceeds the maximum size", 413)
+                    while len(session.buffer) >= self.chunk_size:
+                        chunk = bytes(session.buffer[:self.chunk_size])
+                        del session.buffer[:self.chunk_size]
+                        await loop.run_in_executor(None, self._write_chunk, session, session.chunks, chunk)
+                        session.chunks += 1
+                        session.size += len(chunk)
+            except UploadError:
+                raise  # nothing from this request is committed
+            except Exception:
+                # Client went away mid-body: keep what arrived so it can resume
+                await loop.run_in_executor(None, self._commit, session)
+                raise
+            await loop.run_in_executor(None, self._commit, session)
+            return session
+
+    async def complete(self, upload_id: str) -> UploadSession:
+        """
+        Finish an upload: flush the last (short) chunk and mark it complete.
+
+        Raises:
+            UploadError: 409 if the declared length was not reached, 400 if
+                the base64 data ends mid-quantum
+        """
+        with self._locked(upload_id):
+            session = await asyncio.get_running_loop().run_in_executor(None, self.load, upload_id)
+            if session.complete:
+                return session
+            await self._finish(session)
+            return session
+
+    async def _finish(self, session: UploadSession) -> None:
+        if session.length is not None and session.offset != session.length:
+            raise UploadError("Upload is not finished", 409, session.offset)
+        if session.tail:
+            raise UploadError("Base64 data is truncated")
+
+        def finish() -> None:
+            if session.buffer:
+                self._write_chunk(session, session.chunks, bytes(session.buffer))
+                session.chunks += 1
+                session.size += len(session.buffer)
+                session.buffer = bytearray()
+            session.complete = True
+            self._commit(session)
+
+        await asyncio.get_running_loop().run_in_executor(None, finish)
+
+    def iter_chunks(self, upload_id: str) -> Iterator[bytes]:
+        """Yield a completed upload's decoded (and decrypted) chunks in order."""
+        session = self.load(upload_id)
+        if not session.complete:
+            raise UploadError("Upload is not finished", 409, session.offset)
+        directory = self._dir(upload_id)
+        for index in range(session.chunks):
+            name = f"chunk-{index:06d}"
+            with open(os.path.join(directory, name), "rb") as f:
+                yield self._open(session, name, f.read())
+
+    def delete(self, upload_id: str) -> bool:
+        """Remove an upload and its chunks."""
+        try:
+            directory = self._dir(upload_id)
+        except UploadError:
+            return False
+        if not os.path.isdir(directory):
+            return False
+        shutil.rmtree(directory, ignore_errors=True)
+        return True
+
+    def delete_user(self, user_id: str) -> int:
+        """Remove every upload owned by ``user_id``; returns how many."""
+        deleted = 0
+        for upload_id, meta in self._scan():
+            if meta.get("user_id") == user_id and self.delete(upload_id):
+                deleted += 1
+        return deleted
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Remove unfinished uploads older than the TTL; returns how many."""
+        now = time.time() if now is None else now
+        removed = 0
+        for upload_id, meta in self._scan():
+            if not meta.get("complete") and now - meta.get("created_at", now) > self.ttl_seconds:
+                removed += self.delete(upload_id)
+        return removed
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                removed = await loop.run_in_executor(None, self.sweep)
+                if removed:
+                    logger.info("Removed %d expired uploads", removed)
+            except Exception:
+                logger.exception("Upload sweep failed")
+            await asyncio.sleep(self.sweep_seconds)
+
+    def start(self) -> None:
+        """Start sweeping expired uploads every ``sweep_seconds`` on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the sweep loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _scan(self) -> Iterator[tuple]:
+        if not os.path.isdir(self.root):
+            return
+        for upload_id in os.listdir(self.root):
+            try:
+                with open(os.path.join(self.root, upload_id, "meta.json"), "rb") as f:
+                    yield upload_id, json.loads(f.read())
+            except (OSError, ValueError):
+                continue
@@ -0,0 +1,195 @@
+"""
+Blocking-Call Watchdog
+
+This module detects synchronous work that blocks the asyncio event loop, such as
+an SDK call made directly inside an ``async def`` handler. A heartbeat coroutine
+on the loop updates a timestamp at a fixed interval and a daemon thread checks
+it; when the heartbeat is late by more than the configured threshold, the
+thread captures the loop thread's current stack, attributes it to a provider
+adapter and/or route, logs it and updates counters.
+
+The watchdog only reads the loop thread's frames while it is stalled, so it is
+cheap enough to leave enabled in production.
+"""
+
+import asyncio
+import logging
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_PROVIDER_PATH = re.compile(r"[/\\]providers[/\\](\w+)[/\\]")
+
+
+def provider_from_filename(filename: str) -> Optional[str]:
+    """Return the provider package name for a source file, if it belongs to one."""
+    match = _PROVIDER_PATH.search(filename)
+    return match.group(1) if match else None
+
+
+class BlockingEvent:
+    """A single detected stall of the event loop."""
+
+    __slots__ = ("started_at", "duration_ms", "route", "provider", "stack")
+
+    def __init__(self, started_at: float, route: Optional[str], provider: Optional[str], stack: str):
+        self.started_at = started_at
+        self.duration_ms = 0.0
+        self.route = route
+        self.provider = provider
+        self.stack = stack
+
+    @property
+    def source(self) -> str:
+        """Attribution label used for counters, e.g. "provider:qwen"."""
+        if self.provider:
+            return f"provider:{self.provider}"
+        if self.route:
+            return f"route:{self.route}"
+        return "unknown"
+
+
+class BlockingWatchdog:
+    """
+    Detects event-loop stalls and attributes them to a provider or route.
+
+    Counters are kept per attribution source and the most recent events are
+    retained for inspection. Stacks for a given source are logged at most once
+    per ``log_interval_seconds`` to keep log volume bounded in production.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 100.0,
+        max_stack_depth: int = 30,
+        log_interval_seconds: float = 60.0,
+        keep_events: int = 20,
+    ):
+        if threshold_ms <= 0:
+            raise ValueError("Watchdog threshold must be positive")
+
+        self.threshold_ms = threshold_ms
+        self.max_stack_depth = max_stack_depth
+        self.log_interval_seconds = log_interval_seconds
+        self.keep_events = keep_events
+
+        self.beat_interval = threshold_ms / 4000.0
+        self.blocked_count = 0
+        self.blocked_ms_total = 0.0
+        self.counts: Counter = Counter()
+        self.events = []
+
+        self._route_codes: Dict[object, str] = {}
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._current: Optional[BlockingEvent] = None
+        self._last_logged: Dict[str, float] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register_routes(self, routes: Iterable) -> None:
+        """Map endpoint code objects to route paths so stalls can be attributed."""
+        for route in routes:
+            endpoint = getattr(route, "endpoint", None)
+            code = getattr(endpoint, "__code__", None)
+            if code is not None:
+                self._route_codes[code] = getattr(route, "path", endpoint.__name__)
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the monitor thread."""
+        if self._thread is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._monitor, name="blocking-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Stop the monitor thread and the heartbeat."""
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._last_beat = time.monotonic()
+            if self._current is not None:
+                self._finish_event(self._last_beat)
+            await asyncio.sleep(self.beat_interval)
+
+    def _monitor(self) -> None:
+        limit = self.beat_interval + self.threshold_ms / 1000.0
+        while not self._stop.wait(self.beat_interval):
+            last_beat = self._last_beat
+            if self._current is None and time.monotonic() - last_beat > limit:
+                self._capture(last_beat)
+
+    # -- detection -----------------------------------------------------------
+
+    def _capture(self, last_beat: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None or self._last_beat != last_beat:
+            return  # loop resumed while we were looking
+        route, provider = self._attribute(frame)
+        stack = "".join(traceback.format_stack(frame, limit=self.max_stack_depth))
+        self._current = BlockingEvent(last_beat + self.beat_interval, route, provider, stack)
+
+    def _attribute(self, frame) -> Tuple[Optional[str], Optional[str]]:
+        route = provider = None
+        while frame is not None:
+            code = frame.f_code
+            if provider is None:
+                provider = provider_from_filename(code.co_filename)
+            if route is None:
+                route = self._route_codes.get(code)
+            frame = frame.f_back
+        return route, provider
+
+    def _finish_event(self, resumed_at: float) -> None:
+        event, self._current = self._current, None
+        event.duration_ms = max(0.0, (resumed_at - event.started_at) * 1000.0)
+        self.record(event)
+
+    def record(self, event: BlockingEvent) -> None:
+        """Count a finished stall and log its stack if not logged recently."""
+        self.blocked_count += 1
+        self.blocked_ms_total += event.duration_ms
+        self.counts[event.source] += 1
+        self.events.append(event)
+        if len(self.events) > self.keep_events:
+            del self.events[0]
+
+        now = time.monotonic()
+        if now - self._last_logged.get(event.source, float("-inf")) >= self.log_interval_seconds:
+            self._last_logged[event.source] = now
+            logger.warning(
+                "Event loop blocked for %.1fms by %s (route=%s)\n%s",
+                event.duration_ms, event.source, event.route, event.stack,
+            )
+
+    def snapshot(self) -> dict:
+        """Return counters for health and debugging endpoints."""
+        return {
+            "blocked": self.blocked_count,
+            "blocked_ms_total": round(self.blocked_ms_total, 3),
+            "by_source": dict(self.counts),
+        }